@@ -1,33 +1,84 @@
 """
 Real-Time Analytics Engine.
 
-Thread-safe, in-memory tracker for prediction analytics including:
+Thread-safe tracker for prediction analytics, per process or shared by
+all workers in a pod (``ANALYTICS_BACKEND``), including:
 - Running statistics (total, high/low risk, avg confidence)
-- Prediction history over time
-- Spike detection via rolling window analysis
+- Prediction history over time (columnar ring buffer, see ``app.history``)
+- Per-second/minute/hour aggregates for charts (``app.timeseries``)
+- Quantile sketches of the probability and every feature (``app.sketch``)
+- Pluggable O(1) spike detectors: windows, EWMA, CUSUM (``app.detectors``)
 - Feature distribution shift analysis for spike explanation
+- Streaming PSI/KS drift against the training histograms (``app.drift``)
+- Optional on-disk archive for restarts and old time ranges (``app.archive``)
 """
 
 import json
 import os
 import threading
-from collections import deque
-from datetime import datetime, timezone
+import time
 from typing import Optional
 
+import numpy as np
+
+from app.config import settings
+from app.arena import nest, open_arena
+from app.archive import PredictionArchive, to_columns
+from app.detectors import WindowDetector, detector_specs
+from app.drift import DriftMonitor, baseline_histograms
+from app.history import PredictionHistory, feature_row, serialise_window
+from app.logger import get_logger
+from app.sketch import DEFAULT_QUANTILES, QuantileSketches, quantile_label
+from app.timeseries import TimeSeries, serialise_series
+from ml.stages import observe
 from ml.train import METADATA_PATH, FEATURE_NAMES
 
+logger = get_logger(__name__)
+
+
+# Slots of the int64 "counters" array
+_TOTAL, _HIGH_RISK, _LOW_RISK, _OUTLIERS = range(4)
+
 
 class AnalyticsTracker:
-    """Singleton analytics tracker for real-time prediction monitoring."""
+    """Singleton analytics tracker for real-time prediction monitoring.
+
+    All mutable state lives in arrays from an ``app.arena`` arena: private
+    to the process with ``ANALYTICS_BACKEND=memory``, shared by every
+    worker in the pod with ``ANALYTICS_BACKEND=shared``.
+
+    Each aggregate has its own lock (``LOCKS``). A batch of events takes
+    them hand over hand in that order – the next before letting go of the
+    current one – so batches pass through the aggregates one behind the
+    other, several at a time, and readers wait only for the aggregate
+    they read. Holding every lock (``arena.locked()``) therefore never
+    sees a batch half applied, which is what a snapshot needs.
+    """
 
     _instance = None
     _lock = threading.Lock()
 
     # ── Configuration ────────────────────────
-    HISTORY_MAX = 500        # Max prediction records kept
-    SPIKE_WINDOW = 20        # Recent window size for spike detection
-    SPIKE_THRESHOLD = 2.0    # Spike if high-risk rate > threshold × baseline
+    HISTORY_MAX = settings.ANALYTICS_HISTORY_MAX  # Max prediction records kept
+    SPIKE_WINDOW = settings.SPIKE_WINDOW_SIZE  # Primary spike window (see app.detectors)
+    SPIKE_THRESHOLD = settings.SPIKE_THRESHOLD  # Window spike if rate > threshold × baseline
+    SPIKE_DETECTORS = settings.spike_detectors
+    SPIKE_WINDOWS = settings.spike_windows
+    SPIKE_EWMA_ALPHA = settings.SPIKE_EWMA_ALPHA
+    SPIKE_EWMA_THRESHOLD = settings.SPIKE_EWMA_THRESHOLD
+    SPIKE_CUSUM_K = settings.SPIKE_CUSUM_K
+    SPIKE_CUSUM_H = settings.SPIKE_CUSUM_H
+    SPIKE_BASELINE_ALPHA = settings.SPIKE_BASELINE_ALPHA
+    SKETCH_RELATIVE_ACCURACY = settings.SKETCH_RELATIVE_ACCURACY  # Quantile error bound
+    SKETCH_METRICS = ("probability", *FEATURE_NAMES)
+    DRIFT_WINDOWS = settings.drift_windows  # Sliding windows for drift scores
+    BACKEND = settings.ANALYTICS_BACKEND    # "memory" or "shared"
+    SHM_NAME = settings.ANALYTICS_SHM_NAME  # Shared segment (default: per master process)
+    ARCHIVE_DIR = settings.ANALYTICS_ARCHIVE_DIR  # On-disk log + snapshots ("" = off)
+    ARCHIVE_MAX_SEGMENTS = settings.ANALYTICS_ARCHIVE_MAX_SEGMENTS
+    # Arena locks in the order a batch takes them; "history" also covers the
+    # spike detectors, which read the ring as they update
+    LOCKS = ("counters", "history", "drift", "sketch", "timeseries", "archive")
 
     def __new__(cls):
         if cls._instance is None:
@@ -42,28 +93,174 @@ class AnalyticsTracker:
             return
         self._initialised = True
 
-        self.total = 0
-        self.high_risk = 0
-        self.low_risk = 0
-        self.outlier_count = 0
-        self.confidence_sum = 0.0
-        self.history = deque(maxlen=self.HISTORY_MAX)
-        self._data_lock = threading.Lock()
-
         # Load baseline stats from training metadata
         self.baseline_stats = {}
         self.baseline_high_risk_rate = 0.5  # Default 50%
-        self._load_baseline()
+        histograms = self._load_baseline()
+
+        detectors = detector_specs(self, self.HISTORY_MAX)
+        layout = {
+            "counters": ((4,), np.int64),
+            "confidence_sum": ((1,), np.float64),
+            **nest("history", PredictionHistory.layout(self.HISTORY_MAX)),
+            **nest("timeseries", TimeSeries.layout()),
+            **nest("sketch", QuantileSketches.layout(self.SKETCH_METRICS, self.SKETCH_RELATIVE_ACCURACY)),
+        }
+        for name, cls, _ in detectors:
+            layout.update(nest(f"spike.{name}", cls.layout()))
+        if histograms is not None:
+            layout.update(nest("drift", DriftMonitor.layout(histograms, self.DRIFT_WINDOWS)))
+        if self.ARCHIVE_DIR:
+            layout.update(nest("archive", PredictionArchive.layout()))
+        self.arena = open_arena(self.BACKEND, layout, self.SHM_NAME, self.LOCKS)
+        self._locks = self.arena.locks
+
+        # Running totals, updated per record; memoryviews read back plain
+        # Python numbers.
+        self._counters = memoryview(self.arena.arrays["counters"])
+        self._confidence = memoryview(self.arena.arrays["confidence_sum"])
+        self.history = PredictionHistory(self.HISTORY_MAX, self.arena.section("history"))
+        self.timeseries = TimeSeries(self.arena.section("timeseries"))
+        self.sketches = QuantileSketches(
+            self.SKETCH_METRICS, self.SKETCH_RELATIVE_ACCURACY, self.arena.section("sketch"),
+        )
+        self.drift: Optional[DriftMonitor] = None  # Needs training histograms
+        if histograms is not None:
+            self.drift = DriftMonitor(histograms, self.DRIFT_WINDOWS, self.arena.section("drift"))
+        # Spike detectors; the first is the primary SPIKE_WINDOW window
+        self.detectors = [
+            cls(**kwargs, arrays=self.arena.section(f"spike.{name}"))
+            for name, cls, kwargs in detectors
+        ]
+
+        self.archive: Optional[PredictionArchive] = None
+        if self.ARCHIVE_DIR:
+            self.archive = PredictionArchive(
+                self.ARCHIVE_DIR, self.arena.section("archive"), self.ARCHIVE_MAX_SEGMENTS,
+            )
+            if self.arena.created:
+                # Other workers wait for ready(), so nothing else is using the arrays
+                self._restore()
+        self.arena.ready()
 
-    def _load_baseline(self) -> None:
-        """Load dataset baseline stats for shift analysis."""
+    def _load_baseline(self) -> Optional[dict]:
+        """Load dataset baseline stats for shift analysis.
+
+        Returns:
+            The training histograms for drift monitoring, if saved.
+        """
         if os.path.exists(METADATA_PATH):
             try:
                 with open(METADATA_PATH, "r") as f:
                     metadata = json.load(f)
                 self.baseline_stats = metadata.get("baseline_stats", {})
+                return baseline_histograms(metadata)
             except Exception:
                 pass
+        return None
+
+    def close(self) -> None:
+        """Snapshot to the archive and release the arena.
+
+        A shared segment is removed once every worker has closed it.
+        """
+        if self.archive is not None:
+            with self.arena.locked():
+                snapshot = self._snapshot_locked()
+                self.archive.close()
+            self.archive.save_snapshot(*snapshot)
+        self.arena.close()
+
+    # ── Durability ───────────────────────────
+
+    def _snapshot_locked(self) -> tuple[int, dict]:
+        """Claim a snapshot and copy every aggregate array (caller holds every lock).
+
+        The history is the archive itself. The copy is about 1 MB, so
+        callers write it with ``archive.save_snapshot()`` after releasing
+        the lock rather than serialising it while other workers wait.
+        """
+        arrays = {
+            name: array.copy() for name, array in self.arena.arrays.items()
+            if name.split(".")[0] not in ("history", "archive")
+        }
+        return self.archive.claim_snapshot(), arrays
+
+    def _restore(self) -> None:
+        """Rebuild state after a restart: latest snapshot, then the log tail."""
+        start = time.perf_counter()
+        self.archive.recover()
+        position = 0
+        snapshot = self.archive.load_snapshot()
+        if snapshot is not None:
+            position, arrays = snapshot
+            self._load_state(arrays)
+
+        # Hot tier: the records the ring held when the snapshot was taken
+        held = self.archive.read_seq(max(0, position - self.HISTORY_MAX), position)
+        self.history.extend(to_columns(held))
+        self._recount_spike_counters()
+
+        # Events recorded after the snapshot
+        tail = to_columns(self.archive.read_seq(position, self.archive.next_seq))
+        self._apply(list(zip(
+            tail["timestamp"].tolist(),
+            tail["prediction"].tolist(),
+            tail["probability"].tolist(),
+            tail["is_outlier"].tolist(),
+            tail["features"],
+        )), log=False)
+
+        if self.archive.next_seq:
+            logger.info(
+                "Analytics restored: %d predictions, %d replayed from the log (%.3fs)",
+                self.total, len(tail["timestamp"]), time.perf_counter() - start,
+            )
+
+    def _load_state(self, arrays: dict) -> None:
+        """Copy snapshot arrays into the arena, one component at a time.
+
+        A component whose layout changed since the snapshot (e.g. new drift
+        windows) starts empty instead.
+        """
+        components = {name.split(".")[0] for name in arrays}
+        for component in components:
+            saved = {n: a for n, a in arrays.items() if n.split(".")[0] == component}
+            live = {n: a for n, a in self.arena.arrays.items() if n.split(".")[0] == component}
+            if saved.keys() != live.keys() or any(
+                saved[n].shape != live[n].shape or saved[n].dtype != live[n].dtype for n in saved
+            ):
+                logger.warning("Analytics snapshot does not match %s layout – not restored", component)
+                continue
+            for name, array in saved.items():
+                live[name][...] = array
+
+    def _recount_spike_counters(self) -> None:
+        """Derive the window detectors' counts from the records in the ring."""
+        predictions = self.history.column("prediction")
+        for detector in self.detectors:
+            if isinstance(detector, WindowDetector):
+                detector.recount(predictions)
+
+    @property
+    def total(self) -> int:
+        return self._counters[_TOTAL]
+
+    @property
+    def high_risk(self) -> int:
+        return self._counters[_HIGH_RISK]
+
+    @property
+    def low_risk(self) -> int:
+        return self._counters[_LOW_RISK]
+
+    @property
+    def outlier_count(self) -> int:
+        return self._counters[_OUTLIERS]
+
+    @property
+    def confidence_sum(self) -> float:
+        return self._confidence[0]
 
     def record_prediction(
         self,
@@ -72,34 +269,113 @@ class AnalyticsTracker:
         is_outlier: bool,
         features: dict,
     ) -> None:
-        """Record a new prediction event."""
-        with self._data_lock:
-            self.total += 1
-            if prediction == 1:
-                self.high_risk += 1
-            else:
-                self.low_risk += 1
-            if is_outlier:
-                self.outlier_count += 1
-            self.confidence_sum += probability
-
-            self.history.append({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "prediction": prediction,
-                "probability": round(probability, 4),
-                "is_outlier": is_outlier,
-                "features": {k: features.get(k) for k in FEATURE_NAMES},
-            })
+        """Record a new prediction event.
+
+        ``features`` may be a dict keyed by ``FEATURE_NAMES`` or a vector
+        in that order.
+        """
+        self._record([(prediction, probability, is_outlier, features)])
+
+    def record_predictions(self, records: list[dict]) -> None:
+        """Record many prediction events, taking each aggregate's lock once.
+
+        Args:
+            records: Dicts with ``prediction``, ``probability``,
+                ``is_outlier`` and ``features`` keys.
+        """
+        self._record([
+            (r["prediction"], r["probability"], r["is_outlier"], r["features"]) for r in records
+        ])
+
+    def _record(self, records: list[tuple]) -> None:
+        """Stamp, apply and log a batch, then save a snapshot if one is due."""
+        start = time.perf_counter()
+        now = time.time()
+        events = [
+            (now, prediction, probability, is_outlier, feature_row(features))
+            for prediction, probability, is_outlier, features in records
+        ]
+        if events and self._apply(events):
+            snapshot = None
+            with self.arena.locked():
+                if self.archive.snapshot_due:  # Another worker may have taken it
+                    snapshot = self._snapshot_locked()
+            if snapshot is not None:
+                self.archive.save_snapshot(*snapshot)
+        observe("analytics", time.perf_counter() - start)
+
+    def _apply(self, events: list[tuple], log: bool = True) -> bool:
+        """Update every aggregate with a batch of events, taking ``LOCKS`` hand over hand.
+
+        Args:
+            events: ``(timestamp, prediction, probability, is_outlier, row)``
+                tuples.
+            log: Append the events to the archive; False when replaying it,
+                which happens before other workers may use the arena.
+
+        Returns:
+            True when the archive is due a snapshot.
+        """
+        due = False
+        held = None
+        try:
+            for name in self.LOCKS:
+                if log:
+                    lock = self._locks[name]
+                    lock.acquire()
+                    if held is not None:
+                        held.release()
+                    held = lock
+                due = self._update(name, events, log) or due
+        finally:
+            if held is not None:
+                held.release()
+        return due
+
+    def _update(self, name: str, events: list[tuple], log: bool) -> bool:
+        """Apply a batch to the aggregates guarded by lock ``name``."""
+        if name == "counters":
+            c = self._counters
+            for _, prediction, probability, is_outlier, _ in events:
+                c[_TOTAL] += 1
+                if prediction == 1:
+                    c[_HIGH_RISK] += 1
+                else:
+                    c[_LOW_RISK] += 1
+                if is_outlier:
+                    c[_OUTLIERS] += 1
+                self._confidence[0] += probability
+        elif name == "history":
+            for timestamp, prediction, probability, is_outlier, row in events:
+                # Spike detectors see the ring before the append
+                high = prediction == 1
+                for detector in self.detectors:
+                    detector.update(high, self.history)
+                self.history.append(timestamp, prediction, probability, is_outlier, row)
+        elif name == "drift" and self.drift is not None:
+            for event in events:
+                self.drift.update(event[4])
+        elif name == "sketch":
+            for _, _, probability, _, row in events:
+                self.sketches.update([probability, *row.tolist()])
+        elif name == "timeseries":
+            for timestamp, prediction, probability, is_outlier, _ in events:
+                self.timeseries.record(timestamp, prediction, probability, is_outlier)
+        elif name == "archive" and self.archive is not None and log:
+            for event in events:
+                self.archive.append(*event)
+            return self.archive.snapshot_due
+        return False
 
     def get_stats(self) -> dict:
         """Return real-time aggregated statistics."""
-        with self._data_lock:
+        with self.arena.locked("counters", "sketch"):
             avg_conf = (
                 round(self.confidence_sum / self.total, 4)
                 if self.total > 0
                 else 0.0
             )
-            return {
+            stats = {
                 "total_predictions": self.total,
                 "high_risk_count": self.high_risk,
                 "low_risk_count": self.low_risk,
@@ -109,55 +385,141 @@ class AnalyticsTracker:
                 "average_confidence": avg_conf,
                 "outlier_count": self.outlier_count,
             }
+            counts = self.sketches.snapshot("probability")
+        (probability,) = self.sketches.quantiles(counts)
+        stats["probability_quantiles"] = {
+            quantile_label(q): value for q, value in probability["quantiles"].items()
+        }
+        return stats
 
-    def get_history(self, limit: int = 200) -> list[dict]:
-        """Return recent prediction history."""
-        with self._data_lock:
-            items = list(self.history)
-            return items[-limit:]
+    def get_quantiles(
+        self,
+        metrics: Optional[list[str]] = None,
+        qs: tuple[float, ...] = DEFAULT_QUANTILES,
+    ) -> dict:
+        """Estimated quantiles of the probability and feature distributions.
+
+        Args:
+            metrics: Subset of ``SKETCH_METRICS`` (default: all).
+            qs: Quantiles in ``[0, 1]``.
+
+        Raises:
+            ValueError: On an unknown metric or a quantile outside ``[0, 1]``.
+        """
+        metrics = list(metrics or self.SKETCH_METRICS)
+        unknown = [m for m in metrics if m not in self.SKETCH_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metric(s): {', '.join(unknown)}")
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        rows = [self.SKETCH_METRICS.index(m) for m in metrics]
+        with self._locks["sketch"]:
+            counts = self.sketches.snapshot()[rows]
+        return {
+            "relative_accuracy": self.SKETCH_RELATIVE_ACCURACY,
+            "metrics": [
+                {
+                    "metric": metric,
+                    "count": result["count"],
+                    "quantiles": {quantile_label(q): v for q, v in result["quantiles"].items()},
+                }
+                for metric, result in zip(metrics, self.sketches.quantiles(counts, qs))
+            ],
+        }
 
-    def detect_spike(self) -> dict:
-        """Detect a spike in high-risk predictions using rolling window."""
-        with self._data_lock:
-            items = list(self.history)
+    def get_history(
+        self,
+        limit: int = 200,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> list[dict]:
+        """Return the newest ``limit`` predictions in ``[start, end]`` (epoch seconds).
+
+        The in-memory ring answers first; with an archive configured, the
+        part of a time range older than the ring is read from disk.
+        """
+        with self._locks["history"]:
+            cols = self.history.window(limit, since=start, until=end)
+            oldest = self.history.oldest_timestamp()
+
+        missing = limit - len(cols["timestamp"])
+        if self.archive is not None and start is not None and missing > 0:
+            if oldest is None or start < oldest:
+                until = end
+                if oldest is not None:
+                    before_ring = float(np.nextafter(oldest, -np.inf))
+                    until = before_ring if end is None else min(end, before_ring)
+                older = self.archive.read(start, until, missing)
+                cols = {name: np.concatenate([older[name], cols[name]]) for name in cols}
+        return serialise_window(cols)
+
+    def get_timeseries(
+        self,
+        resolution: str = "minute",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> dict:
+        """Bucketed counts over ``[start, end]`` (epoch seconds) at ``resolution``.
+
+        Raises:
+            ValueError: On an unknown resolution.
+        """
+        with self._locks["timeseries"]:
+            cols = self.timeseries.window(resolution, start, end)
+        return {
+            "resolution": resolution,
+            "step_seconds": cols["step"],
+            "points": serialise_series(cols),
+        }
 
-        if len(items) < self.SPIKE_WINDOW:
+    def get_drift(self) -> dict:
+        """PSI and approximate KS per feature against the training histograms."""
+        if self.drift is None:
+            return {
+                "available": False,
+                "message": "Training histograms not found. Run `python -m ml.train` first.",
+                "windows": [],
+            }
+        with self._locks["drift"]:
+            counts = self.drift.snapshot()
+        return self.drift.report(counts)
+
+    def detect_spike(self) -> dict:
+        """Report every spike detector.
+
+        The top-level rates and ``spike_score`` are the primary
+        ``SPIKE_WINDOW`` window's; ``spike_detected`` is set when any
+        detector alarms. Reads O(1) detector state, so the cost does not
+        depend on ``HISTORY_MAX``.
+        """
+        with self._locks["history"]:
+            n = len(self.history)
+            primary = self.detectors[0]
+            recent_hr, baseline_hr = primary.rates(self.baseline_high_risk_rate)
+            reports = [d.report(n, self.baseline_high_risk_rate) for d in self.detectors]
+
+        if n < self.SPIKE_WINDOW:
             return {
                 "spike_detected": False,
                 "spike_score": 0.0,
                 "message": "Insufficient data for spike detection.",
-                "window_size": len(items),
+                "window_size": n,
                 "required": self.SPIKE_WINDOW,
+                "detectors": reports,
+                "triggered_by": [],
             }
 
-        # Recent window high-risk rate
-        recent = items[-self.SPIKE_WINDOW:]
-        recent_hr = sum(1 for r in recent if r["prediction"] == 1) / len(recent)
-
-        # Overall baseline high-risk rate
-        if len(items) > self.SPIKE_WINDOW:
-            older = items[:-self.SPIKE_WINDOW]
-            baseline_hr = (
-                sum(1 for r in older if r["prediction"] == 1) / len(older)
-                if older
-                else self.baseline_high_risk_rate
-            )
-        else:
-            baseline_hr = self.baseline_high_risk_rate
-
-        # Avoid division by zero
-        if baseline_hr == 0:
-            baseline_hr = 0.01
-
-        spike_score = round(recent_hr / baseline_hr, 4)
-        spike_detected = spike_score >= self.SPIKE_THRESHOLD
-
+        triggered = [r["name"] for r in reports if r["detected"]]
+        spike_detected = bool(triggered)
         return {
             "spike_detected": spike_detected,
-            "spike_score": spike_score,
+            "spike_score": reports[0]["score"],
             "recent_high_risk_rate": round(recent_hr, 4),
             "baseline_high_risk_rate": round(baseline_hr, 4),
             "window_size": self.SPIKE_WINDOW,
+            "detectors": reports,
+            "triggered_by": triggered,
             "message": (
                 "⚠️ Spike detected! High-risk rate is significantly elevated."
                 if spike_detected
@@ -175,22 +537,20 @@ class AnalyticsTracker:
                 "shifting_features": [],
             }
 
-        with self._data_lock:
-            items = list(self.history)
+        with self._locks["history"]:
+            recent = self.history.window(self.SPIKE_WINDOW)["features"]
 
-        recent = items[-self.SPIKE_WINDOW:]
+        # Compare recent feature means vs baseline (NaN = feature not sent)
+        present = ~np.isnan(recent)
+        counts = present.sum(axis=0)
+        sums = np.where(present, recent, 0.0).sum(axis=0, dtype=np.float64)
 
-        # Compare recent feature means vs baseline
         shifting_features = []
-        for feature in FEATURE_NAMES:
-            recent_vals = [
-                r["features"].get(feature, 0) for r in recent
-                if r["features"].get(feature) is not None
-            ]
-            if not recent_vals:
+        for j, feature in enumerate(FEATURE_NAMES):
+            if counts[j] == 0:
                 continue
 
-            recent_mean = sum(recent_vals) / len(recent_vals)
+            recent_mean = float(sums[j] / counts[j])
             baseline = self.baseline_stats.get(feature, {})
             baseline_mean = baseline.get("mean", recent_mean)
             baseline_std = baseline.get("std", 1.0)
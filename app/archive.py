@@ -0,0 +1,403 @@
+"""
+Durable Prediction Archive.
+
+An append-only, segment-based on-disk log of every prediction the tracker
+records, plus periodic snapshots of the tracker's aggregate state, so a
+restart or rollout resumes where the previous process stopped.
+
+Layout of ``ANALYTICS_ARCHIVE_DIR``::
+
+    00000000000000000000.seg   sealed segment: header + zlib-compressed records
+    00000000000000065536.seg
+    00000000000000131072.log   active segment: raw records, appended per event
+    snapshot.npz               aggregate arrays + the sequence number they cover
+
+Each file is named after the sequence number of its first record. A record
+is 66 packed bytes (``RECORD``): epoch timestamp, prediction, probability,
+outlier flag and the 13 float32 features. When the active segment holds
+``SEGMENT_RECORDS`` records it is renamed to ``.sealed`` and compressed into
+a ``.seg`` in a background thread. The ``.seg`` header carries the record
+count and time range, so range queries skip segments without decompressing
+them. Segments are memory-mapped for reads: raw ones directly, compressed
+ones decompressed straight from the mapping.
+
+The in-memory ring (``app.history``) remains the hot tier; the archive
+serves time ranges older than the ring, and restores the ring, counters
+and aggregates on restart: latest snapshot, then a replay of the log tail.
+
+Usage::
+
+    from app.archive import PredictionArchive
+    archive = PredictionArchive("data/archive")
+    archive.recover()
+    archive.append(time.time(), 1, 0.87, False, feature_row)
+    cols = archive.read(since=time.time() - 86400, limit=1000)
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Iterator, Optional
+
+import numpy as np
+
+from app.arena import allocate
+from app.logger import get_logger
+from ml.train import FEATURE_NAMES
+
+logger = get_logger(__name__)
+
+# One archived prediction (packed: 66 bytes)
+RECORD = np.dtype([
+    ("timestamp", "<f8"),
+    ("prediction", "i1"),
+    ("probability", "<f4"),
+    ("is_outlier", "?"),
+    ("features", "<f4", (len(FEATURE_NAMES),)),
+])
+_SCALARS = struct.Struct("<dbf?")  # The record up to its features
+# Sealed segment header: magic, record count, first and last timestamp
+_HEADER = struct.Struct("<8sQdd")
+_MAGIC = b"APDDSEG1"
+
+SNAPSHOT_FILE = "snapshot.npz"
+SNAPSHOT_LOCK = "snapshot.lock"
+
+
+def _name(first_seq: int, suffix: str) -> str:
+    return f"{first_seq:020d}{suffix}"
+
+
+def to_columns(records: np.ndarray) -> dict:
+    """``RECORD`` array → the column dict ``PredictionHistory.window()`` returns."""
+    return {
+        "timestamp": records["timestamp"].astype(np.float64),
+        "prediction": records["prediction"].astype(np.int8),
+        "probability": records["probability"].astype(np.float32),
+        "is_outlier": records["is_outlier"].astype(np.bool_),
+        "features": records["features"].astype(np.float32),
+    }
+
+
+class PredictionArchive:
+    """Segmented on-disk log of prediction records with state snapshots."""
+
+    SEGMENT_RECORDS = 65_536  # Records per segment (~4.3 MB raw)
+    SNAPSHOT_EVERY = 5_000    # Records between snapshots (bounds replay on restart)
+
+    def __init__(self, directory: str, arrays: Optional[dict] = None, max_segments: int = 1000):
+        """
+        Args:
+            directory: Where segments and snapshots live (created if missing).
+            arrays: Cursor storage laid out by ``layout()`` – from a shared
+                ``app.arena`` when several workers append to one archive.
+            max_segments: Sealed segments kept; older ones are deleted.
+        """
+        self.directory = directory
+        self.max_segments = max_segments
+        os.makedirs(directory, exist_ok=True)
+        arrays = arrays if arrays is not None else allocate(self.layout())
+        # [first sequence of the active segment, next sequence,
+        #  last snapshot claimed, last snapshot written]
+        self._cursor = memoryview(arrays["cursor"])
+        self._fd: Optional[int] = None
+        self._fd_seq = -1
+        self._headers: dict[str, tuple[int, float, float]] = {}
+
+    @staticmethod
+    def layout() -> dict:
+        """Arrays the archive cursor needs (see ``app.arena``)."""
+        return {"cursor": ((4,), np.int64)}
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next record will get (= records ever archived)."""
+        return self._cursor[1]
+
+    @property
+    def snapshot_due(self) -> bool:
+        return self._cursor[1] - self._cursor[2] >= self.SNAPSHOT_EVERY
+
+    # ── Writing (caller holds the "archive" lock) ──
+
+    def append(
+        self,
+        timestamp: float,
+        prediction: int,
+        probability: float,
+        is_outlier: bool,
+        features: np.ndarray,
+    ) -> None:
+        """Append one record to the active segment."""
+        if self._fd_seq != self._cursor[0]:
+            self._open_active()
+        os.write(
+            self._fd,
+            _SCALARS.pack(timestamp, prediction, probability, is_outlier) + features.tobytes(),
+        )
+        self._cursor[1] += 1
+        if self._cursor[1] - self._cursor[0] >= self.SEGMENT_RECORDS:
+            self._roll()
+
+    def _open_active(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd_seq = self._cursor[0]
+        path = os.path.join(self.directory, _name(self._fd_seq, ".log"))
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _roll(self) -> None:
+        """Seal the full active segment and start the next one."""
+        first = self._cursor[0]
+        os.close(self._fd)
+        self._fd, self._fd_seq = None, -1
+        os.rename(
+            os.path.join(self.directory, _name(first, ".log")),
+            os.path.join(self.directory, _name(first, ".sealed")),
+        )
+        self._cursor[0] = self._cursor[1]
+        threading.Thread(target=self._seal, args=(first,), daemon=True).start()
+
+    def _seal(self, first: int) -> None:
+        """Compress a ``.sealed`` segment into a ``.seg`` and prune old ones."""
+        sealed = os.path.join(self.directory, _name(first, ".sealed"))
+        try:
+            with open(sealed, "rb") as f:
+                raw = f.read()
+            records = np.frombuffer(raw, RECORD, count=len(raw) // RECORD.itemsize)
+            header = _HEADER.pack(
+                _MAGIC,
+                len(records),
+                float(records["timestamp"][0]) if len(records) else 0.0,
+                float(records["timestamp"][-1]) if len(records) else 0.0,
+            )
+            target = os.path.join(self.directory, _name(first, ".seg"))
+            with open(target + ".tmp", "wb") as f:
+                f.write(header)
+                f.write(zlib.compress(raw[:len(records) * RECORD.itemsize], 1))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(target + ".tmp", target)
+            os.unlink(sealed)
+        except FileNotFoundError:
+            return  # Another worker sealed it first
+        except Exception as exc:
+            logger.error("Failed to seal archive segment %s: %s", sealed, exc)
+            return
+        self._prune()
+
+    def _prune(self) -> None:
+        sealed = [f for f in sorted(os.listdir(self.directory)) if f.endswith(".seg")]
+        for name in sealed[:max(0, len(sealed) - self.max_segments)]:
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def claim_snapshot(self) -> int:
+        """Start a snapshot of the state after every record so far.
+
+        The caller copies the aggregate arrays under the same tracker locks
+        and writes them with ``save_snapshot()`` once it has released them.
+
+        Returns:
+            The sequence number the snapshot covers.
+        """
+        self._cursor[2] = self._cursor[1]
+        return int(self._cursor[2])
+
+    def save_snapshot(self, seq: int, arrays: dict) -> None:
+        """Durably persist aggregate arrays covering the records before ``seq``.
+
+        Runs without the tracker locks. The file is fsynced before it
+        replaces the previous snapshot and the directory after, so a crash
+        leaves one whole snapshot or the other. A snapshot older than one
+        another thread or worker has already written is discarded.
+        """
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, __seq__=np.int64(seq), **arrays)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(os.path.join(self.directory, SNAPSHOT_LOCK), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if seq < self._cursor[3]:
+                    os.unlink(tmp)
+                    return
+                os.replace(tmp, path)
+                self._fsync_directory()
+                self._cursor[3] = seq
+        except OSError as exc:
+            logger.error("Failed to write analytics snapshot at %d: %s", seq, exc)
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def _fsync_directory(self) -> None:
+        """Make renames in the archive directory durable."""
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd, self._fd_seq = None, -1
+
+    # ── Recovery ─────────────────────────────
+
+    def recover(self) -> None:
+        """Rebuild the cursor from disk after a restart.
+
+        Drops a torn record at the end of the active segment and seals
+        segments whose compression was interrupted.
+        """
+        first = next_seq = 0
+        for seq, kind, path in self._segments():
+            if kind == ".sealed":
+                self._seal(seq)
+                sealed = os.path.join(self.directory, _name(seq, ".seg"))
+                if os.path.exists(sealed):
+                    kind, path = ".seg", sealed
+            count = self._count(path, kind)
+            if kind == ".log":
+                size = count * RECORD.itemsize
+                if os.path.getsize(path) != size:
+                    os.truncate(path, size)
+            next_seq = seq + count
+            # Appends continue in a trailing .log, or in a new one after it
+            first = seq if kind == ".log" else next_seq
+        snapshot = self.load_snapshot()
+        self._cursor[0] = first
+        self._cursor[1] = next_seq
+        self._cursor[2] = self._cursor[3] = snapshot[0] if snapshot else 0
+
+    def load_snapshot(self) -> Optional[tuple[int, dict]]:
+        """Return ``(sequence covered, arrays)`` of the latest snapshot, if any."""
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except Exception as exc:
+            logger.warning("Ignoring unreadable analytics snapshot %s: %s", path, exc)
+            return None
+        return int(arrays.pop("__seq__")), arrays
+
+    # ── Reading ──────────────────────────────
+
+    def _segments(self) -> list[tuple[int, str, str]]:
+        """``(first sequence, kind, path)`` of every segment, oldest first."""
+        segments = []
+        for name in os.listdir(self.directory):
+            stem, kind = os.path.splitext(name)
+            if kind in (".seg", ".sealed", ".log") and stem.isdigit():
+                segments.append((int(stem), kind, os.path.join(self.directory, name)))
+        # A segment being sealed can briefly exist in two forms
+        segments.sort(key=lambda s: (s[0], {".seg": 0, ".sealed": 1, ".log": 2}[s[1]]))
+        unique = []
+        for segment in segments:
+            if not unique or unique[-1][0] != segment[0]:
+                unique.append(segment)
+        return unique
+
+    def _header(self, path: str) -> tuple[int, float, float]:
+        """Record count and time range of a sealed segment (cached)."""
+        name = os.path.basename(path)
+        if name not in self._headers:
+            with open(path, "rb") as f:
+                magic, count, first_ts, last_ts = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"Not an archive segment: {path}")
+            self._headers[name] = (count, first_ts, last_ts)
+        return self._headers[name]
+
+    def _count(self, path: str, kind: str) -> int:
+        if kind == ".seg":
+            return self._header(path)[0]
+        return os.path.getsize(path) // RECORD.itemsize
+
+    def _load(self, path: str, kind: str) -> np.ndarray:
+        """Every record of a segment (read-only)."""
+        if kind == ".seg":
+            count = self._header(path)[0]
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                raw = zlib.decompress(memoryview(mm)[_HEADER.size:])
+            return np.frombuffer(raw, RECORD, count=count)
+        count = os.path.getsize(path) // RECORD.itemsize
+        if count == 0:
+            return np.empty(0, RECORD)
+        return np.memmap(path, RECORD, mode="r", shape=(count,))
+
+    def _time_range(self, path: str, kind: str) -> tuple[float, float]:
+        if kind == ".seg":
+            return self._header(path)[1:]
+        records = self._load(path, kind)
+        if len(records) == 0:
+            return (np.inf, -np.inf)
+        return float(records["timestamp"][0]), float(records["timestamp"][-1])
+
+    def _iter_segments(self) -> Iterator[tuple[int, str, str]]:
+        """Segments newest first, skipping any removed while we read."""
+        for segment in reversed(self._segments()):
+            if os.path.exists(segment[2]):
+                yield segment
+
+    def read_seq(self, first: int, last: int) -> np.ndarray:
+        """Records with sequence numbers in ``[first, last)``, oldest first."""
+        parts = []
+        for seq, kind, path in self._iter_segments():
+            try:
+                count = self._count(path, kind)
+                if seq + count <= first:
+                    break  # This and every older segment precede the range
+                if seq >= last:
+                    continue
+                records = self._load(path, kind)
+            except FileNotFoundError:
+                continue
+            parts.append(np.array(records[max(0, first - seq):last - seq]))
+        parts.reverse()
+        return np.concatenate(parts) if parts else np.empty(0, RECORD)
+
+    def read(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> dict:
+        """Newest ``limit`` archived records within ``[since, until]``.
+
+        Returns:
+            Column dict like ``PredictionHistory.window()``, oldest first.
+        """
+        parts, found = [], 0
+        for seq, kind, path in self._iter_segments():
+            if limit is not None and found >= limit:
+                break
+            try:
+                first_ts, last_ts = self._time_range(path, kind)
+                if since is not None and last_ts < since:
+                    break  # Every older segment ends even earlier
+                if until is not None and first_ts > until:
+                    continue
+                records = self._load(path, kind)
+            except FileNotFoundError:
+                continue
+            ts = records["timestamp"]
+            lo = 0 if since is None else int(np.searchsorted(ts, since, side="left"))
+            hi = len(ts) if until is None else int(np.searchsorted(ts, until, side="right"))
+            if limit is not None:
+                lo = max(lo, hi - (limit - found))
+            if hi > lo:
+                parts.append(np.array(records[lo:hi]))
+                found += hi - lo
+        parts.reverse()
+        return to_columns(np.concatenate(parts) if parts else np.empty(0, RECORD))
@@ -0,0 +1,288 @@
+"""
+Analytics Memory Arenas.
+
+The analytics tracker keeps all of its mutable state – counters, the
+history ring and the drift tables – in NumPy arrays carved out of one
+arena, described by a layout of ``name → (shape, dtype)``:
+
+- ``LocalArena`` backs the arrays with private process memory (one view of
+  the traffic per process).
+- ``SharedArena`` backs them with a named ``multiprocessing.shared_memory``
+  segment, so every uvicorn worker in a pod records into, and reads from,
+  the same arrays. The first worker creates the segment, the others attach
+  to it, and the last one to close it removes it.
+
+Each arena has one lock per aggregate, named by the caller, so a worker
+updating one aggregate does not hold up workers reading or updating
+another. With ``SharedArena`` each is a :class:`ProcessLock`: a thread
+lock plus an ``flock`` on a file next to the segment. ``locked()`` takes
+several in the order they were declared.
+
+Liveness comes from the kernel, not a counter: every attached process
+holds a shared ``flock`` on ``<name>.attach``, released by the kernel
+even when the process is SIGKILLed or OOM-killed. A process that can
+take that lock exclusively is alone – it resets a segment whose owners
+all died when attaching, and removes the segment when closing.
+
+Usage::
+
+    from app.arena import open_arena
+    arena = open_arena("shared", {"counts": ((4,), np.int64)}, "apdd-analytics", locks=("counts",))
+    with arena.locks["counts"]:
+        arena.arrays["counts"][0] += 1
+    arena.close()
+"""
+
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator
+
+import numpy as np
+
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+Layout = dict[str, tuple[tuple[int, ...], type]]
+
+# Segment header: magic, layout digest, (unused), ready flag (int64 each)
+_MAGIC = 0x41504444_414E4C59  # "APDDANLY"
+_HEADER_BYTES = 64
+_ALIGN = 64  # Each array starts on its own cache line
+_READY_TIMEOUT = 60.0  # Seconds an attaching worker waits for the creator
+
+
+def nest(prefix: str, layout: Layout) -> Layout:
+    """Namespace a component's layout as ``prefix.name``."""
+    return {f"{prefix}.{name}": spec for name, spec in layout.items()}
+
+
+def allocate(layout: Layout) -> dict[str, np.ndarray]:
+    """Zeroed private arrays for ``layout``.
+
+    ``np.zeros`` is backed by ``calloc``, so large arrays cost nothing
+    until their pages are first written.
+    """
+    return {name: np.zeros(shape, dtype) for name, (shape, dtype) in layout.items()}
+
+
+class _Arena:
+    arrays: dict[str, np.ndarray]
+    locks: dict[str, "ProcessLock | threading.Lock"]
+    created = True  # This process initialises the arrays (e.g. restores state)
+
+    def ready(self) -> None:
+        """Mark initialisation done (see ``SharedArena``)."""
+
+    @contextmanager
+    def locked(self, *names: str) -> Iterator[None]:
+        """Hold the named locks (default: all of them).
+
+        They are always taken in the order they were declared, so two
+        callers holding several never deadlock.
+        """
+        with ExitStack() as stack:
+            for name, lock in self.locks.items():
+                if not names or name in names:
+                    stack.enter_context(lock)
+            yield
+
+    def section(self, prefix: str) -> dict[str, np.ndarray]:
+        """The arrays laid out by ``nest(prefix, ...)``, prefix stripped."""
+        start = prefix + "."
+        return {
+            name[len(start):]: array
+            for name, array in self.arrays.items()
+            if name.startswith(start)
+        }
+
+
+class LocalArena(_Arena):
+    """Arrays in private process memory, guarded by thread locks."""
+
+    def __init__(self, layout: Layout, locks: tuple[str, ...] = ("arena",)):
+        self.arrays = allocate(layout)
+        self.locks = {name: threading.Lock() for name in locks}
+
+    def close(self) -> None:
+        pass
+
+
+class ProcessLock:
+    """Mutual exclusion across threads and processes.
+
+    ``flock`` belongs to the open file, which all threads of a process
+    share, so a thread lock is taken first.
+    """
+
+    def __init__(self, path: str):
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def release(self) -> None:
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def __enter__(self) -> "ProcessLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _plan(layout: Layout) -> tuple[dict[str, int], int, int]:
+    """Byte offset of every array, total segment size and layout digest."""
+    offsets, offset = {}, _HEADER_BYTES
+    for name, (shape, dtype) in layout.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        offsets[name] = offset
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    spec = repr([(name, tuple(shape), np.dtype(dtype).str) for name, (shape, dtype) in layout.items()])
+    digest = int.from_bytes(hashlib.sha256(spec.encode()).digest()[:8], "little") >> 1
+    return offsets, max(offset, _HEADER_BYTES), digest
+
+
+class SharedArena(_Arena):
+    """Arrays in a named shared-memory segment shared by a pod's workers.
+
+    The process that creates the segment has ``created`` set and must call
+    ``ready()`` once it has initialised the arrays; processes attaching
+    meanwhile wait for that before using them.
+    """
+
+    def __init__(self, name: str, layout: Layout, locks: tuple[str, ...] = ("arena",)):
+        self.name = name
+        offsets, size, digest = _plan(layout)
+        prefix = os.path.join(tempfile.gettempdir(), name)
+        self.locks = {lock: ProcessLock(f"{prefix}.{lock}.lock") for lock in locks}
+        self._setup = ProcessLock(f"{prefix}.lock")
+        self._attach = os.open(f"{prefix}.attach", os.O_RDWR | os.O_CREAT, 0o600)
+
+        with self._setup:
+            # Nobody else attached: any existing segment is a dead run's
+            alone = self._try_exclusive()
+            self._shm = self._open(size, digest, reset=alone)
+            fcntl.flock(self._attach, fcntl.LOCK_SH)
+            self.created = alone
+
+        self.arrays = {
+            key: np.ndarray(shape, dtype, buffer=self._shm.buf, offset=offsets[key])
+            for key, (shape, dtype) in layout.items()
+        }
+        if not self.created:
+            self._wait_ready()
+
+    @property
+    def _header(self) -> np.ndarray:
+        return np.ndarray(4, np.int64, buffer=self._shm.buf)
+
+    def ready(self) -> None:
+        self._header[3] = 1
+
+    def _wait_ready(self) -> None:
+        deadline = time.monotonic() + _READY_TIMEOUT
+        while self._header[3] == 0:
+            if time.monotonic() > deadline:
+                logger.warning("Analytics segment %s never became ready – using it anyway", self.name)
+                return
+            time.sleep(0.01)
+
+    def _try_exclusive(self) -> bool:
+        """Take the attach lock exclusively if no other process holds it."""
+        try:
+            fcntl.flock(self._attach, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _open(self, size: int, digest: int, reset: bool) -> SharedMemory:
+        """Attach to the segment, creating it if absent. Caller holds the setup lock.
+
+        Args:
+            reset: Recreate an existing segment (its processes all died).
+        """
+        try:
+            shm = SharedMemory(self.name, create=True, size=size)
+        except FileExistsError:
+            shm = SharedMemory(self.name)
+            _untrack(shm)
+            header = np.ndarray(4, np.int64, buffer=shm.buf)
+            if header[0] == _MAGIC and header[1] == digest and not reset:
+                return shm
+            # Left behind by a dead run or one with other settings – start over
+            logger.warning("Replacing stale analytics segment %s", self.name)
+            del header
+            _unlink(shm)
+            shm.close()
+            shm = SharedMemory(self.name, create=True, size=size)
+
+        _untrack(shm)
+        np.ndarray(4, np.int64, buffer=shm.buf)[:] = (_MAGIC, digest, 0, 0)
+        return shm
+
+    def close(self) -> None:
+        """Detach; the last process to detach removes the segment."""
+        with self._setup:
+            if self._try_exclusive():  # Converts our shared lock if we are the last
+                _unlink(self._shm)
+            os.close(self._attach)
+        self.arrays = {}
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # Views still held elsewhere; the mapping goes with the process
+        for lock in self.locks.values():
+            lock.close()
+        self._setup.close()
+
+
+def _untrack(shm: SharedMemory) -> None:
+    """Stop the resource tracker unlinking the segment when this process exits.
+
+    Python registers every attach as well as every create, so without this
+    the first worker to exit would destroy the state the others still use.
+    """
+    resource_tracker.unregister(shm._name, "shared_memory")
+
+
+def _unlink(shm: SharedMemory) -> None:
+    # unlink() unregisters from the tracker again; re-register so it can
+    resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def open_arena(
+    backend: str, layout: Layout, name: str = "", locks: tuple[str, ...] = ("arena",),
+) -> _Arena:
+    """Open the arena for ``ANALYTICS_BACKEND``.
+
+    Args:
+        backend: ``"memory"`` (per process) or ``"shared"`` (per pod).
+        layout: Arrays to provide.
+        name: Shared segment name; defaults to one per parent process,
+            i.e. per uvicorn/gunicorn master.
+        locks: Names of the locks to provide, in acquisition order.
+
+    Raises:
+        ValueError: On an unknown backend.
+    """
+    if backend == "memory":
+        return LocalArena(layout, locks)
+    if backend == "shared":
+        return SharedArena(name or f"apdd-analytics-{os.getppid()}", layout, locks)
+    raise ValueError(f"Unknown analytics backend {backend!r} (expected 'memory' or 'shared')")
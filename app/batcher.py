@@ -0,0 +1,136 @@
+"""
+Dynamic Micro-Batching Scheduler.
+
+Collects concurrent single-row ``/predict`` calls that arrive within a short
+window and scores them together with one vectorised ``predict_batch`` call,
+so the fixed per-call cost of the forest and SHAP is paid once per batch
+instead of once per request.
+
+A batch is dispatched as soon as ``max_batch_size`` rows are waiting or
+``max_wait_ms`` has elapsed since the first row arrived, whichever is first.
+
+Usage::
+
+    from app.batcher import batcher
+    result = await batcher.submit(features_to_vector(features)[0], explain="fast")
+"""
+
+import asyncio
+import time
+
+import numpy as np
+from prometheus_client import Histogram
+
+from app.config import settings
+from app.executor import executor
+from ml.predict import predict_batch
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+MICROBATCH_SIZE = Histogram(
+    "microbatch_size",
+    "Rows per dispatched micro-batch",
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256],
+)
+MICROBATCH_QUEUE_DELAY = Histogram(
+    "microbatch_queue_delay_seconds",
+    "Time a row waited for its micro-batch to be dispatched",
+    buckets=[0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1],
+)
+MICROBATCH_EXECUTION = Histogram(
+    "microbatch_execution_seconds",
+    "Wall time to score one micro-batch",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions into vectorised batches.
+
+    Rows are queued per explanation mode so every dispatched batch is scored
+    with a single ``predict_batch`` call.
+    """
+
+    def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._pending: dict[str, list[tuple[np.ndarray, asyncio.Future, float]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, vector: np.ndarray, explain: str = "full") -> dict:
+        """Queue one 1-D feature vector and wait for its result from the next batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(explain, [])
+        pending.append((vector, future, time.perf_counter()))
+
+        if len(pending) >= self.max_batch_size:
+            self._dispatch(explain)
+        elif explain not in self._timers:
+            self._timers[explain] = loop.call_later(self.max_wait, self._dispatch, explain)
+
+        return await future
+
+    def shutdown(self) -> None:
+        """Cancel pending windows and fail any rows still waiting."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        pending, self._pending = self._pending, {}
+        for batch in pending.values():
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batcher shut down"))
+
+    def _dispatch(self, explain: str) -> None:
+        """Hand every pending row of one mode to a background batch task."""
+        timer = self._timers.pop(explain, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(explain, None)
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch, explain))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self,
+        batch: list[tuple[np.ndarray, asyncio.Future, float]],
+        explain: str,
+    ) -> None:
+        """Score one batch and resolve each waiting request."""
+        dispatched = time.perf_counter()
+        MICROBATCH_SIZE.observe(len(batch))
+        for _, _, queued_at in batch:
+            MICROBATCH_QUEUE_DELAY.observe(dispatched - queued_at)
+
+        try:
+            X = np.vstack([vector for vector, _, _ in batch])
+            results = await executor.run(predict_batch, X, explain)
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            MICROBATCH_EXECUTION.observe(time.perf_counter() - dispatched)
+
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue  # Caller went away
+            if "error" in result:
+                future.set_exception(ValueError(result["error"]))
+            else:
+                future.set_result(result)
+
+
+# Singleton access
+batcher = MicroBatcher(
+    max_batch_size=settings.MICROBATCH_MAX_SIZE,
+    max_wait_ms=settings.MICROBATCH_MAX_WAIT_MS,
+)
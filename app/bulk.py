@@ -0,0 +1,320 @@
+"""
+Streaming Bulk Scoring.
+
+``POST /predict/stream`` scores files of patient rows – CSV with a header
+row naming (at least) the ``FEATURE_NAMES`` columns, or NDJSON with one
+feature object per line – without holding the file or the results in
+memory. The request body is split into lines as it arrives; every
+``STREAM_CHUNK_ROWS`` rows are parsed into one matrix, checked against the
+``HeartDiseaseInput`` bounds column-wise, scored with one
+``predict_batch()`` call on the inference pool and written back as NDJSON
+or CSV before the next chunk is read. Memory therefore depends on the
+chunk size rather than the file size, and results flow back while the
+upload is still arriving.
+
+Every input row gets one output row, in input order, numbered from 1 (the
+CSV header is not counted; blank lines are skipped). An invalid row
+carries an ``error`` instead of a prediction. A problem that ends the
+stream early – a line over ``MAX_LINE_BYTES``, a dropped upload – is
+reported as a last row with only an ``error``.
+
+Bulk rows are counted in ``bulk_rows_total`` but are not fed to the live
+analytics: a registry file replayed at full speed would read as a spike
+and as drift.
+
+Usage::
+
+    curl -X POST -T patients.csv -H "Content-Type: text/csv" \\
+         "http://localhost:8000/predict/stream?format=csv"
+"""
+
+import asyncio
+import csv
+import io
+import json
+from collections import deque
+from typing import AsyncIterator, Optional
+
+import numpy as np
+from annotated_types import Ge, Le
+from prometheus_client import Counter, Gauge
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.executor import ExecutorSaturatedError, executor
+from app.logger import get_logger
+from app.payloads import dumps
+from app.schemas import HeartDiseaseInput
+from ml.predict import predict_batch
+from ml.train import FEATURE_NAMES
+
+logger = get_logger(__name__)
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+BULK_ROWS = Counter(
+    "bulk_rows_total",
+    "Rows received by /predict/stream",
+    ["result"],
+)
+BULK_STREAMS = Gauge(
+    "bulk_streams_active",
+    "/predict/stream requests in progress",
+)
+
+# Content type → input format
+INPUT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/jsonlines": "ndjson",
+}
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+CSV_COLUMNS = ("row", "prediction", "probability", "is_outlier", "anomaly_score", "model_version", "error")
+MAX_LINE_BYTES = 64 * 1024
+SATURATED_RETRY_SECONDS = 0.05  # Bulk work waits for the pool instead of failing
+
+
+class BulkInputError(ValueError):
+    """Raised when an upload cannot be read at all (not for single bad rows)."""
+
+
+def _bounds() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-feature (lower, upper, integer-only) limits of ``HeartDiseaseInput``."""
+    lower, upper, integer = [], [], []
+    for name in FEATURE_NAMES:
+        field = HeartDiseaseInput.model_fields[name]
+        lower.append(next((m.ge for m in field.metadata if isinstance(m, Ge)), -np.inf))
+        upper.append(next((m.le for m in field.metadata if isinstance(m, Le)), np.inf))
+        integer.append(field.annotation is int)
+    return np.array(lower, dtype=np.float64), np.array(upper, dtype=np.float64), np.array(integer)
+
+
+LOWER, UPPER, INTEGER = _bounds()
+
+
+def validate_rows(X: np.ndarray, errors: dict[int, str]) -> None:
+    """Add an error for every row of ``X`` that ``HeartDiseaseInput`` would reject.
+
+    Rows already in ``errors`` are left alone; messages match Pydantic's.
+    """
+    with np.errstate(invalid="ignore"):
+        below, above = X < LOWER, X > UPPER
+        fractional = INTEGER & (X != np.round(X))
+    nonfinite = ~np.isfinite(X)
+    bad = below | above | fractional | nonfinite
+    for i in np.flatnonzero(bad.any(axis=1)).tolist():
+        if i in errors:
+            continue
+        j = int(np.argmax(bad[i]))
+        name = FEATURE_NAMES[j]
+        if nonfinite[i, j]:
+            errors[i] = "Non-finite feature value"
+        elif below[i, j]:
+            errors[i] = f"{name}: Input should be greater than or equal to {LOWER[j]:g}"
+        elif above[i, j]:
+            errors[i] = f"{name}: Input should be less than or equal to {UPPER[j]:g}"
+        else:
+            errors[i] = f"{name}: Input should be a valid integer"
+
+
+# ── Input ────────────────────────────────────
+
+class LineReader:
+    """Non-blank lines of a byte stream, handed out a batch at a time."""
+
+    def __init__(self, chunks: AsyncIterator[bytes], max_line: int = MAX_LINE_BYTES):
+        self._chunks = chunks.__aiter__()
+        self._max_line = max_line
+        self._lines: deque[bytes] = deque()
+        self._partial = b""
+        self._eof = False
+
+    async def _read(self) -> None:
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            if self._partial.strip():
+                self._lines.append(self._partial)
+            self._partial = b""
+            return
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+        if len(self._partial) > self._max_line:
+            raise BulkInputError(f"Line longer than {self._max_line} bytes")
+        self._lines.extend(line for line in lines if line.strip())
+
+    async def batch(self, size: int) -> list[bytes]:
+        """Up to ``size`` lines; fewer only at the end of the stream."""
+        while len(self._lines) < size and not self._eof:
+            await self._read()
+        return [self._lines.popleft() for _ in range(min(size, len(self._lines)))]
+
+
+class CSVRows:
+    """Parse CSV lines into feature rows, by the header's column names."""
+
+    def __init__(self, header: bytes):
+        names = [n.strip() for n in next(csv.reader([header.decode("utf-8-sig").rstrip("\r")]))]
+        missing = [name for name in FEATURE_NAMES if name not in names]
+        if missing:
+            raise BulkInputError(f"CSV header is missing column(s): {', '.join(missing)}")
+        self._columns = [names.index(name) for name in FEATURE_NAMES]
+        self._width = len(names)
+
+    def parse(self, lines: list[bytes]) -> tuple[np.ndarray, dict[int, str]]:
+        """Feature matrix (NaN rows where parsing failed) and per-row errors."""
+        X = np.full((len(lines), len(FEATURE_NAMES)), np.nan)
+        errors: dict[int, str] = {}
+        rows = csv.reader(line.decode("utf-8", "replace").rstrip("\r") for line in lines)
+        for i, row in enumerate(rows):
+            if len(row) != self._width:
+                errors[i] = f"Expected {self._width} columns, got {len(row)}"
+                continue
+            try:
+                X[i] = [float(row[j]) for j in self._columns]
+            except ValueError:
+                empty = [FEATURE_NAMES[k] for k, j in enumerate(self._columns) if not row[j].strip()]
+                errors[i] = f"Missing feature: {empty[0]}" if empty else "Feature values must be numeric"
+        return X, errors
+
+
+class NDJSONRows:
+    """Parse NDJSON lines (one feature object each) into feature rows."""
+
+    def parse(self, lines: list[bytes]) -> tuple[np.ndarray, dict[int, str]]:
+        """Feature matrix (NaN rows where parsing failed) and per-row errors."""
+        X = np.full((len(lines), len(FEATURE_NAMES)), np.nan)
+        errors: dict[int, str] = {}
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                errors[i] = "Invalid JSON"
+                continue
+            if not isinstance(record, dict):
+                errors[i] = "Expected a JSON object"
+                continue
+            try:
+                X[i] = [float(record[name]) for name in FEATURE_NAMES]
+            except KeyError as exc:
+                errors[i] = f"Missing feature: {exc.args[0]}"
+            except (TypeError, ValueError):
+                errors[i] = "Feature values must be numeric"
+        return X, errors
+
+
+async def open_upload(chunks: AsyncIterator[bytes], input_format: str) -> tuple[LineReader, object]:
+    """Start reading an upload; for CSV this consumes and checks the header.
+
+    Raises:
+        BulkInputError: On an empty upload or a CSV header without every feature.
+    """
+    reader = LineReader(chunks)
+    if input_format == "ndjson":
+        return reader, NDJSONRows()
+    header = await reader.batch(1)
+    if not header:
+        raise BulkInputError("Empty upload: expected a CSV header row")
+    return reader, CSVRows(header[0])
+
+
+# ── Output ───────────────────────────────────
+
+def _format_rows(rows: list[dict], output_format: str, explain: str) -> bytes:
+    if output_format == "ndjson":
+        if explain == "none":
+            for row in rows:
+                row.pop("feature_contributions", None)
+        return b"".join(dumps(row) + b"\n" for row in rows)
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for row in rows:
+        writer.writerow([
+            "" if row.get(column) is None else int(row[column]) if column == "is_outlier" else row[column]
+            for column in CSV_COLUMNS
+        ])
+    return out.getvalue().encode()
+
+
+async def _score(X: np.ndarray, explain: str) -> list[dict]:
+    while True:
+        try:
+            return await executor.run(predict_batch, X, explain)
+        except ExecutorSaturatedError:
+            await asyncio.sleep(SATURATED_RETRY_SECONDS)
+
+
+async def score_stream(
+    reader: LineReader,
+    parser,
+    output_format: str,
+    explain: str = "none",
+    chunk_rows: int = 1000,
+) -> AsyncIterator[bytes]:
+    """Score an upload chunk by chunk, yielding formatted result rows.
+
+    Args:
+        reader: Upload lines (after the CSV header, if any).
+        parser: ``CSVRows`` or ``NDJSONRows``.
+        output_format: ``"ndjson"`` or ``"csv"``.
+        explain: One of ``ml.predict.EXPLAIN_MODES``.
+        chunk_rows: Rows parsed, validated and scored together.
+    """
+    BULK_STREAMS.inc()
+    row_number = 0
+    scored = invalid = 0
+    try:
+        if output_format == "csv":
+            yield (",".join(CSV_COLUMNS) + "\n").encode()
+        while True:
+            try:
+                lines = await reader.batch(chunk_rows)
+            except BulkInputError as exc:
+                yield _format_rows([{"error": str(exc)}], output_format, explain)
+                return
+            if not lines:
+                return
+
+            X, errors = parser.parse(lines)
+            validate_rows(X, errors)
+            valid = [i for i in range(len(lines)) if i not in errors]
+            results: list[Optional[dict]] = [None] * len(lines)
+            for i, message in errors.items():
+                results[i] = {"error": message}
+            if valid:
+                for i, result in zip(valid, await _score(X[valid], explain)):
+                    results[i] = result
+
+            rows = [{"row": row_number + i + 1, **result} for i, result in enumerate(results)]
+            row_number += len(lines)
+            scored += len(valid)
+            invalid += len(errors)
+            BULK_ROWS.labels(result="scored").inc(len(valid))
+            BULK_ROWS.labels(result="invalid").inc(len(errors))
+            yield _format_rows(rows, output_format, explain)
+    except ClientDisconnect:
+        logger.info("Bulk upload disconnected after %d rows", row_number)
+    except Exception as exc:
+        logger.exception("Bulk scoring failed after %d rows: %s", row_number, exc)
+        yield _format_rows([{"error": f"Scoring failed: {exc}"}], output_format, explain)
+    finally:
+        BULK_STREAMS.dec()
+        logger.info("Bulk stream finished: %d rows scored, %d invalid", scored, invalid)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """``StreamingResponse`` that leaves ``receive`` to the body generator.
+
+    The stock response listens for a client disconnect on ``receive`` while
+    it streams, which would swallow request body chunks the generator is
+    still reading; here a disconnect surfaces through ``request.stream()``.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
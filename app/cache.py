@@ -0,0 +1,154 @@
+"""
+Content-Addressed Prediction Cache.
+
+Bounded LRU + TTL cache in front of ``ml.predict``. Entries are keyed by
+the canonical feature vector, the explanation mode and the loaded model
+version, so re-submitted forms and client retries are answered without
+touching the model.
+
+Identical requests that arrive while the first one is still being scored
+are collapsed onto that single computation (singleflight). A change of
+model version empties the cache automatically.
+
+Usage::
+
+    from app.cache import prediction_cache
+    result = await prediction_cache.get_or_compute(vector, "full", compute)
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+from ml.predict import get_model_version
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+CACHE_HITS = Counter(
+    "prediction_cache_hits_total",
+    "Predictions served from the cache",
+)
+CACHE_MISSES = Counter(
+    "prediction_cache_misses_total",
+    "Predictions computed because no cached entry existed",
+)
+CACHE_COALESCED = Counter(
+    "prediction_cache_coalesced_total",
+    "Requests that joined an identical in-flight computation",
+)
+CACHE_EVICTIONS = Counter(
+    "prediction_cache_evictions_total",
+    "Cache entries removed",
+    ["reason"],
+)
+CACHE_SIZE = Gauge(
+    "prediction_cache_entries",
+    "Entries currently held in the prediction cache",
+)
+
+
+class PredictionCache:
+    """LRU + TTL cache with singleflight de-duplication of concurrent misses."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[bytes, asyncio.Task] = {}
+        self._version = None
+
+    @staticmethod
+    def key(vector: np.ndarray, explain: str, version: str) -> bytes:
+        """Content address of one request: vector bytes + mode + model version."""
+        # Adding 0.0 folds -0.0 into 0.0 so equal inputs hash equally.
+        canonical = np.ascontiguousarray(vector, dtype=np.float64).ravel() + 0.0
+        digest = hashlib.blake2b(canonical.tobytes(), digest_size=16)
+        digest.update(explain.encode())
+        digest.update(version.encode())
+        return digest.digest()
+
+    def clear(self, reason: str = "invalidated") -> None:
+        """Drop every cached entry."""
+        if self._entries:
+            CACHE_EVICTIONS.labels(reason=reason).inc(len(self._entries))
+        self._entries.clear()
+        CACHE_SIZE.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_compute(
+        self,
+        vector: np.ndarray,
+        explain: str,
+        compute: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        """Return the cached result for this request, computing it at most once.
+
+        Args:
+            vector: Canonical feature vector from ``features_to_vector()``.
+            explain: Explanation mode the result was computed with.
+            compute: Coroutine factory that scores the request on a miss.
+        """
+        version = get_model_version()
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+        key = self.key(vector, explain, version)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                CACHE_HITS.inc()
+                return dict(result)
+            del self._entries[key]
+            CACHE_EVICTIONS.labels(reason="expired").inc()
+
+        task = self._inflight.get(key)
+        if task is not None:
+            CACHE_COALESCED.inc()
+        else:
+            CACHE_MISSES.inc()
+            # Run as its own task so followers still get a result if the
+            # request that started the computation is cancelled.
+            task = asyncio.get_running_loop().create_task(compute())
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda t, key=key, version=version: self._complete(key, version, t)
+            )
+
+        return dict(await asyncio.shield(task))
+
+    def _complete(self, key: bytes, version: str, task: asyncio.Task) -> None:
+        """Store a finished computation and release its singleflight slot."""
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if version != self._version:
+            return  # Model changed while computing
+
+        self._entries[key] = (time.monotonic() + self.ttl, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.labels(reason="lru").inc()
+        CACHE_SIZE.set(len(self._entries))
+
+
+# Singleton access
+prediction_cache = PredictionCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+)
@@ -7,7 +7,9 @@ Uses pydantic-settings for validation and type coercion.
 
 import os
 from pathlib import Path
+from typing import Literal
 
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -33,6 +35,42 @@ class Settings(BaseSettings):
     # ── Model Settings ────────────────────────
     MODEL_PATH: str = str(MODEL_PATH)
     SCALER_PATH: str = str(SCALER_PATH)
+    BATCH_MAX_SIZE: int = 10_000
+    STREAM_CHUNK_ROWS: int = 1000          # /predict/stream rows scored per pass
+    INFERENCE_BACKEND: Literal["compiled", "sklearn"] = "compiled"
+    WARMUP_EXPLAIN_MODES: str = "none,fast,full"  # Drop "full" to defer SHAP + pickled model
+    MODEL_WATCH_INTERVAL: float = 5.0      # Seconds between models/ polls; 0 disables hot-reload
+    ADMIN_TOKEN: str = ""                  # Required as X-Admin-Token on /admin/* when set
+
+    # ── Inference Executor ────────────────────
+    INFERENCE_EXECUTOR: str = "thread"     # "thread" or "process"
+    INFERENCE_WORKERS: int = 4
+    INFERENCE_QUEUE_SIZE: int = 64         # Max calls waiting for a worker
+    INFERENCE_RETRY_AFTER: int = 1         # Seconds, sent with 503 when saturated
+
+    # ── Micro-batching ────────────────────────
+    MICROBATCH_ENABLED: bool = True
+    MICROBATCH_MAX_SIZE: int = 64          # Dispatch once this many rows wait
+    MICROBATCH_MAX_WAIT_MS: float = 2.0    # … or once the first row waited this long
+
+    # ── Prediction Cache ──────────────────────
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_TTL_SECONDS: float = 300.0
+
+    # ── Explanations ──────────────────────────
+    EXPLAIN_MODE: Literal["none", "fast", "full", "async"] = "full"  # /predict default
+    EXPLANATION_STORE_SIZE: int = 10_000   # Deferred explanations kept for polling
+    EXPLANATION_DIR: str = "data/explanations"  # Shared by workers; relative = under project root
+
+    # ── Batch-Scoring Jobs ────────────────────
+    JOBS_DIR: str = "data/jobs"            # Job records, uploads and results
+    JOBS_INPUT_DIR: str = "data"           # POST /jobs input_path must be inside this
+    JOBS_CPU_SHARE: float = 0.5            # Fraction of CPUs for job processes (one each)
+    JOBS_NICE: int = 10                    # Niceness added to job processes
+    JOBS_CHUNK_ROWS: int = 50_000          # Rows scored per checkpoint
+    JOBS_MAX_ATTEMPTS: int = 3             # Runs before a crashing job process fails the job
+    JOBS_UPLOAD_MAX_BYTES: int = 1 << 30   # Largest POST /jobs upload body (413 beyond)
 
     # ── Logging ───────────────────────────────
     LOG_LEVEL: str = "INFO"
@@ -42,8 +80,53 @@ class Settings(BaseSettings):
     METRICS_ENABLED: bool = True
 
     # ── Analytics ─────────────────────────────
-    SPIKE_WINDOW_SIZE: int = 20
-    SPIKE_THRESHOLD: float = 2.0
+    ANALYTICS_BACKEND: str = "memory"      # "memory" (per worker) or "shared" (per pod)
+    ANALYTICS_SHM_NAME: str = ""           # Shared segment name (default: per master process)
+    ANALYTICS_HISTORY_MAX: int = 100_000   # Records kept per process or pod (66 bytes each)
+    SPIKE_WINDOW_SIZE: int = 20            # Primary window (top-level /analytics/spikes fields)
+    SPIKE_THRESHOLD: float = 2.0           # Window rate ÷ baseline rate that counts as a spike
+    SPIKE_DETECTORS: str = "window,ewma,cusum"
+    SPIKE_WINDOWS: str = "100,1000"        # Extra window detectors besides SPIKE_WINDOW_SIZE
+    SPIKE_EWMA_ALPHA: float = 0.03
+    SPIKE_EWMA_THRESHOLD: float = 3.5      # Standard deviations above the reference rate
+    SPIKE_CUSUM_K: float = 0.05            # Allowance over the reference rate per prediction
+    SPIKE_CUSUM_H: float = 12.0            # Decision threshold of the accumulated excess
+    SPIKE_BASELINE_ALPHA: float = 0.002    # Reference-rate EWMA for the EWMA/CUSUM detectors
+    ANALYTICS_QUEUE_MAX: int = 10_000      # Prediction events queued before dropping
+    ANALYTICS_EVENT_BATCH: int = 512       # Events recorded per pass through the tracker locks
+    ANALYTICS_STREAM_INTERVAL_MS: int = 500     # Minimum gap between /analytics/stream frames
+    ANALYTICS_STREAM_CLIENT_BUFFER: int = 32    # Frames a client may lag before it is dropped
+    ANALYTICS_STREAM_MAX_CLIENTS: int = 200
+    ANALYTICS_ARCHIVE_DIR: str = ""        # On-disk prediction log + snapshots ("" = off)
+    ANALYTICS_ARCHIVE_MAX_SEGMENTS: int = 1000  # Sealed 64k-record segments kept
+    SKETCH_RELATIVE_ACCURACY: float = 0.01  # Quantile error bound of /analytics/quantiles
+    DRIFT_WINDOWS: str = "1000,10000"     # Sliding windows (records) for /analytics/drift
+
+    @field_validator("JOBS_DIR", "JOBS_INPUT_DIR", "EXPLANATION_DIR")
+    @classmethod
+    def _under_base_dir(cls, path: str) -> str:
+        """Resolve a relative directory against the project root, not the working directory."""
+        return str(BASE_DIR / path) if path else path
+
+    @property
+    def warmup_explain_modes(self) -> tuple[str, ...]:
+        """``WARMUP_EXPLAIN_MODES`` as a tuple of mode names."""
+        return tuple(m.strip() for m in self.WARMUP_EXPLAIN_MODES.split(",") if m.strip())
+
+    @property
+    def spike_detectors(self) -> tuple[str, ...]:
+        """``SPIKE_DETECTORS`` as a tuple of detector kinds."""
+        return tuple(k.strip() for k in self.SPIKE_DETECTORS.split(",") if k.strip())
+
+    @property
+    def spike_windows(self) -> tuple[int, ...]:
+        """``SPIKE_WINDOWS`` as a tuple of window sizes."""
+        return tuple(int(w) for w in self.SPIKE_WINDOWS.split(",") if w.strip())
+
+    @property
+    def drift_windows(self) -> tuple[int, ...]:
+        """``DRIFT_WINDOWS`` as a tuple of window sizes."""
+        return tuple(int(w) for w in self.DRIFT_WINDOWS.split(",") if w.strip())
 
     class Config:
         env_file = ".env"
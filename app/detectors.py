@@ -0,0 +1,237 @@
+"""
+Spike Detectors.
+
+Change-point detectors over the stream of high-risk flags (1 = the model
+predicted disease). Every detector does O(1) work per prediction, keeps
+its state in a few arena cells (so workers sharing an ``app.arena``
+share detectors too) and reports its own score:
+
+- ``WindowDetector`` – high-risk rate of the last ``window`` predictions
+  over the rate of the older predictions still in the history. One per
+  size in ``SPIKE_WINDOWS``; the ``SPIKE_WINDOW_SIZE`` one is the primary
+  detector behind the top-level fields of ``/analytics/spikes``.
+- ``EWMADetector`` – exponentially weighted high-risk rate, in standard
+  deviations above the reference rate (EWMA control chart).
+- ``CUSUMDetector`` – one-sided Bernoulli CUSUM: accumulated excess of
+  the high-risk flag over the reference rate plus an allowance ``k``.
+
+The EWMA and CUSUM reference rate is itself a slow EWMA
+(``SPIKE_BASELINE_ALPHA``), so they follow gradual changes in the traffic
+mix and alarm on abrupt ones. Both start judging once that reference has
+seen ``1 / alpha`` predictions.
+
+Usage::
+
+    from app.analytics import AnalyticsTracker
+    from app.detectors import build_detectors
+    detectors = build_detectors(AnalyticsTracker, history_max=1_000_000)
+    for detector in detectors:
+        detector.update(high_risk, history)   # before history.append()
+    scores = [d.report(len(history), fallback_baseline=0.5) for d in detectors]
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from app.arena import allocate
+
+DETECTOR_KINDS = ("window", "ewma", "cusum")
+
+
+class WindowDetector:
+    """High-risk rate of the newest ``window`` predictions vs. the older ones."""
+
+    kind = "window"
+
+    def __init__(self, window: int, threshold: float, arrays: Optional[dict] = None):
+        if window < 1:
+            raise ValueError("Spike windows must be positive")
+        self.window = window
+        self.threshold = threshold
+        self.name = f"window_{window}"
+        arrays = arrays if arrays is not None else allocate(self.layout())
+        # [high-risk in the window, older records held, high-risk among them]
+        self._state = memoryview(arrays["state"])
+
+    @staticmethod
+    def layout() -> dict:
+        """Arrays the detector needs (see ``app.arena``)."""
+        return {"state": ((3,), np.int64)}
+
+    def update(self, high: bool, history) -> None:
+        """Account for one prediction about to be appended to ``history``."""
+        s = self._state
+        # The record `window` back moves from the window into the older
+        # baseline; a full history then drops its oldest record.
+        n = len(history)
+        if n >= self.window:
+            leaving = history.prediction_at(n - self.window) == 1
+            s[0] -= leaving
+            s[2] += leaving
+            s[1] += 1
+        if n == history.capacity:
+            evicted = history.prediction_at(0) == 1
+            s[2] -= evicted
+            s[1] -= 1
+        s[0] += high
+
+    def recount(self, predictions: np.ndarray) -> None:
+        """Rebuild the counts from every prediction held, oldest first."""
+        recent = predictions[-self.window:]
+        older = predictions[:max(0, len(predictions) - self.window)]
+        self._state[0] = int((recent == 1).sum())
+        self._state[1] = len(older)
+        self._state[2] = int((older == 1).sum())
+
+    def rates(self, fallback_baseline: float) -> tuple[float, float]:
+        """(window rate, baseline rate); the fallback applies before any older records."""
+        recent_high, older_count, older_high = self._state[0], self._state[1], self._state[2]
+        baseline = older_high / older_count if older_count > 0 else fallback_baseline
+        return recent_high / self.window, baseline or 0.01  # Avoid division by zero
+
+    def report(self, samples: int, fallback_baseline: float) -> dict:
+        recent, baseline = self.rates(fallback_baseline)
+        score = round(recent / baseline, 4)
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "score": score,
+            "threshold": self.threshold,
+            "detected": samples >= self.window and score >= self.threshold,
+            "ready": samples >= self.window,
+        }
+
+
+class _ReferenceRateDetector:
+    """Shared state handling for detectors judged against a slow reference rate."""
+
+    def __init__(self, threshold: float, baseline_alpha: float, arrays: Optional[dict]):
+        if not 0 < baseline_alpha <= 1:
+            raise ValueError("SPIKE_BASELINE_ALPHA must be in (0, 1]")
+        self.threshold = threshold
+        self.warmup = math.ceil(1 / baseline_alpha)
+        arrays = arrays if arrays is not None else allocate(self.layout())
+        # [predictions seen, statistic, reference rate]
+        self._state = memoryview(arrays["state"])
+
+    @staticmethod
+    def layout() -> dict:
+        """Arrays the detector needs (see ``app.arena``)."""
+        return {"state": ((3,), np.float64)}
+
+    def _step_reference(self, high: bool) -> None:
+        """Count the prediction and move the reference rate."""
+        s = self._state
+        n = s[0] + 1
+        s[0] = n
+        # Running mean until `warmup` samples, then an EWMA
+        s[2] += (high - s[2]) / min(n, self.warmup)
+
+    def report(self, samples: int, fallback_baseline: float) -> dict:
+        score = round(self.score(), 4)
+        ready = self._state[0] >= self.warmup
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "score": score,
+            "threshold": self.threshold,
+            "detected": ready and score >= self.threshold,
+            "ready": ready,
+        }
+
+
+class EWMADetector(_ReferenceRateDetector):
+    """EWMA control chart on the high-risk flag."""
+
+    kind = name = "ewma"
+
+    def __init__(self, alpha: float, threshold: float, baseline_alpha: float, arrays: Optional[dict] = None):
+        if not 0 < alpha <= 1:
+            raise ValueError("SPIKE_EWMA_ALPHA must be in (0, 1]")
+        super().__init__(threshold, baseline_alpha, arrays)
+        self.alpha = alpha
+        self._span = math.ceil(1 / alpha)
+
+    def update(self, high: bool, history=None) -> None:
+        s = self._state
+        n = s[0] + 1
+        s[1] += (high - s[1]) / min(n, self._span)  # Bias-corrected while warming up
+        self._step_reference(high)
+
+    def score(self) -> float:
+        """Standard deviations of the EWMA above the reference rate."""
+        p = min(max(self._state[2], 0.01), 0.99)
+        sigma = math.sqrt(self.alpha / (2 - self.alpha) * p * (1 - p))
+        return (self._state[1] - self._state[2]) / sigma
+
+
+class CUSUMDetector(_ReferenceRateDetector):
+    """One-sided CUSUM of the high-risk flag over the reference rate."""
+
+    kind = name = "cusum"
+
+    def __init__(self, k: float, threshold: float, baseline_alpha: float, arrays: Optional[dict] = None):
+        super().__init__(threshold, baseline_alpha, arrays)
+        self.k = k
+
+    def update(self, high: bool, history=None) -> None:
+        s = self._state
+        s[1] = max(0.0, s[1] + high - s[2] - self.k)
+        self._step_reference(high)
+
+    def score(self) -> float:
+        return self._state[1]
+
+
+def detector_specs(config, history_max: int) -> list[tuple[str, type, dict]]:
+    """``(name, class, kwargs)`` of every detector ``config`` enables.
+
+    Two-step so the caller can lay out the arena before building them
+    (``cls(**kwargs, arrays=...)``). The primary window always runs and
+    comes first.
+
+    Args:
+        config: Object with the ``SPIKE_*`` attributes of ``AnalyticsTracker``.
+        history_max: History capacity; longer extra windows are skipped.
+
+    Raises:
+        ValueError: On an unknown detector kind.
+    """
+    kinds = config.SPIKE_DETECTORS
+    unknown = set(kinds) - set(DETECTOR_KINDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown spike detector(s) {', '.join(sorted(unknown))} "
+            f"(expected {', '.join(DETECTOR_KINDS)})"
+        )
+
+    windows = [config.SPIKE_WINDOW]
+    if "window" in kinds:
+        windows += sorted(
+            w for w in set(config.SPIKE_WINDOWS)
+            if w != config.SPIKE_WINDOW and w <= history_max
+        )
+    specs = [
+        (f"window_{w}", WindowDetector, {"window": w, "threshold": config.SPIKE_THRESHOLD})
+        for w in windows
+    ]
+    if "ewma" in kinds:
+        specs.append(("ewma", EWMADetector, {
+            "alpha": config.SPIKE_EWMA_ALPHA,
+            "threshold": config.SPIKE_EWMA_THRESHOLD,
+            "baseline_alpha": config.SPIKE_BASELINE_ALPHA,
+        }))
+    if "cusum" in kinds:
+        specs.append(("cusum", CUSUMDetector, {
+            "k": config.SPIKE_CUSUM_K,
+            "threshold": config.SPIKE_CUSUM_H,
+            "baseline_alpha": config.SPIKE_BASELINE_ALPHA,
+        }))
+    return specs
+
+
+def build_detectors(config, history_max: int) -> list:
+    """Standalone detectors with private state (benchmarks, tests)."""
+    return [cls(**kwargs) for _, cls, kwargs in detector_specs(config, history_max)]
@@ -0,0 +1,169 @@
+"""
+Asynchronous Analytics Events.
+
+``/predict`` and ``/predict/batch`` publish each scored prediction to an
+in-process queue and return straight away; a background consumer drains
+the queue in batches, records them in the analytics tracker with one
+acquisition of each aggregate's lock per batch, and runs spike detection once per batch. Request
+latency therefore no longer includes analytics work or waits on
+``/analytics/*`` readers holding the tracker locks.
+
+The queue is bounded: when the consumer falls behind by
+``ANALYTICS_QUEUE_MAX`` events, new events are dropped (and counted)
+rather than letting memory or latency grow. Readers call ``flush()`` first
+so that a prediction is visible to the next analytics request.
+
+Usage::
+
+    from app.events import analytics_events
+    analytics_events.start()                      # in the lifespan, on the loop
+    analytics_events.publish([{"prediction": 1, "probability": 0.87,
+                               "is_outlier": False, "features": vector}])
+    await analytics_events.flush()                # before reading the tracker
+    await analytics_events.stop()
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.config import settings
+from app.logger import get_logger
+from app.stream import broadcaster
+
+logger = get_logger(__name__)
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+SPIKE_COUNT = Counter(
+    "spike_detected_total",
+    "Total spike detection events",
+)
+ANALYTICS_QUEUE_DEPTH = Gauge(
+    "analytics_queue_depth",
+    "Prediction events waiting to be recorded",
+)
+ANALYTICS_EVENT_LAG = Histogram(
+    "analytics_event_lag_seconds",
+    "Time from publishing a prediction event to recording it",
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0],
+)
+ANALYTICS_EVENTS_DROPPED = Counter(
+    "analytics_events_dropped_total",
+    "Prediction events dropped because the analytics queue was full",
+)
+
+
+class AnalyticsEvents:
+    """Bounded queue of prediction events with one background consumer."""
+
+    def __init__(self, max_queue: int = 10_000, max_batch: int = 512, flush_timeout: float = 1.0):
+        """
+        Args:
+            max_queue: Events held before new ones are dropped.
+            max_batch: Events recorded per lock acquisition.
+            flush_timeout: Longest ``flush()`` waits before readers go ahead.
+        """
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.flush_timeout = flush_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        ANALYTICS_QUEUE_DEPTH.set_function(lambda: self._queue.qsize() if self._queue else 0)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the consumer on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._consume())
+
+    async def stop(self) -> None:
+        """Record every queued event, then stop the consumer."""
+        if not self.running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def publish(self, records: list[dict]) -> None:
+        """Queue prediction events; never blocks the caller.
+
+        Args:
+            records: Dicts with ``prediction``, ``probability``,
+                ``is_outlier`` and ``features`` keys.
+        """
+        if not records:
+            return
+        if not self.running:
+            # No loop consumer (scripts, benchmarks): record inline
+            self._record(records)
+            return
+        published = time.perf_counter()
+        for record in records:
+            try:
+                self._queue.put_nowait((published, record))
+            except asyncio.QueueFull:
+                ANALYTICS_EVENTS_DROPPED.inc()
+
+    async def flush(self) -> None:
+        """Wait (at most ``flush_timeout``) until every queued event is recorded."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), self.flush_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Analytics consumer is behind – serving analytics without the newest events")
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                # Off the loop: the tracker locks may be held by a reader thread
+                records = [record for _, record in batch]
+                await asyncio.to_thread(self._record, records)
+                broadcaster.notify(records)
+                recorded = time.perf_counter()
+                for published, _ in batch:
+                    ANALYTICS_EVENT_LAG.observe(recorded - published)
+            except Exception as exc:
+                logger.exception("Failed to record %d analytics events: %s", len(batch), exc)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    @staticmethod
+    def _record(records: list[dict]) -> None:
+        """Record a batch and check it for a spike."""
+        from app.analytics import tracker
+
+        tracker.record_predictions(records)
+        outliers = sum(1 for r in records if r["is_outlier"])
+        if outliers:
+            logger.warning("Recorded %d outlier inputs.", outliers)
+
+        spike = tracker.detect_spike()
+        if spike.get("spike_detected"):
+            SPIKE_COUNT.inc()
+            logger.warning("Spike detected! Score: %s", spike["spike_score"])
+
+
+# Singleton access
+analytics_events = AnalyticsEvents(
+    max_queue=settings.ANALYTICS_QUEUE_MAX,
+    max_batch=settings.ANALYTICS_EVENT_BATCH,
+)
@@ -0,0 +1,188 @@
+"""
+Inference Executor.
+
+Runs CPU-bound inference (scikit-learn, IsolationForest, SHAP) on a bounded
+worker pool so the asyncio event loop only ever does I/O. Work beyond the
+pool's capacity waits in a bounded queue; once that queue is full new
+requests are rejected immediately instead of piling up.
+
+Usage::
+
+    from app.executor import executor, ExecutorSaturatedError
+    result = await executor.run(predict, features)
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+from ml.stages import replay, run_collecting
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "inference_queue_depth",
+    "Inference calls waiting for a free worker",
+)
+INFERENCE_IN_FLIGHT = Gauge(
+    "inference_in_flight",
+    "Inference calls currently executing on a worker",
+)
+INFERENCE_REJECTED = Counter(
+    "inference_rejected_total",
+    "Inference calls rejected because the queue was full",
+)
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the inference queue is full."""
+
+
+def _warm_worker(backend: str, explain_modes: tuple[str, ...]) -> None:
+    """Load and warm model artefacts once when a process-pool worker starts."""
+    from ml.predict import set_backend, warm_up
+    set_backend(backend)
+    try:
+        warm_up(explain_modes)
+    except Exception:
+        pass  # Missing artefacts surface on the first real call
+
+
+class InferenceExecutor:
+    """Bounded thread or process pool for CPU-bound inference.
+
+    At most ``max_workers`` calls execute at once and at most ``max_queue``
+    more wait for a slot; anything beyond that raises
+    :class:`ExecutorSaturatedError`.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind!r}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._in_flight = 0
+
+    def _new_pool(self) -> Executor:
+        if self.kind == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_warm_worker,
+                initargs=(settings.INFERENCE_BACKEND, settings.warmup_explain_modes),
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="inference",
+        )
+
+    def start(self) -> None:
+        """Create the worker pool and bind the slot semaphore to the running loop."""
+        if self._pool is None:
+            self._pool = self._new_pool()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._queued = 0
+        self._in_flight = 0
+        self._publish()
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running calls to finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        self._pool = None
+        self._slots = None
+
+    def recycle(self) -> None:
+        """Replace process-pool workers so they load the current model bundle.
+
+        Threads share the API process's active bundle and need nothing.
+        Calls already running on the old pool finish there.
+        """
+        if self.kind != "process" or self._pool is None:
+            return
+        old, self._pool = self._pool, self._new_pool()
+        old.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        """Return current queue depth and in-flight count."""
+        return {"queue_depth": self._queued, "in_flight": self._in_flight}
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        Raises:
+            ExecutorSaturatedError: If every worker is busy and the wait
+                queue is already full.
+        """
+        if self._pool is None:
+            self.start()
+
+        if self._slots.locked() and self._queued >= self.max_queue:
+            INFERENCE_REJECTED.inc()
+            raise ExecutorSaturatedError(
+                f"Inference queue full ({self.max_queue} waiting)"
+            )
+
+        self._queued += 1
+        self._publish()
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+
+        self._in_flight += 1
+        self._publish()
+        loop = asyncio.get_running_loop()
+        if self.kind == "thread":
+            call = functools.partial(fn, *args, **kwargs)
+        else:
+            # Stage timings recorded in a worker process are returned with
+            # the result and observed here, where /metrics is served.
+            call = functools.partial(run_collecting, fn, *args, **kwargs)
+        try:
+            job = self._pool.submit(call)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is freed when the job itself is done. A caller cancelled
+        # while it runs (e.g. a client disconnect) stops waiting, but the
+        # worker stays busy until the job returns.
+        job.add_done_callback(lambda _: self._release_from(loop))
+
+        if self.kind == "thread":
+            return await asyncio.wrap_future(job)
+        result, stages = await asyncio.wrap_future(job)
+        replay(stages)
+        return result
+
+    def _release_from(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Hand ``_release()`` to the loop that owns the slots (runs in a worker thread)."""
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass  # Loop already closed; start() resets the counts
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._slots.release()
+        self._publish()
+
+    def _publish(self) -> None:
+        INFERENCE_QUEUE_DEPTH.set(self._queued)
+        INFERENCE_IN_FLIGHT.set(self._in_flight)
+
+
+# Singleton access
+executor = InferenceExecutor(
+    kind=settings.INFERENCE_EXECUTOR,
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue=settings.INFERENCE_QUEUE_SIZE,
+)
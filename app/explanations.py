@@ -0,0 +1,162 @@
+"""
+Deferred Explanation Store.
+
+Backs the ``explain=async`` prediction mode: the prediction is returned
+straight away with a ``prediction_id`` while the exact SHAP explanation is
+computed in the background on the inference executor. Results are fetched
+from ``GET /predictions/{prediction_id}/explanation``.
+
+Entries are small JSON files in ``EXPLANATION_DIR``, replaced atomically,
+so the poll may land on any uvicorn worker in the pod, not just the one
+that took the prediction. They are written on a thread, off the event
+loop. Only the newest ``EXPLANATION_STORE_SIZE`` are kept.
+
+The explanation is computed with the model bundle that made the
+prediction. If a hot reload swapped the model in between (or a process
+worker has already moved on to the new one), the entry is marked
+``stale`` instead of explaining a different model.
+
+Usage::
+
+    from app.explanations import explanation_store
+    prediction_id = await explanation_store.submit(vector, model_version=result["model_version"])
+    entry = await asyncio.to_thread(explanation_store.get, prediction_id)
+"""
+
+import asyncio
+import json
+import os
+import re
+import uuid
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.executor import executor
+from app.logger import get_logger
+from ml.bundle import ModelBundle, current_bundle
+from ml.predict import explain_prediction
+
+logger = get_logger(__name__)
+
+# uuid4().hex; anything else cannot name an entry file
+PREDICTION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _explain(vector: np.ndarray, mode: str, bundle: Optional[ModelBundle] = None) -> tuple[dict, str]:
+    """Explain ``vector`` and report the model version that explained it.
+
+    Thread workers are handed the submitting request's bundle; process
+    workers cannot share it and explain with their own active bundle.
+    """
+    bundle = bundle or current_bundle()
+    return explain_prediction(vector, mode, bundle=bundle), bundle.version
+
+
+class ExplanationStore:
+    """Bounded on-disk store of background explanation jobs, oldest pruned first."""
+
+    def __init__(self, directory: str, max_entries: int = 10_000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._tasks: set[asyncio.Task] = set()
+        self._since_prune = 0
+
+    def _path(self, prediction_id: str) -> str:
+        return os.path.join(self.directory, f"{prediction_id}.json")
+
+    def _write(self, prediction_id: str, entry: dict) -> None:
+        """Replace an entry atomically, so readers never see half of one."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(prediction_id)
+        with open(path + ".tmp", "w") as f:
+            json.dump(entry, f)
+        os.replace(path + ".tmp", path)
+
+    async def submit(self, vector: np.ndarray, mode: str = "full", model_version: Optional[str] = None) -> str:
+        """Schedule an explanation for ``vector`` and return its id.
+
+        Args:
+            vector: Feature vector from ``ml.predict.features_to_vector()``.
+            mode: One of ``ml.predict.EXPLAIN_MODES``.
+            model_version: Version that made the prediction; defaults to
+                the active bundle's.
+        """
+        bundle = current_bundle()
+        model_version = model_version or bundle.version
+        prediction_id = uuid.uuid4().hex
+        # Written before returning, so the first poll finds the entry
+        await asyncio.to_thread(self._write, prediction_id, {
+            "status": "pending", "feature_contributions": {}, "model_version": model_version,
+        })
+
+        task = asyncio.get_running_loop().create_task(
+            self._compute(prediction_id, vector, mode, bundle, model_version)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        # Pruning lists the directory, so do it once per tenth of the capacity
+        self._since_prune += 1
+        if self._since_prune >= max(1, self.max_entries // 10):
+            self._since_prune = 0
+            task = asyncio.get_running_loop().create_task(asyncio.to_thread(self._prune))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return prediction_id
+
+    def get(self, prediction_id: str) -> Optional[dict]:
+        """Return the explanation entry, or None if unknown or pruned."""
+        if not PREDICTION_ID.match(prediction_id):
+            return None
+        try:
+            with open(self._path(prediction_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    async def _compute(
+        self, prediction_id: str, vector: np.ndarray, mode: str, bundle: ModelBundle, model_version: str,
+    ) -> None:
+        entry = {"status": "stale", "feature_contributions": {}, "model_version": model_version}
+        try:
+            if bundle.version != model_version:
+                entry["error"] = f"Model {model_version} was replaced before the explanation ran"
+            else:
+                if executor.kind == "thread":
+                    contributions, version = await executor.run(_explain, vector, mode, bundle)
+                else:
+                    contributions, version = await executor.run(_explain, vector, mode)
+                if version == model_version:
+                    entry = {"status": "ready", "feature_contributions": contributions, "model_version": version}
+                else:
+                    entry["error"] = f"Model {model_version} was replaced by {version} before the explanation ran"
+        except Exception as exc:
+            logger.warning("Explanation %s failed: %s", prediction_id, exc)
+            entry = {"status": "failed", "feature_contributions": {}, "model_version": model_version, "error": str(exc)}
+
+        await asyncio.to_thread(self._finish, prediction_id, entry)
+
+    def _finish(self, prediction_id: str, entry: dict) -> None:
+        if os.path.exists(self._path(prediction_id)):  # Skip if pruned meanwhile
+            self._write(prediction_id, entry)
+
+    def _prune(self) -> None:
+        """Remove the oldest entries beyond ``max_entries``."""
+        with os.scandir(self.directory) as entries:
+            files = [(e.stat().st_mtime, e.path) for e in entries if e.name.endswith(".json")]
+        if len(files) <= self.max_entries:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another worker pruned it first
+
+
+# Singleton access
+explanation_store = ExplanationStore(
+    settings.EXPLANATION_DIR, max_entries=settings.EXPLANATION_STORE_SIZE,
+)
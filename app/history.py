@@ -0,0 +1,223 @@
+"""
+Columnar Prediction History.
+
+Fixed-capacity ring buffer that stores each prediction as one row across
+preallocated NumPy columns: epoch timestamp, prediction, probability,
+outlier flag and a float32 feature matrix. A record costs 66 bytes instead
+of the several hundred a dict with an ISO timestamp and a 13-key feature
+dict takes, and recording never allocates. The arrays can live in a
+shared ``app.arena`` so that several worker processes share one history.
+
+Readers get vectorised column slices in chronological order via
+``window()``; records are only turned back into dicts, by
+``serialise_window()``, when an endpoint actually returns them – and
+outside the tracker's lock.
+
+Usage::
+
+    from app.history import PredictionHistory
+    history = PredictionHistory(capacity=1_000_000)
+    history.append(time.time(), 1, 0.87, False, feature_row)
+    cols = history.window(20)          # dict of column arrays, oldest first
+    rows = history.to_records(200)     # JSON-ready dicts
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from app.arena import allocate
+from ml.train import FEATURE_NAMES
+
+# Column name → dtype of every per-record column except the feature matrix
+COLUMNS = {
+    "timestamp": np.float64,
+    "prediction": np.int8,
+    "probability": np.float32,
+    "is_outlier": np.bool_,
+}
+
+
+def feature_row(features) -> np.ndarray:
+    """Coerce a feature dict (missing keys → NaN) or vector to one float32 row."""
+    if isinstance(features, np.ndarray):
+        return features.reshape(-1).astype(np.float32, copy=False)
+    return np.array(
+        [
+            np.nan if features.get(name) is None else features[name]
+            for name in FEATURE_NAMES
+        ],
+        dtype=np.float32,
+    )
+
+
+class PredictionHistory:
+    """Ring buffer of prediction records held column by column.
+
+    Logical index 0 is the oldest record still held; ``len(self) - 1`` the
+    newest. Once full, each append overwrites the oldest record.
+    """
+
+    def __init__(self, capacity: int, arrays: Optional[dict] = None):
+        """
+        Args:
+            capacity: Records kept before the oldest is overwritten.
+            arrays: Storage laid out by ``layout(capacity)``, e.g. from a
+                shared ``app.arena`` (default: private arrays).
+        """
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        self.capacity = capacity
+        arrays = arrays if arrays is not None else allocate(self.layout(capacity))
+        self.columns = {name: arrays[name] for name in COLUMNS}
+        self.features = arrays["features"]
+        # [next physical slot, size] – kept with the columns so processes
+        # sharing them agree on it; a memoryview reads back plain ints.
+        self._cursor = memoryview(arrays["cursor"])
+
+    @staticmethod
+    def layout(capacity: int) -> dict:
+        """Arrays a history of ``capacity`` records needs (see ``app.arena``)."""
+        return {
+            "cursor": ((2,), np.int64),
+            **{name: ((capacity,), dtype) for name, dtype in COLUMNS.items()},
+            "features": ((capacity, len(FEATURE_NAMES)), np.float32),
+        }
+
+    def __len__(self) -> int:
+        return self._cursor[1]
+
+    def _physical(self, logical):
+        """Map logical (oldest-first) indices to buffer slots."""
+        return (self._cursor[0] - self._cursor[1] + logical) % self.capacity
+
+    def append(
+        self,
+        timestamp: float,
+        prediction: int,
+        probability: float,
+        is_outlier: bool,
+        features: np.ndarray,
+    ) -> None:
+        """Store one record, overwriting the oldest if the buffer is full."""
+        i, size = self._cursor[0], self._cursor[1]
+        cols = self.columns
+        cols["timestamp"][i] = timestamp
+        cols["prediction"][i] = prediction
+        cols["probability"][i] = probability
+        cols["is_outlier"][i] = is_outlier
+        self.features[i] = features
+
+        self._cursor[0] = (i + 1) % self.capacity
+        if size < self.capacity:
+            self._cursor[1] = size + 1
+
+    def extend(self, cols: dict) -> None:
+        """Append many records at once, e.g. to refill the ring on restart.
+
+        Args:
+            cols: Column arrays as returned by ``window()``, oldest first.
+        """
+        n = len(cols["timestamp"])
+        if n == 0:
+            return
+        keep = min(n, self.capacity)
+        i, size = self._cursor[0], self._cursor[1]
+        slots = (i + np.arange(keep)) % self.capacity
+        for name in COLUMNS:
+            self.columns[name][slots] = cols[name][n - keep:]
+        self.features[slots] = cols["features"][n - keep:]
+
+        self._cursor[0] = (i + keep) % self.capacity
+        self._cursor[1] = min(size + n, self.capacity)
+
+    def prediction_at(self, logical: int) -> int:
+        """Prediction of the record at logical index ``logical``."""
+        return int(self.columns["prediction"][self._physical(logical)])
+
+    def _bisect(self, timestamp: float, right: bool) -> int:
+        """First logical index whose timestamp is >= (or > if ``right``) ``timestamp``."""
+        ts, lo, hi = self.columns["timestamp"], 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = ts[self._physical(mid)]
+            if value < timestamp or (right and value == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def window(
+        self,
+        last: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> dict:
+        """Return copies of the newest records' columns, oldest first.
+
+        Args:
+            last: Keep at most this many newest records (default: all).
+            since: Keep only records with ``timestamp >= since``.
+            until: Keep only records with ``timestamp <= until``.
+
+        Returns:
+            Dict of 1-D column arrays plus ``"features"``, an
+            ``(n, n_features)`` float32 matrix.
+        """
+        # Timestamps are appended in order, so binary searches find the
+        # bounds of a time range.
+        lo = 0 if since is None else self._bisect(since, right=False)
+        hi = len(self) if until is None else self._bisect(until, right=True)
+        if last is not None:
+            lo = max(lo, hi - max(0, last))
+        idx = self._physical(np.arange(lo, max(lo, hi)))
+
+        out = {name: column[idx] for name, column in self.columns.items()}
+        out["features"] = self.features[idx]
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        """Copy of one column over every record held, oldest first."""
+        return self.columns[name][self._physical(np.arange(len(self)))]
+
+    def oldest_timestamp(self) -> Optional[float]:
+        """Timestamp of the oldest record held, or None when empty."""
+        return float(self.columns["timestamp"][self._physical(0)]) if len(self) else None
+
+    def to_records(
+        self,
+        last: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> list[dict]:
+        """Serialise the selected records to JSON-ready dicts, oldest first."""
+        return serialise_window(self.window(last, since, until))
+
+    def nbytes(self) -> int:
+        """Memory held by the preallocated columns."""
+        return self.features.nbytes + sum(c.nbytes for c in self.columns.values())
+
+
+def serialise_window(cols: dict) -> list[dict]:
+    """Turn ``PredictionHistory.window()`` output into JSON-ready dicts."""
+    features = np.round(cols["features"].astype(np.float64), 4)
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+            "prediction": int(pred),
+            "probability": round(float(prob), 4),
+            "is_outlier": bool(outlier),
+            "features": {
+                name: (None if np.isnan(value) else value)
+                for name, value in zip(FEATURE_NAMES, row.tolist())
+            },
+        }
+        for ts, pred, prob, outlier, row in zip(
+            cols["timestamp"].tolist(),
+            cols["prediction"].tolist(),
+            cols["probability"].tolist(),
+            cols["is_outlier"].tolist(),
+            features,
+        )
+    ]
@@ -0,0 +1,485 @@
+"""
+Batch-Scoring Jobs.
+
+Fire-and-forget scoring of files too large for one HTTP request.
+``POST /jobs`` registers a job – a CSV or Parquet file under
+``JOBS_INPUT_DIR``, or an uploaded CSV/Parquet body – and returns at once;
+``GET /jobs/{id}`` reports progress, rows/sec and an ETA, and
+``GET /jobs/{id}/result`` streams the scored CSV once the job completes.
+
+Jobs run in their own worker processes, separate from the ``/predict``
+executor, each reniced by ``JOBS_NICE`` so interactive requests win the
+CPU. Together they use at most ``JOBS_CPU_SHARE`` of the CPUs, counting
+the container's CPU quota rather than the host's cores. The limit holds
+for the whole pod, however many uvicorn workers it runs: a job process
+needs one of the slot files in ``JOBS_DIR/slots``, held with ``flock``.
+When the share is less than one CPU, the single job pauses between
+chunks to stay within it.
+
+A job scores its input with ``ml.score`` one ``JOBS_CHUNK_ROWS`` chunk at
+a time and writes each chunk to its own part file before checkpointing its
+progress in ``job.json``. After a restart, or a job process that crashed
+(at most ``JOBS_MAX_ATTEMPTS`` runs), the job is queued again and resumes
+from the last completed part, skipping rows already scored; scoring is
+deterministic, so a part redone after a crash comes out the same.
+
+Layout of ``JOBS_DIR``::
+
+    <id>/job.json           status, progress and settings (replaced atomically)
+    <id>/input.csv          uploaded input, if any
+    <id>/parts/00000.csv    scored chunks; the first carries the CSV header
+    slots/<n>.lock          one per job that may run at once in the pod
+
+Everything a reader needs is on disk, so any API worker can answer for any
+job; a lock file keeps two workers from running the same job.
+
+Usage::
+
+    from app.jobs import job_manager
+    job_manager.start()                              # in the lifespan
+    job = job_manager.submit_path("registry.csv")
+    job_manager.status(job["job_id"])
+    await job_manager.stop()
+"""
+
+import asyncio
+import fcntl
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator, Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+JOBS_SUBMITTED = Counter(
+    "batch_jobs_submitted_total",
+    "Batch-scoring jobs submitted",
+)
+JOBS_FINISHED = Counter(
+    "batch_jobs_finished_total",
+    "Batch-scoring jobs finished, by final status",
+    ["status"],
+)
+JOBS_RUNNING = Gauge(
+    "batch_jobs_running",
+    "Batch-scoring jobs running in this API process",
+)
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+UNFINISHED = ("queued", "running")
+UPLOAD_SUFFIXES = {"csv": ".csv", "parquet": ".parquet"}
+DISPATCH_SECONDS = 0.25
+RESULT_BLOCK_BYTES = 1 << 16
+CPU_MAX_PATH = "/sys/fs/cgroup/cpu.max"
+
+
+class JobError(ValueError):
+    """Raised for a job request that cannot be accepted."""
+
+
+class JobUploadTooLarge(JobError):
+    """Raised when an uploaded body exceeds ``JOBS_UPLOAD_MAX_BYTES``."""
+
+
+def available_cpus(cpu_max_path: Optional[str] = None) -> float:
+    """CPUs this process may use: the cgroup quota if one is set.
+
+    ``os.cpu_count()`` reports the host's cores, which in a container
+    limited to half a CPU would start one job process per host core.
+
+    Args:
+        cpu_max_path: cgroup v2 ``cpu.max`` file (``"<quota> <period>"``
+            or ``"max <period>"``); defaults to ``CPU_MAX_PATH``.
+
+    Returns:
+        ``quota / period`` when limited, else the CPUs in this process's
+        affinity mask.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        with open(cpu_max_path or CPU_MAX_PATH) as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        return float(cpus)
+    if quota == "max":
+        return float(cpus)
+    return min(float(cpus), int(quota) / int(period))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _read(job_dir: str) -> dict:
+    with open(os.path.join(job_dir, "job.json")) as f:
+        return json.load(f)
+
+
+def _write(job_dir: str, job: dict) -> None:
+    """Replace ``job.json`` atomically, so readers never see half a record."""
+    path = os.path.join(job_dir, "job.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(job, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+# ── Worker process ───────────────────────────
+
+def run_job(job_dir: str, nice: int = 0, backend: str = "compiled", cpu: float = 1.0) -> None:
+    """Score a job's input from its last checkpoint (runs in a job process).
+
+    Args:
+        job_dir: The job's directory.
+        nice: Niceness to add to this process.
+        backend: ``INFERENCE_BACKEND`` to score with.
+        cpu: Share of one CPU to use; below 1, the job sleeps after each
+            chunk in proportion to the CPU time it took.
+    """
+    from ml.score import count_rows, init_worker, read_chunks, score_chunk
+    from ml.train import FEATURE_NAMES
+
+    lock = open(os.path.join(job_dir, "lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return  # Another API worker is running it
+    if nice:
+        os.nice(nice)
+
+    job = _read(job_dir)
+    if job["status"] not in UNFINISHED:
+        return
+    parts_dir = os.path.join(job_dir, "parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    try:
+        init_worker(backend, job["explain"])
+        if job["rows_total"] is None:
+            job["rows_total"] = count_rows(job["input_path"])
+        job.update(
+            status="running", run_started_at=time.time(), run_start_rows=job["rows_done"],
+            attempts=job.get("attempts", 0) + 1,
+        )
+        job["started_at"] = job["started_at"] or _now()
+        _write(job_dir, job)
+
+        chunk_rows, part = job["chunk_rows"], job["parts_done"]
+        id_column = job["id_column"]
+        columns = FEATURE_NAMES + ([id_column] if id_column and id_column not in FEATURE_NAMES else [])
+        for frame in read_chunks(job["input_path"], chunk_rows, columns, skip_rows=part * chunk_rows):
+            busy = time.process_time()
+            scored = score_chunk(frame, part * chunk_rows + 1, job["explain"], id_column)
+            path = os.path.join(parts_dir, f"{part:05d}.csv")
+            scored.to_csv(path + ".tmp", index=False, header=part == 0)
+            os.replace(path + ".tmp", path)
+            part += 1
+            job.update(
+                parts_done=part,
+                rows_done=job["rows_done"] + len(frame),
+                invalid=job["invalid"] + int(scored["error"].notna().sum()),
+            )
+            _write(job_dir, job)
+            if cpu < 1:
+                time.sleep((time.process_time() - busy) * (1 / cpu - 1))
+        job.update(status="completed", finished_at=_now(), rows_total=job["rows_done"])
+    except Exception as exc:
+        job.update(status="failed", finished_at=_now(), error=str(exc))
+    _write(job_dir, job)
+
+
+# ── API process ──────────────────────────────
+
+class JobManager:
+    """Queue of batch-scoring jobs run by a bounded set of worker processes."""
+
+    def __init__(
+        self,
+        directory: str,
+        input_dir: str,
+        cpu_share: float = 0.5,
+        nice: int = 10,
+        chunk_rows: int = 50_000,
+        max_attempts: int = 3,
+        upload_max_bytes: int = 1 << 30,
+    ):
+        """
+        Args:
+            directory: Where jobs keep their record, upload and results.
+            input_dir: Directory that submitted ``input_path`` values must be in.
+            cpu_share: Fraction of the CPUs (see ``available_cpus()``) jobs
+                may use in the pod, one process each. Below one CPU, a
+                single job runs throttled to that share.
+            nice: Niceness added to job processes.
+            chunk_rows: Rows scored per checkpoint.
+            max_attempts: Runs a job gets before a crashing process fails it.
+            upload_max_bytes: Largest accepted upload body.
+        """
+        self.directory = directory
+        self.input_dir = os.path.realpath(input_dir)
+        cpus = available_cpus() * cpu_share
+        self.workers = max(1, int(cpus))
+        self.job_cpu = min(1.0, cpus)
+        self.nice = nice
+        self.chunk_rows = chunk_rows
+        self.max_attempts = max_attempts
+        self.upload_max_bytes = upload_max_bytes
+        self._queue: deque[str] = deque()
+        self._running: dict[str, tuple[multiprocessing.process.BaseProcess, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        JOBS_RUNNING.set_function(lambda: len(self._running))
+
+    def _dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    # ── Lifecycle ────────────────────────────
+
+    def start(self) -> None:
+        """Queue unfinished jobs left by a previous run and start dispatching."""
+        if self._task is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        unfinished = []
+        for job_id in os.listdir(self.directory):
+            try:
+                job = _read(self._dir(job_id))
+            except (OSError, ValueError):
+                continue
+            if job["status"] in UNFINISHED and job_id not in self._queue:
+                unfinished.append(job)
+        for job in sorted(unfinished, key=lambda j: j["created_at"]):
+            self._queue.append(job["job_id"])
+            logger.info("Resuming batch job %s at row %d", job["job_id"], job["rows_done"])
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        """Stop dispatching and kill running jobs; they resume on the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for process, _ in self._running.values():
+            process.terminate()
+        for process, slot in self._running.values():
+            await asyncio.to_thread(process.join, 5)
+            os.close(slot)
+        self._running.clear()
+
+    def _claim_slot(self) -> Optional[int]:
+        """Lock a free pod-wide job slot, returning its descriptor, or None if all are taken."""
+        slots = os.path.join(self.directory, "slots")
+        os.makedirs(slots, exist_ok=True)
+        for n in range(self.workers):
+            fd = os.open(os.path.join(slots, f"{n}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            return fd
+        return None
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._reap()
+            while self._queue and len(self._running) < self.workers:
+                slot = self._claim_slot()
+                if slot is None:
+                    break  # Other API workers' jobs use the pod's share
+                job_id = self._queue.popleft()
+                # Spawned, not forked: the API process runs threads
+                process = multiprocessing.get_context("spawn").Process(
+                    target=run_job,
+                    args=(self._dir(job_id), self.nice, settings.INFERENCE_BACKEND, self.job_cpu),
+                    name=f"job-{job_id[:8]}",
+                    daemon=True,
+                )
+                process.start()
+                self._running[job_id] = (process, slot)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), DISPATCH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def _reap(self) -> None:
+        """Collect finished job processes.
+
+        A job whose process crashed is queued again to resume from its
+        checkpoint, and failed once it has had ``max_attempts`` runs.
+        """
+        for job_id, (process, slot) in list(self._running.items()):
+            if process.is_alive():
+                continue
+            del self._running[job_id]
+            os.close(slot)
+            job = _read(self._dir(job_id))
+            if job["status"] in UNFINISHED and process.exitcode != 0:
+                if job.get("attempts", 0) < self.max_attempts:
+                    logger.warning(
+                        "Batch job %s process exited with code %s; resuming at row %d",
+                        job_id, process.exitcode, job["rows_done"],
+                    )
+                    self._queue.append(job_id)
+                    continue
+                job.update(
+                    status="failed", finished_at=_now(),
+                    error=f"Job process exited with code {process.exitcode}",
+                )
+                _write(self._dir(job_id), job)
+            if job["status"] not in UNFINISHED:
+                JOBS_FINISHED.labels(status=job["status"]).inc()
+                logger.info("Batch job %s %s: %d rows", job_id, job["status"], job["rows_done"])
+
+    # ── Submission ───────────────────────────
+
+    def _create(self, input_path: Optional[str], explain: str, id_column: Optional[str]) -> tuple[str, dict]:
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._dir(job_id))
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "input_path": input_path,
+            "explain": explain,
+            "id_column": id_column,
+            "chunk_rows": self.chunk_rows,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "rows_total": None,
+            "rows_done": 0,
+            "parts_done": 0,
+            "invalid": 0,
+            "error": None,
+            "run_started_at": None,
+            "run_start_rows": 0,
+            "attempts": 0,
+        }
+        return job_id, job
+
+    def _enqueue(self, job_id: str, job: dict) -> dict:
+        """Queue a job whose record has been written."""
+        self._queue.append(job_id)
+        if self._wake is not None:
+            self._wake.set()
+        JOBS_SUBMITTED.inc()
+        logger.info("Batch job %s queued (%s)", job_id, job["input_path"])
+        return self.status(job_id)
+
+    def submit_path(self, input_path: str, explain: str = "none", id_column: Optional[str] = None) -> dict:
+        """Queue a job scoring a file under ``input_dir``.
+
+        Raises:
+            JobError: If the path is outside ``input_dir`` or not a file.
+        """
+        path = os.path.realpath(os.path.join(self.input_dir, input_path))
+        if os.path.commonpath([path, self.input_dir]) != self.input_dir:
+            raise JobError("input_path must be inside JOBS_INPUT_DIR")
+        if not os.path.isfile(path):
+            raise JobError(f"Input file not found: {input_path}")
+        job_id, job = self._create(path, explain, id_column)
+        _write(self._dir(job_id), job)
+        return self._enqueue(job_id, job)
+
+    async def submit_upload(
+        self,
+        chunks: AsyncIterator[bytes],
+        input_format: str,
+        explain: str = "none",
+        id_column: Optional[str] = None,
+    ) -> dict:
+        """Store an uploaded body as the job's input, then queue the job.
+
+        Raises:
+            JobUploadTooLarge: If the body exceeds ``upload_max_bytes``; the
+                part already stored is removed.
+        """
+        job_id, job = await asyncio.to_thread(self._create, None, explain, id_column)
+        path = os.path.join(self._dir(job_id), "input" + UPLOAD_SUFFIXES[input_format])
+        try:
+            f = await asyncio.to_thread(open, path, "wb")
+            try:
+                size = 0
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.upload_max_bytes:
+                        raise JobUploadTooLarge(f"Upload exceeds {self.upload_max_bytes} bytes")
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+            job["input_path"] = path
+            await asyncio.to_thread(_write, self._dir(job_id), job)
+        except BaseException:
+            await asyncio.to_thread(shutil.rmtree, self._dir(job_id), True)
+            raise
+        return self._enqueue(job_id, job)
+
+    # ── Readers ──────────────────────────────
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Public view of a job with progress, rows/sec and ETA, or None if unknown."""
+        if not JOB_ID.match(job_id) or not os.path.exists(os.path.join(self._dir(job_id), "job.json")):
+            return None
+        job = _read(self._dir(job_id))
+        total, done = job["rows_total"], job["rows_done"]
+        rate = eta = None
+        if job["status"] == "running" and job["run_started_at"]:
+            elapsed = time.time() - job["run_started_at"]
+            if elapsed > 0 and done > job["run_start_rows"]:
+                rate = (done - job["run_start_rows"]) / elapsed
+                eta = round((total - done) / rate, 1) if total is not None else None
+                rate = round(rate, 1)
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "input": os.path.basename(job["input_path"] or ""),
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "rows_total": total,
+            "rows_done": done,
+            "invalid_rows": job["invalid"],
+            "progress": round(done / total, 4) if total else (1.0 if job["status"] == "completed" else 0.0),
+            "rows_per_second": rate,
+            "eta_seconds": eta,
+            "error": job["error"],
+        }
+
+    def result_parts(self, job_id: str) -> Iterator[bytes]:
+        """The scored CSV of a completed job, block by block, in row order."""
+        parts_dir = os.path.join(self._dir(job_id), "parts")
+        for name in sorted(n for n in os.listdir(parts_dir) if n.endswith(".csv")):
+            with open(os.path.join(parts_dir, name), "rb") as f:
+                while block := f.read(RESULT_BLOCK_BYTES):
+                    yield block
+
+
+# Singleton access
+job_manager = JobManager(
+    directory=settings.JOBS_DIR,
+    input_dir=settings.JOBS_INPUT_DIR,
+    cpu_share=settings.JOBS_CPU_SHARE,
+    nice=settings.JOBS_NICE,
+    chunk_rows=settings.JOBS_CHUNK_ROWS,
+    max_attempts=settings.JOBS_MAX_ATTEMPTS,
+    upload_max_bytes=settings.JOBS_UPLOAD_MAX_BYTES,
+)
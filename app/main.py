@@ -2,13 +2,25 @@
 FastAPI Application – CardioAnalytics API v2.0.
 
 Endpoints:
-    GET  /health                    – Liveness / readiness probe.
+    GET  /health                    – Liveness probe.
+    GET  /ready                     – Readiness probe (503 until warm-up is done).
+    POST /admin/reload              – Hot-reload the model from models/.
     POST /predict                   – Heart disease prediction (+ outlier + SHAP).
+    POST /predict/batch             – Vectorised prediction for many records.
+    POST /predict/stream            – Streamed scoring of CSV/NDJSON uploads.
+    GET  /predictions/{id}/explanation – Deferred (explain=async) explanation.
+    POST /jobs                      – Submit a batch-scoring job (path or upload).
+    GET  /jobs/{id}                 – Job progress, rows/sec and ETA.
+    GET  /jobs/{id}/result          – Scored CSV of a completed job.
     GET  /metrics                   – Prometheus metrics.
     GET  /analytics/stats           – Real-time prediction statistics.
-    GET  /analytics/history         – Prediction timeline.
+    GET  /analytics/history         – Prediction timeline (optionally a time range).
+    GET  /analytics/timeseries      – Bucketed counts (second/minute/hour).
+    GET  /analytics/quantiles       – Probability/feature quantiles (sketches).
+    GET  /analytics/stream          – Live updates (Server-Sent Events).
     GET  /analytics/spikes          – Spike detection.
     GET  /analytics/spike-analysis  – Feature-shift explanation.
+    GET  /analytics/drift           – PSI/KS drift vs. training distributions.
     GET  /model/performance         – Multi-model comparison metrics.
     GET  /model/feature-importance  – SHAP-based feature importance.
 
@@ -17,14 +29,18 @@ Usage::
     uvicorn app.main:app --host 0.0.0.0 --port 8000
 """
 
+import asyncio
 import json
 import os
 import time
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Literal, Optional
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 from prometheus_client import (
     Counter,
     Histogram,
@@ -32,17 +48,56 @@ from prometheus_client import (
     CONTENT_TYPE_LATEST,
 )
 
+from app.batcher import batcher
+from app.bulk import (
+    INPUT_FORMATS,
+    MEDIA_TYPES,
+    BulkInputError,
+    DuplexStreamingResponse,
+    open_upload,
+    score_stream,
+)
+from app.cache import prediction_cache
 from app.config import settings
+from app.events import analytics_events
+from app.executor import executor, ExecutorSaturatedError
+from app.explanations import explanation_store
+from app.jobs import JobError, JobUploadTooLarge, job_manager
 from app.logger import get_logger
+from app.payloads import model_payloads, respond
+from app.reload import model_reloader
+from app.stream import StreamFull, broadcaster
+from app.warmup import warm_up_service, warmup_state
 from app.schemas import (
     HeartDiseaseInput,
     HealthResponse,
+    ReadinessResponse,
+    ReloadResponse,
     PredictionResponse,
+    ExplainMode,
+    BatchExplainMode,
+    ExplanationResponse,
+    BatchPredictionInput,
+    BatchPredictionItem,
+    BatchPredictionResponse,
     AnalyticsStatsResponse,
     SpikeDetectionResponse,
     SpikeAnalysisResponse,
+    DriftResponse,
+    TimeSeriesResponse,
+    QuantilesResponse,
+    JobSubmitInput,
+    JobStatusResponse,
+)
+from ml.predict import (
+    features_to_vector,
+    get_model_version,
+    is_model_loaded,
+    predict,
+    predict_batch,
+    get_feature_importance,
+    set_backend,
 )
-from ml.predict import is_model_loaded, predict, get_feature_importance
 
 # ──────────────────────────────────────────────
 # Logger
@@ -52,6 +107,9 @@ logger = get_logger(__name__)
 # ──────────────────────────────────────────────
 # Prometheus Metrics
 # ──────────────────────────────────────────────
+# Request methods kept as metric labels; any other verb is counted as "other"
+METRIC_METHODS = frozenset({"GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"})
+
 REQUEST_COUNT = Counter(
     "api_request_total",
     "Total API requests",
@@ -72,10 +130,6 @@ OUTLIER_COUNT = Counter(
     "outlier_total",
     "Total outlier predictions detected",
 )
-SPIKE_COUNT = Counter(
-    "spike_detected_total",
-    "Total spike detection events",
-)
 
 
 # ──────────────────────────────────────────────
@@ -86,6 +140,9 @@ async def lifespan(application: FastAPI):
     """Application startup and shutdown lifecycle."""
     logger.info("Starting %s v%s", settings.APP_NAME, settings.APP_VERSION)
 
+    set_backend(settings.INFERENCE_BACKEND)
+    logger.info("Inference backend: %s", settings.INFERENCE_BACKEND)
+
     # Pre-load model on startup
     try:
         if is_model_loaded():
@@ -95,9 +152,35 @@ async def lifespan(application: FastAPI):
     except Exception as exc:
         logger.error("Failed to load model: %s", exc)
 
+    executor.start()
+    logger.info(
+        "Inference executor started (%s, %d workers, queue %d).",
+        executor.kind, executor.max_workers, executor.max_queue,
+    )
+
+    # Warm every inference path in the background; /ready flips once done.
+    warmup_task = asyncio.create_task(warm_up_service())
+
+    # Pick up retrained artifacts without a restart.
+    model_reloader.start()
+
+    # Record analytics off the request path.
+    analytics_events.start()
+
+    # Batch-scoring jobs, resuming any a restart interrupted.
+    job_manager.start()
+
     yield
 
     logger.info("Shutting down %s", settings.APP_NAME)
+    model_reloader.stop()
+    await job_manager.stop()
+    warmup_task.cancel()
+    batcher.shutdown()
+    executor.shutdown()
+    await analytics_events.stop()
+    from app.analytics import tracker
+    tracker.close()
 
 
 # ──────────────────────────────────────────────
@@ -125,7 +208,13 @@ app.add_middleware(
 # ──────────────────────────────────────────────
 @app.middleware("http")
 async def prometheus_middleware(request: Request, call_next):
-    """Record request count and latency for every request."""
+    """Record request count and latency for every request.
+
+    Requests are labelled by route template (``/jobs/{job_id}``), not by
+    the raw path, and by method from a fixed set, so path parameters,
+    unmatched paths and made-up verbs from scanners cannot grow the number
+    of series; they share the ``unmatched`` and ``other`` labels.
+    """
     if request.url.path == "/metrics":
         return await call_next(request)
 
@@ -133,36 +222,93 @@ async def prometheus_middleware(request: Request, call_next):
     response = await call_next(request)
     elapsed = time.perf_counter() - start
 
+    # The router stores the matched route in the shared scope
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
+    method = request.method if request.method in METRIC_METHODS else "other"
     REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.url.path,
+        method=method,
+        endpoint=endpoint,
         status=response.status_code,
     ).inc()
     REQUEST_LATENCY.labels(
-        method=request.method,
-        endpoint=request.url.path,
+        method=method,
+        endpoint=endpoint,
     ).observe(elapsed)
 
     return response
 
 
+def _saturated(exc: ExecutorSaturatedError) -> HTTPException:
+    """Build the fast-fail response returned when the inference queue is full."""
+    logger.warning("Rejecting request: %s", exc)
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy. Please retry shortly.",
+        headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER)},
+    )
+
+
 # ──────────────────────────────────────────────
 # Core Endpoints
 # ──────────────────────────────────────────────
 @app.get("/health", response_model=HealthResponse, tags=["System"])
 async def health_check():
-    """Liveness / readiness probe for Kubernetes."""
+    """Liveness probe for Kubernetes."""
+    model_loaded = is_model_loaded()
     return HealthResponse(
         status="healthy",
         version=settings.APP_VERSION,
-        model_loaded=is_model_loaded(),
+        model_loaded=model_loaded,
+        model_version=get_model_version() if model_loaded else None,
     )
 
 
+@app.get("/ready", response_model=ReadinessResponse, tags=["System"])
+async def readiness_check():
+    """Readiness probe for Kubernetes – 503 until warm-up has completed."""
+    if not warmup_state.ready:
+        return JSONResponse(
+            status_code=503,
+            content=ReadinessResponse(
+                status="warming_up", error=warmup_state.error,
+            ).model_dump(),
+        )
+    return ReadinessResponse(status="ready", startup_seconds=warmup_state.phases)
+
+
+@app.post("/admin/reload", response_model=ReloadResponse, tags=["System"])
+async def reload_model(x_admin_token: Optional[str] = Header(default=None)):
+    """Load, warm and atomically swap in the artifacts currently in ``models/``.
+
+    With several uvicorn workers this reloads only the worker that serves
+    the call; the file watcher reloads every worker.
+    """
+    if settings.ADMIN_TOKEN and x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+    try:
+        return ReloadResponse(**await model_reloader.reload(trigger="admin"))
+    except Exception as exc:
+        logger.exception("Model reload failed: %s", exc)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Reload failed, previous model still serving: {exc}",
+        )
+
+
 @app.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
-async def make_prediction(payload: HeartDiseaseInput):
+async def make_prediction(
+    payload: HeartDiseaseInput,
+    explain: Optional[ExplainMode] = Query(
+        default=None, description="Explanation mode (defaults to Settings.EXPLAIN_MODE)",
+    ),
+):
     """Run heart disease prediction with outlier detection and SHAP explanation."""
-    logger.info("Prediction request received: %s", payload.model_dump())
+    explain = explain or settings.EXPLAIN_MODE
+    # Build the feature dict and vector once; every stage below shares them.
+    features = payload.model_dump()
+    vector = features_to_vector(features)
+    logger.debug("Prediction request received: %s", features)
 
     if not is_model_loaded():
         logger.error("Model not available for prediction.")
@@ -172,33 +318,41 @@ async def make_prediction(payload: HeartDiseaseInput):
         )
 
     try:
-        result = predict(payload.model_dump())
+        # The prediction itself never waits for a deferred explanation.
+        mode = "none" if explain == "async" else explain
 
-        # ── Record analytics ──────────────────
-        from app.analytics import tracker
-        tracker.record_prediction(
-            prediction=result["prediction"],
-            probability=result["probability"],
-            is_outlier=result["is_outlier"],
-            features=payload.model_dump(),
-        )
+        async def score() -> dict:
+            if settings.MICROBATCH_ENABLED:
+                return await batcher.submit(vector[0], explain=mode)
+            return await executor.run(predict, vector, mode)
+
+        if settings.CACHE_ENABLED:
+            result = await prediction_cache.get_or_compute(vector, mode, score)
+        else:
+            result = await score()
+
+        prediction_id = None
+        if explain == "async":
+            prediction_id = await explanation_store.submit(
+                vector, mode="full", model_version=result["model_version"],
+            )
+
+        # ── Record analytics (in the background) ──
+        analytics_events.publish([{
+            "prediction": result["prediction"],
+            "probability": result["probability"],
+            "is_outlier": result["is_outlier"],
+            "features": vector,
+        }])
 
         # ── Update Prometheus counters ────────
         PREDICTION_COUNT.labels(
             result="disease" if result["prediction"] == 1 else "no_disease"
         ).inc()
-
         if result["is_outlier"]:
             OUTLIER_COUNT.inc()
-            logger.warning("Outlier input detected: %s", payload.model_dump())
-
-        # ── Check for spikes ──────────────────
-        spike = tracker.detect_spike()
-        if spike.get("spike_detected"):
-            SPIKE_COUNT.inc()
-            logger.warning("Spike detected! Score: %s", spike["spike_score"])
 
-        logger.info("Prediction result: %s", result)
+        logger.debug("Prediction result: %s", result)
 
         return PredictionResponse(
             prediction=result["prediction"],
@@ -206,12 +360,235 @@ async def make_prediction(payload: HeartDiseaseInput):
             is_outlier=result["is_outlier"],
             anomaly_score=result["anomaly_score"],
             feature_contributions=result["feature_contributions"],
+            explanation_mode=explain,
+            prediction_id=prediction_id,
+            model_version=result["model_version"],
         )
+    except ExecutorSaturatedError as exc:
+        raise _saturated(exc)
     except Exception as exc:
         logger.exception("Prediction failed: %s", exc)
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(exc)}")
 
 
+@app.get(
+    "/predictions/{prediction_id}/explanation",
+    response_model=ExplanationResponse,
+    tags=["Prediction"],
+)
+async def prediction_explanation(prediction_id: str):
+    """Fetch the deferred explanation of an ``explain=async`` prediction."""
+    entry = await asyncio.to_thread(explanation_store.get, prediction_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Unknown or expired prediction id.",
+        )
+    return ExplanationResponse(prediction_id=prediction_id, **entry)
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse, tags=["Prediction"])
+async def make_batch_prediction(
+    payload: BatchPredictionInput,
+    explain: Optional[BatchExplainMode] = Query(
+        default=None, description="Explanation mode (defaults to Settings.EXPLAIN_MODE)",
+    ),
+):
+    """Score many records in one vectorised pass, reporting per-record errors."""
+    # Batches have no deferred mode. An "async" default means SHAP is too
+    # slow for the request path, so batches then skip explanations.
+    explain = explain or settings.EXPLAIN_MODE
+    if explain == "async":
+        explain = "none"
+    n_records = len(payload.records)
+    logger.info("Batch prediction request received: %d records", n_records)
+
+    if n_records > settings.BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {n_records} records (max {settings.BATCH_MAX_SIZE}).",
+        )
+
+    if not is_model_loaded():
+        logger.error("Model not available for prediction.")
+        raise HTTPException(
+            status_code=503,
+            detail="Model not loaded. Please train the model first.",
+        )
+
+    # ── Validate each record independently ────
+    items: list[BatchPredictionItem] = [None] * n_records
+    valid_indices: list[int] = []
+    valid_features: list[dict] = []
+    for i, record in enumerate(payload.records):
+        try:
+            valid_features.append(HeartDiseaseInput.model_validate(record).model_dump())
+            valid_indices.append(i)
+        except ValidationError as exc:
+            items[i] = BatchPredictionItem(
+                index=i,
+                status="error",
+                error="; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}"
+                    for err in exc.errors()
+                ),
+            )
+
+    try:
+        results = (
+            await executor.run(predict_batch, valid_features, explain)
+            if valid_features else []
+        )
+    except ExecutorSaturatedError as exc:
+        raise _saturated(exc)
+    except Exception as exc:
+        logger.exception("Batch prediction failed: %s", exc)
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(exc)}")
+
+    # ── Assemble results & record analytics ───
+    recorded: list[dict] = []
+    model_version = None
+    for i, features, result in zip(valid_indices, valid_features, results):
+        if "error" in result:
+            items[i] = BatchPredictionItem(index=i, status="error", error=result["error"])
+            continue
+        items[i] = BatchPredictionItem(index=i, **result)
+        model_version = result["model_version"]
+        recorded.append({**result, "features": features})
+
+    analytics_events.publish(recorded)
+
+    # ── Update Prometheus counters ────────────
+    n_disease = sum(1 for r in recorded if r["prediction"] == 1)
+    n_outliers = sum(1 for r in recorded if r["is_outlier"])
+    if n_disease:
+        PREDICTION_COUNT.labels(result="disease").inc(n_disease)
+    if len(recorded) - n_disease:
+        PREDICTION_COUNT.labels(result="no_disease").inc(len(recorded) - n_disease)
+    if n_outliers:
+        OUTLIER_COUNT.inc(n_outliers)
+
+    logger.info(
+        "Batch prediction complete: %d succeeded, %d failed",
+        len(recorded), n_records - len(recorded),
+    )
+
+    return BatchPredictionResponse(
+        results=items,
+        total=n_records,
+        succeeded=len(recorded),
+        failed=n_records - len(recorded),
+        model_version=model_version,
+    )
+
+
+@app.post("/predict/stream", tags=["Prediction"])
+async def stream_predictions(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(
+        default=None, description="Output format (defaults to the input's)",
+    ),
+    explain: Literal["none", "fast", "full"] = Query(
+        default="none", description="Explanation mode (NDJSON output only)",
+    ),
+):
+    """Score a CSV or NDJSON upload chunk by chunk, streaming results back."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    input_format = INPUT_FORMATS.get(content_type)
+    if input_format is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Send text/csv or application/x-ndjson, not {content_type or 'no content type'}.",
+        )
+    output_format = format or input_format
+    if output_format == "csv" and explain != "none":
+        raise HTTPException(status_code=422, detail="CSV output carries no explanations.")
+
+    if not is_model_loaded():
+        logger.error("Model not available for prediction.")
+        raise HTTPException(
+            status_code=503,
+            detail="Model not loaded. Please train the model first.",
+        )
+
+    try:
+        reader, parser = await open_upload(request.stream(), input_format)
+    except BulkInputError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    logger.info("Bulk stream started (%s → %s)", input_format, output_format)
+    return DuplexStreamingResponse(
+        score_stream(reader, parser, output_format, explain, settings.STREAM_CHUNK_ROWS),
+        media_type=MEDIA_TYPES[output_format],
+    )
+
+
+# ──────────────────────────────────────────────
+# Batch-Scoring Jobs
+# ──────────────────────────────────────────────
+JOB_UPLOAD_FORMATS = {
+    "text/csv": "csv",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+
+
+def _job_or_404(job_id: str) -> dict:
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return job
+
+
+@app.post("/jobs", response_model=JobStatusResponse, status_code=202, tags=["Jobs"])
+async def submit_job(
+    request: Request,
+    explain: BatchExplainMode = Query(default="none", description="Explanation mode (uploads)"),
+    id_column: Optional[str] = Query(default=None, description="Column copied to the results (uploads)"),
+):
+    """Queue a batch-scoring job: a JSON body naming a server-side file, or a CSV/Parquet upload."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        if content_type == "application/json":
+            try:
+                body = JobSubmitInput.model_validate_json(await request.body())
+            except ValidationError as exc:
+                raise HTTPException(status_code=422, detail=exc.errors(include_url=False))
+            job = job_manager.submit_path(body.input_path, body.explain, body.id_column)
+        elif content_type in JOB_UPLOAD_FORMATS:
+            job = await job_manager.submit_upload(
+                request.stream(), JOB_UPLOAD_FORMATS[content_type], explain, id_column,
+            )
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail="Send application/json with input_path, or a text/csv or Parquet body.",
+            )
+    except JobUploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except JobError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return JSONResponse(job, status_code=202, headers={"Location": f"/jobs/{job['job_id']}"})
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse, tags=["Jobs"])
+async def job_status(job_id: str):
+    """Progress, throughput and ETA of a batch-scoring job."""
+    return _job_or_404(job_id)
+
+
+@app.get("/jobs/{job_id}/result", tags=["Jobs"])
+async def job_result(job_id: str):
+    """Stream the scored CSV of a completed job."""
+    job = _job_or_404(job_id)
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, not completed.")
+    return StreamingResponse(
+        job_manager.result_parts(job_id),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="job-{job_id}.csv"'},
+    )
+
+
 @app.get("/metrics", tags=["Monitoring"])
 async def metrics():
     """Expose Prometheus metrics."""
@@ -224,64 +601,157 @@ async def metrics():
 # ──────────────────────────────────────────────
 # Analytics Endpoints
 # ──────────────────────────────────────────────
+# Tracker reads wait on its locks, cross-process flocks with
+# ANALYTICS_BACKEND=shared, so they run on a thread, never on the loop.
 @app.get("/analytics/stats", response_model=AnalyticsStatsResponse, tags=["Analytics"])
 async def analytics_stats():
     """Real-time aggregated prediction statistics."""
+    await analytics_events.flush()
     from app.analytics import tracker
-    return tracker.get_stats()
+    return await asyncio.to_thread(tracker.get_stats)
+
+
+def _epoch_range(start: Optional[datetime], end: Optional[datetime]) -> tuple:
+    """Query datetimes → epoch seconds; 422 if the range is inverted."""
+    # Timestamps without an offset are taken as UTC, like every timestamp we return
+    start, end = (
+        t.replace(tzinfo=t.tzinfo or timezone.utc).timestamp() if t else None
+        for t in (start, end)
+    )
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    return start, end
 
 
 @app.get("/analytics/history", tags=["Analytics"])
-async def analytics_history(limit: int = 200):
-    """Prediction history over time (most recent first)."""
+async def analytics_history(
+    limit: int = 200,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Prediction history, oldest first; ranges older than memory come from the archive."""
     from app.analytics import tracker
-    return tracker.get_history(limit=limit)
+    start, end = _epoch_range(start, end)
+    await analytics_events.flush()
+    # A range may read archive segments from disk – keep it off the event loop
+    return await asyncio.to_thread(tracker.get_history, limit, start, end)
+
+
+@app.get("/analytics/timeseries", response_model=TimeSeriesResponse, tags=["Analytics"])
+async def analytics_timeseries(
+    resolution: Literal["second", "minute", "hour"] = "minute",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Prediction counts per time bucket (default: the last 60 buckets)."""
+    from app.analytics import tracker
+    start, end = _epoch_range(start, end)
+    await analytics_events.flush()
+    return await asyncio.to_thread(tracker.get_timeseries, resolution, start, end)
+
+
+@app.get("/analytics/quantiles", response_model=QuantilesResponse, tags=["Analytics"])
+async def analytics_quantiles(
+    metric: Optional[list[str]] = Query(None, description="probability or a feature name; repeatable"),
+    q: list[float] = Query([0.5, 0.9, 0.99], description="Quantiles in [0, 1]; repeatable"),
+):
+    """Estimated quantiles of the probability and every feature (default: all, p50/p90/p99)."""
+    from app.analytics import tracker
+    await analytics_events.flush()
+    try:
+        return await asyncio.to_thread(tracker.get_quantiles, metric, tuple(q))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@app.get("/analytics/stream", tags=["Analytics"])
+async def analytics_stream():
+    """Live analytics as Server-Sent Events: a snapshot, then coalesced updates."""
+    try:
+        subscriber = broadcaster.subscribe()
+    except StreamFull as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER)},
+        )
+    return StreamingResponse(
+        broadcaster.frames(subscriber),
+        media_type="text/event-stream",
+        # No caching, and no proxy buffering (nginx) of the event stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/analytics/spikes", response_model=SpikeDetectionResponse, tags=["Analytics"])
 async def analytics_spikes():
     """Detect spikes in high-risk predictions."""
+    await analytics_events.flush()
     from app.analytics import tracker
-    return tracker.detect_spike()
+    return await asyncio.to_thread(tracker.detect_spike)
 
 
 @app.get("/analytics/spike-analysis", response_model=SpikeAnalysisResponse, tags=["Analytics"])
 async def analytics_spike_analysis():
     """Analyze feature distribution shifts during a spike."""
+    await analytics_events.flush()
     from app.analytics import tracker
-    return tracker.analyze_spike()
+    return await asyncio.to_thread(tracker.analyze_spike)
+
+
+@app.get("/analytics/drift", response_model=DriftResponse, tags=["Analytics"])
+async def analytics_drift():
+    """Feature drift (PSI, approximate KS) over sliding windows."""
+    await analytics_events.flush()
+    from app.analytics import tracker
+    return await asyncio.to_thread(tracker.get_drift)
 
 
 # ──────────────────────────────────────────────
 # Model Endpoints
 # ──────────────────────────────────────────────
+def _read_report(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
 @app.get("/model/performance", tags=["Model"])
-async def model_performance():
+async def model_performance(request: Request):
     """Multi-model comparison metrics and ROC data."""
     from ml.compare import COMPARISON_REPORT_PATH
-    if not os.path.exists(COMPARISON_REPORT_PATH):
+    try:
+        stat = os.stat(COMPARISON_REPORT_PATH)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail="Comparison report not found. Run `python -m ml.train` first.",
         )
-    with open(COMPARISON_REPORT_PATH, "r") as f:
-        return json.load(f)
+    payload = model_payloads.get(
+        "performance",
+        (stat.st_mtime_ns, stat.st_size),
+        lambda: _read_report(COMPARISON_REPORT_PATH),
+    )
+    return respond(request, payload)
+
+
+def _importance_document() -> dict:
+    # Sort by importance descending
+    sorted_features = sorted(get_feature_importance().items(), key=lambda x: x[1], reverse=True)
+    return {
+        "features": [{"name": k, "importance": v} for k, v in sorted_features],
+    }
 
 
 @app.get("/model/feature-importance", tags=["Model"])
-async def model_feature_importance():
+async def model_feature_importance(request: Request):
     """SHAP-based global feature importance."""
-    importance = get_feature_importance()
-    if not importance:
+    if not get_feature_importance():
         raise HTTPException(
             status_code=404,
             detail="Feature importance not available. Run `python -m ml.train` first.",
         )
-    # Sort by importance descending
-    sorted_features = sorted(importance.items(), key=lambda x: x[1], reverse=True)
-    return {
-        "features": [{"name": k, "importance": v} for k, v in sorted_features],
-    }
+    payload = model_payloads.get("feature-importance", get_model_version(), _importance_document)
+    return respond(request, payload)
 
 
 # ──────────────────────────────────────────────
@@ -0,0 +1,158 @@
+"""
+Pre-Serialised Model Payloads.
+
+``/model/performance`` and ``/model/feature-importance`` return documents
+that only change when a model is retrained, yet every dashboard load
+asked for them again – re-reading and re-parsing the comparison report,
+re-sorting the importance dict. Each payload is now built once per
+artifact version into JSON bytes (plus gzip and, if ``brotli`` is
+installed, brotli variants) and served from memory.
+
+Every variant has a strong ETag derived from the body, so a client that
+sends ``If-None-Match`` with the current tag gets a bodyless 304. A
+payload is rebuilt when its version key changes – the model version for
+the feature importance, the report file's mtime and size for the
+comparison report – and the hot reloader clears them all on a swap.
+
+Usage::
+
+    from app.payloads import model_payloads, respond
+    payload = model_payloads.get("feature-importance", version, build)
+    return respond(request, payload)
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+from prometheus_client import Counter
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library
+    orjson = None
+try:
+    import brotli
+except ImportError:  # Optional: no "br" variant without it
+    brotli = None
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+PAYLOAD_BUILDS = Counter(
+    "model_payload_builds_total",
+    "Model payloads serialised (once per artifact version)",
+    ["payload"],
+)
+PAYLOAD_RESPONSES = Counter(
+    "model_payload_responses_total",
+    "Model payload responses by status (200 full body, 304 not modified)",
+    ["payload", "status"],
+)
+
+MIN_COMPRESS_BYTES = 1024  # Smaller bodies are only served uncompressed
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes (``orjson`` when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+class Payload:
+    """One JSON document in every content encoding, with an ETag per encoding."""
+
+    __slots__ = ("name", "variants", "etags")
+
+    def __init__(self, name: str, obj: Any):
+        self.name = name
+        body = dumps(obj)
+        self.variants = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            # mtime=0 keeps the gzip bytes (and so its ETag) reproducible
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body)
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        # Strong tags must differ between encodings of the same document
+        self.etags = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.variants
+        }
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """Best encoding the client accepts: br, then gzip, else identity."""
+        accepted = set()
+        for item in accept_encoding.lower().split(","):
+            coding, _, params = item.partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip())
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether ``If-None-Match`` names any variant of this payload."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or not tags.isdisjoint(self.etags.values())
+
+
+class PayloadCache:
+    """Latest payload per name, rebuilt when its version key changes."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[Hashable, Payload]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, version: Hashable, build: Callable[[], Any]) -> Payload:
+        """Return the payload for ``version``, serialising ``build()`` on a miss.
+
+        Args:
+            name: Payload name (also the metrics label).
+            version: Anything that changes whenever the document does.
+            build: Returns the JSON-ready document.
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != version:
+                entry = (version, Payload(name, build()))
+                self._entries[name] = entry
+                PAYLOAD_BUILDS.labels(payload=name).inc()
+        return entry[1]
+
+    def clear(self) -> None:
+        """Drop every payload, e.g. after a model swap."""
+        with self._lock:
+            self._entries.clear()
+
+
+def respond(request: Request, payload: Payload) -> Response:
+    """200 with the negotiated encoding, or 304 if the client's copy is current."""
+    encoding = payload.negotiate(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": payload.etags[encoding],
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",  # Cache, but revalidate each time
+    }
+    if payload.matches(request.headers.get("if-none-match")):
+        PAYLOAD_RESPONSES.labels(payload=payload.name, status="304").inc()
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    PAYLOAD_RESPONSES.labels(payload=payload.name, status="200").inc()
+    return Response(payload.variants[encoding], media_type="application/json", headers=headers)
+
+
+# Singleton access
+model_payloads = PayloadCache()
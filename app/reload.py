@@ -0,0 +1,168 @@
+"""
+Model Hot-Reload.
+
+Swaps a retrained model into a running pod without a restart. A reload
+loads the artifacts currently in ``models/`` into a new
+:class:`ml.bundle.ModelBundle`, warms it off the event loop, then activates
+it with one reference swap: requests already running finish on the old
+bundle, the next request uses the new one. The prediction cache keys on
+the model version, so it empties itself on the swap, and the
+pre-serialised ``/model/*`` payloads are dropped. If loading fails the
+old bundle keeps serving.
+
+Reloads are triggered by ``POST /admin/reload`` or by a watcher that polls
+the model pickles every ``MODEL_WATCH_INTERVAL`` seconds and reloads once
+a change has settled (a retrain writes several files in sequence).
+
+Usage::
+
+    from app.reload import model_reloader
+    model_reloader.start()                      # begin watching models/
+    outcome = await model_reloader.reload("admin")
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+from app.executor import executor
+from app.logger import get_logger
+from app.payloads import model_payloads
+from ml.artifacts import SOURCE_PATHS, prune_compiled
+from ml.bundle import ModelBundle, activate, current_bundle
+from ml.predict import warm_up
+
+logger = get_logger(__name__)
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+MODEL_RELOADS = Counter(
+    "model_reload_total",
+    "Model hot-reload attempts",
+    ["trigger", "result"],
+)
+MODEL_VERSION_INFO = Gauge(
+    "model_version_info",
+    "Active model bundle (1 for the serving version)",
+    ["version"],
+)
+
+
+def _load_and_warm() -> tuple[ModelBundle, dict]:
+    """Load a new bundle from ``models/`` and warm it (runs in a thread)."""
+    start = time.perf_counter()
+    bundle = ModelBundle.load()
+    load_seconds = time.perf_counter() - start
+    timings = warm_up(settings.warmup_explain_modes, bundle=bundle)
+    timings["load_model"] = load_seconds
+    timings["total"] += load_seconds
+    return bundle, timings
+
+
+class ModelReloader:
+    """Loads, warms and atomically activates new model bundles."""
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _signature() -> tuple:
+        """Cheap change marker for the model pickles: (mtime, size) per file."""
+        signature = []
+        for path in SOURCE_PATHS:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    async def reload(self, trigger: str = "admin") -> dict:
+        """Load and warm the artifacts in ``models/`` and swap them in.
+
+        Concurrent calls are serialised; a call that finds the version
+        already active returns ``"unchanged"`` without swapping.
+
+        Args:
+            trigger: Label recorded on ``model_reload_total``.
+
+        Returns:
+            Dict with status, previous and new version, and seconds spent.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            try:
+                previous = current_bundle().version
+            except FileNotFoundError:
+                previous = None
+
+            try:
+                bundle, timings = await asyncio.to_thread(_load_and_warm)
+            except Exception:
+                MODEL_RELOADS.labels(trigger=trigger, result="failed").inc()
+                raise
+
+            status = "unchanged"
+            if bundle.version != previous:
+                activate(bundle)
+                executor.recycle()
+                model_payloads.clear()
+                # Stores still mapped here or by another worker hold an
+                # in-use lock and are skipped until they are released
+                prune_compiled(keep={bundle.version})
+                if previous is not None:
+                    MODEL_VERSION_INFO.labels(version=previous).set(0)
+                status = "reloaded"
+                logger.info(
+                    "Model %s → %s activated (%s, %.3fs)",
+                    previous, bundle.version, trigger, timings["total"],
+                )
+            MODEL_VERSION_INFO.labels(version=bundle.version).set(1)
+            MODEL_RELOADS.labels(trigger=trigger, result=status).inc()
+
+        return {
+            "status": status,
+            "previous_version": previous,
+            "model_version": bundle.version,
+            "seconds": round(timings["total"], 4),
+        }
+
+    def start(self) -> None:
+        """Start watching the model pickles (no-op if the interval is 0)."""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch(self) -> None:
+        seen = self._signature()
+        while True:
+            await asyncio.sleep(self.interval)
+            changed = self._signature()
+            if changed == seen:
+                continue
+            # Let a retrain finish writing every file before loading.
+            await asyncio.sleep(self.interval)
+            if self._signature() != changed:
+                continue
+            seen = changed
+            try:
+                await self.reload(trigger="watch")
+            except Exception as exc:
+                logger.error("Model reload failed – keeping current model: %s", exc)
+
+
+# Singleton access
+model_reloader = ModelReloader(interval=settings.MODEL_WATCH_INTERVAL)
@@ -6,7 +6,12 @@ models, including analytics, outlier, and SHAP contribution schemas.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
+
+# Per-request feature-contribution modes (see ``ml.predict``); ``async``
+# defers the exact explanation to a background job.
+ExplainMode = Literal["none", "fast", "full", "async"]
+BatchExplainMode = Literal["none", "fast", "full"]
 
 
 # ──────────────────────────────────────────────
@@ -105,6 +110,62 @@ class PredictionResponse(BaseModel):
         default_factory=dict,
         description="SHAP-based feature contribution values",
     )
+    explanation_mode: str = Field(
+        default="full", description="How feature_contributions were computed",
+    )
+    prediction_id: Optional[str] = Field(
+        default=None,
+        description="Id for fetching a deferred explanation (explain=async only)",
+    )
+    model_version: Optional[str] = Field(
+        default=None, description="Fingerprint of the model bundle that served this",
+    )
+    status: str = Field(default="success")
+
+
+class ExplanationResponse(BaseModel):
+    """Deferred explanation for an ``explain=async`` prediction."""
+
+    prediction_id: str
+    status: str = Field(..., description="pending, ready, failed or stale (model replaced)")
+    feature_contributions: dict = Field(default_factory=dict)
+    model_version: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchPredictionInput(BaseModel):
+    """Input schema for batch prediction.
+
+    Records are validated one by one against :class:`HeartDiseaseInput` so
+    that a single bad row does not reject the whole batch.
+    """
+
+    records: list[dict] = Field(
+        ..., min_length=1, description="Patient records to score",
+    )
+
+
+class BatchPredictionItem(BaseModel):
+    """Result for a single record of a batch prediction."""
+
+    index: int = Field(..., description="Position of the record in the input")
+    status: str = Field(default="success", description="success or error")
+    prediction: Optional[int] = None
+    probability: Optional[float] = None
+    is_outlier: Optional[bool] = None
+    anomaly_score: Optional[float] = None
+    feature_contributions: dict = Field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class BatchPredictionResponse(BaseModel):
+    """API response for a batch prediction request."""
+
+    results: list[BatchPredictionItem]
+    total: int
+    succeeded: int
+    failed: int
+    model_version: Optional[str] = None
     status: str = Field(default="success")
 
 
@@ -114,6 +175,52 @@ class HealthResponse(BaseModel):
     status: str = Field(default="healthy")
     version: str
     model_loaded: bool
+    model_version: Optional[str] = None
+
+
+class ReloadResponse(BaseModel):
+    """API response for a model hot-reload."""
+
+    status: str = Field(..., description="reloaded or unchanged")
+    previous_version: Optional[str] = None
+    model_version: str
+    seconds: float = Field(..., description="Time spent loading and warming the bundle")
+
+
+class JobSubmitInput(BaseModel):
+    """Request body for POST /jobs scoring a file already on the server."""
+
+    input_path: str = Field(..., description="CSV or Parquet file, relative to JOBS_INPUT_DIR")
+    explain: BatchExplainMode = "none"
+    id_column: Optional[str] = Field(None, description="Input column copied to the results")
+
+
+class JobStatusResponse(BaseModel):
+    """Progress of a batch-scoring job."""
+
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    input: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    rows_total: Optional[int] = Field(None, description="Counted when the job starts")
+    rows_done: int = 0
+    invalid_rows: int = 0
+    progress: float = Field(0.0, description="Fraction of rows scored")
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    """API response for the readiness endpoint."""
+
+    status: str = Field(..., description="ready or warming_up")
+    startup_seconds: dict = Field(
+        default_factory=dict, description="Warm-up timing breakdown per phase",
+    )
+    error: Optional[str] = None
 
 
 # ──────────────────────────────────────────────
@@ -129,6 +236,35 @@ class AnalyticsStatsResponse(BaseModel):
     high_risk_rate: float = 0.0
     average_confidence: float = 0.0
     outlier_count: int = 0
+    probability_quantiles: dict[str, Optional[float]] = Field(
+        default_factory=dict, description="p50/p90/p99 of the predicted probability",
+    )
+
+
+class MetricQuantiles(BaseModel):
+    """Estimated quantiles of one metric."""
+
+    metric: str
+    count: int = Field(..., description="Observations (missing feature values excluded)")
+    quantiles: dict[str, Optional[float]] = Field(..., description="e.g. {'p50': 0.41}")
+
+
+class QuantilesResponse(BaseModel):
+    """Quantile sketch read-out."""
+
+    relative_accuracy: float = Field(..., description="Relative error bound of every value")
+    metrics: list[MetricQuantiles] = Field(default_factory=list)
+
+
+class DetectorScore(BaseModel):
+    """One spike detector's current judgement."""
+
+    name: str
+    kind: str = Field(..., description="window, ewma or cusum")
+    score: float
+    threshold: float
+    detected: bool
+    ready: bool = Field(..., description="False while the detector is warming up")
 
 
 class SpikeDetectionResponse(BaseModel):
@@ -140,6 +276,8 @@ class SpikeDetectionResponse(BaseModel):
     recent_high_risk_rate: Optional[float] = None
     baseline_high_risk_rate: Optional[float] = None
     window_size: int = 0
+    detectors: list[DetectorScore] = Field(default_factory=list)
+    triggered_by: list[str] = Field(default_factory=list, description="Detectors currently alarming")
 
 
 class SpikeAnalysisResponse(BaseModel):
@@ -149,3 +287,48 @@ class SpikeAnalysisResponse(BaseModel):
     explanation: str = ""
     shifting_features: list = Field(default_factory=list)
     spike_info: Optional[dict] = None
+
+
+class TimeSeriesPoint(BaseModel):
+    """Aggregates of one time bucket."""
+
+    timestamp: str
+    count: int = 0
+    high_risk: int = 0
+    outliers: int = 0
+    mean_probability: Optional[float] = None
+
+
+class TimeSeriesResponse(BaseModel):
+    """Bucketed prediction counts at one resolution, oldest first."""
+
+    resolution: str
+    step_seconds: int
+    points: list[TimeSeriesPoint] = Field(default_factory=list)
+
+
+class FeatureDrift(BaseModel):
+    """Drift scores of one feature in one window."""
+
+    feature: str
+    psi: float
+    ks: float
+    samples: int
+    status: str
+
+
+class DriftWindow(BaseModel):
+    """Drift scores of every feature over one sliding window."""
+
+    window_size: int
+    samples: int
+    drifted_features: list[str] = Field(default_factory=list)
+    features: list[FeatureDrift] = Field(default_factory=list)
+
+
+class DriftResponse(BaseModel):
+    """Live vs. training feature distributions (PSI / approximate KS)."""
+
+    available: bool = False
+    message: Optional[str] = None
+    windows: list[DriftWindow] = Field(default_factory=list)
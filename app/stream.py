@@ -0,0 +1,281 @@
+"""
+Live Analytics Stream.
+
+Pushes analytics changes to dashboards over Server-Sent Events
+(``GET /analytics/stream``) instead of having every viewer poll several
+``/analytics/*`` endpoints.
+
+One producer, many subscribers: the analytics event consumer calls
+``notify()`` after recording each batch. Notifications are coalesced for
+at most ``interval_ms``; one frame is then built and serialised once –
+counts of the new predictions, the newest few of them, the stats fields
+that changed and, on a change, the spike state – and the same bytes are
+queued to every subscriber. The tracker is read on a worker thread: with
+``ANALYTICS_BACKEND=shared`` its lock is a cross-process ``flock`` that
+must not stall the event loop. Each subscriber has a small bounded buffer; a
+client that falls that many frames behind is disconnected rather than
+holding frames, or the producer, back. Server load thus follows the event
+rate, not viewers × poll rate.
+
+Frames on the wire::
+
+    event: snapshot          (once, on connect: stats, spike, recent predictions)
+    event: update            (per interval with new predictions)
+    : keepalive              (comment after ``HEARTBEAT_SECONDS`` of silence)
+
+Each worker streams the predictions it recorded itself; stats come from
+the tracker, so they cover the pod with ``ANALYTICS_BACKEND=shared``.
+
+Usage::
+
+    from app.stream import broadcaster
+    broadcaster.notify(records)                      # after recording a batch
+    subscriber = broadcaster.subscribe()
+    return StreamingResponse(broadcaster.frames(subscriber), media_type="text/event-stream")
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+STREAM_SUBSCRIBERS = Gauge(
+    "analytics_stream_subscribers",
+    "Clients connected to /analytics/stream",
+)
+STREAM_FRAMES = Counter(
+    "analytics_stream_frames_total",
+    "Update frames broadcast to /analytics/stream subscribers",
+)
+STREAM_DROPPED = Counter(
+    "analytics_stream_dropped_total",
+    "Subscribers disconnected for falling behind",
+)
+
+RECENT_PREDICTIONS = 20  # Newest predictions carried per frame
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _event(name: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    """One SSE message."""
+    head = f"event: {name}\n" + (f"id: {event_id}\n" if event_id is not None else "")
+    return f"{head}data: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+def _read_tracker() -> tuple[dict, dict]:
+    """Current stats and spike state (takes the tracker locks; runs in a thread)."""
+    from app.analytics import tracker
+
+    return tracker.get_stats(), tracker.detect_spike()
+
+
+class StreamFull(Exception):
+    """Raised by ``subscribe()`` when ``max_clients`` are connected."""
+
+
+class _Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, buffer: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        self.dropped = False
+
+
+class AnalyticsBroadcaster:
+    """Coalesce recorded predictions into SSE frames and fan them out."""
+
+    HEARTBEAT_SECONDS = 15.0
+
+    def __init__(self, interval_ms: float = 500, client_buffer: int = 32, max_clients: int = 200):
+        """
+        Args:
+            interval_ms: Minimum time between update frames.
+            client_buffer: Frames a subscriber may fall behind before it is dropped.
+            max_clients: Concurrent subscribers accepted.
+        """
+        self.interval = interval_ms / 1000.0
+        self.client_buffer = client_buffer
+        self.max_clients = max_clients
+        self._subscribers: set[_Subscriber] = set()
+        self._pending: list[dict] = []
+        self._pending_count = self._pending_high = self._pending_outliers = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_emit = 0.0
+        self._seq = 0
+        self._stats: dict = {}
+        self._spike: dict = {}
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    # ── Producer (event loop) ────────────────
+
+    def notify(self, records: list[dict]) -> None:
+        """Note freshly recorded predictions; frames follow at most every ``interval``."""
+        if not self._subscribers or not records:
+            return
+        stamp = _now()
+        self._pending_count += len(records)
+        self._pending_high += sum(1 for r in records if r["prediction"] == 1)
+        self._pending_outliers += sum(1 for r in records if r["is_outlier"])
+        self._pending.extend(
+            {
+                "timestamp": stamp,
+                "prediction": int(r["prediction"]),
+                "probability": round(float(r["probability"]), 4),
+                "is_outlier": bool(r["is_outlier"]),
+            }
+            for r in records[-RECENT_PREDICTIONS:]
+        )
+        del self._pending[:-RECENT_PREDICTIONS]
+
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            delay = max(0.0, self._last_emit + self.interval - loop.time())
+            self._timer = loop.call_later(delay, self._emit)
+
+    def _emit(self) -> None:
+        """Timer callback: build the next update frame in a task."""
+        self._task = asyncio.get_running_loop().create_task(self._emit_frame())
+
+    async def _emit_frame(self) -> None:
+        """Build one update frame and queue it to every subscriber.
+
+        ``_timer`` stays set until the frame is out, so notifications
+        arriving meanwhile only accumulate for the next frame.
+        """
+        loop = asyncio.get_running_loop()
+        self._last_emit = loop.time()
+        try:
+            if not self._subscribers:
+                self._reset_pending()
+                return
+
+            frame = {
+                "timestamp": _now(),
+                "new": {
+                    "count": self._pending_count,
+                    "high_risk": self._pending_high,
+                    "outliers": self._pending_outliers,
+                },
+                "recent": self._pending,
+            }
+            self._reset_pending()
+            # The tracker locks are cross-process flocks with
+            # ANALYTICS_BACKEND=shared, so never take it on the event loop.
+            stats, spike = await asyncio.to_thread(_read_tracker)
+            changed = {k: v for k, v in stats.items() if self._stats.get(k) != v}
+            if changed:
+                frame["stats"] = changed
+            self._stats = stats
+            if spike.get("spike_detected") != self._spike.get("spike_detected") or (
+                spike.get("spike_detected") and spike.get("spike_score") != self._spike.get("spike_score")
+            ):
+                frame["spike"] = spike
+            self._spike = spike
+
+            self._seq += 1
+            self._broadcast(_event("update", frame, self._seq))
+        except Exception:
+            logger.exception("Building an /analytics/stream frame failed")
+        finally:
+            self._timer = None
+            if self._pending_count and self._subscribers:
+                delay = max(0.0, self._last_emit + self.interval - loop.time())
+                self._timer = loop.call_later(delay, self._emit)
+
+    def _reset_pending(self) -> None:
+        self._pending = []
+        self._pending_count = self._pending_high = self._pending_outliers = 0
+
+    def _broadcast(self, message: bytes) -> None:
+        STREAM_FRAMES.inc()
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: _Subscriber) -> None:
+        """Disconnect a subscriber that stopped keeping up."""
+        STREAM_DROPPED.inc()
+        logger.warning("Dropping slow /analytics/stream client (%d frames behind)", self.client_buffer)
+        subscriber.dropped = True
+        self._subscribers.discard(subscriber)
+        STREAM_SUBSCRIBERS.set(len(self._subscribers))
+        # Wake the client's generator so it ends the response
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    # ── Subscribers ──────────────────────────
+
+    def subscribe(self) -> _Subscriber:
+        """Register a client.
+
+        Raises:
+            StreamFull: When ``max_clients`` are already connected.
+        """
+        if len(self._subscribers) >= self.max_clients:
+            raise StreamFull(f"{self.max_clients} stream clients already connected")
+        subscriber = _Subscriber(self.client_buffer)
+        self._subscribers.add(subscriber)
+        STREAM_SUBSCRIBERS.set(len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        STREAM_SUBSCRIBERS.set(len(self._subscribers))
+
+    def snapshot(self) -> bytes:
+        """Initial frame for a new subscriber: the full current state."""
+        from app.analytics import tracker
+
+        recent = tracker.get_history(RECENT_PREDICTIONS)
+        for record in recent:
+            del record["features"]
+        return _event("snapshot", {
+            "timestamp": _now(),
+            "stats": tracker.get_stats(),
+            "spike": tracker.detect_spike(),
+            "recent": recent,
+        }, self._seq)
+
+    async def frames(self, subscriber: _Subscriber) -> AsyncIterator[bytes]:
+        """SSE body for one subscriber; ends when it is dropped."""
+        try:
+            yield await asyncio.to_thread(self.snapshot)
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), self.HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+
+# Singleton access
+broadcaster = AnalyticsBroadcaster(
+    interval_ms=settings.ANALYTICS_STREAM_INTERVAL_MS,
+    client_buffer=settings.ANALYTICS_STREAM_CLIENT_BUFFER,
+    max_clients=settings.ANALYTICS_STREAM_MAX_CLIENTS,
+)
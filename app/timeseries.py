@@ -0,0 +1,149 @@
+"""
+Multi-Resolution Prediction Time Series.
+
+Per-second, per-minute and per-hour buckets of prediction count,
+high-risk count, outlier count and probability sum, updated in place as
+each prediction is recorded. Every resolution is a ring of buckets
+indexed by ``bucket number % retention``; a slot still holding an older
+bucket number is reset on first use, so retention is bounded without any
+sweeping and a chart of a whole day reads 1,440 minute buckets instead of
+every prediction made that day.
+
+Like the history, the arrays come from an ``app.arena`` arena and can be
+shared by all workers in a pod.
+
+Usage::
+
+    from app.timeseries import TimeSeries, serialise_series
+    series = TimeSeries()
+    series.record(time.time(), prediction=1, probability=0.87, is_outlier=False)
+    points = serialise_series(series.window("minute", start=time.time() - 3600))
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from app.arena import allocate
+
+# Resolution → (bucket width in seconds, buckets kept)
+RESOLUTIONS = {
+    "second": (1, 3600),     # Last hour
+    "minute": (60, 1440),    # Last day
+    "hour": (3600, 720),     # Last 30 days
+}
+DEFAULT_POINTS = 60  # Buckets returned when no start is given
+
+
+class TimeSeries:
+    """Fixed-retention bucket rings at every resolution in ``RESOLUTIONS``."""
+
+    def __init__(self, arrays: Optional[dict] = None):
+        arrays = arrays if arrays is not None else allocate(self.layout())
+        self._arrays = arrays
+        # Per resolution: bucket number held by each slot, and its sums
+        self._rings = {
+            name: (
+                memoryview(arrays[f"{name}.bucket"]),
+                memoryview(arrays[f"{name}.count"]),
+                memoryview(arrays[f"{name}.high_risk"]),
+                memoryview(arrays[f"{name}.outliers"]),
+                memoryview(arrays[f"{name}.probability_sum"]),
+            )
+            for name in RESOLUTIONS
+        }
+
+    @staticmethod
+    def layout() -> dict:
+        """Arrays the rings need (see ``app.arena``)."""
+        layout = {}
+        for name, (_, retention) in RESOLUTIONS.items():
+            layout[f"{name}.bucket"] = ((retention,), np.int64)
+            layout[f"{name}.count"] = ((retention,), np.int64)
+            layout[f"{name}.high_risk"] = ((retention,), np.int64)
+            layout[f"{name}.outliers"] = ((retention,), np.int64)
+            layout[f"{name}.probability_sum"] = ((retention,), np.float64)
+        return layout
+
+    def record(self, timestamp: float, prediction: int, probability: float, is_outlier: bool) -> None:
+        """Add one prediction to its bucket at every resolution."""
+        for name, (step, retention) in RESOLUTIONS.items():
+            bucket, count, high_risk, outliers, probability_sum = self._rings[name]
+            number = int(timestamp // step)
+            slot = number % retention
+            if bucket[slot] != number:
+                # Slot still holds a bucket from `retention` periods ago
+                bucket[slot] = number
+                count[slot] = high_risk[slot] = outliers[slot] = 0
+                probability_sum[slot] = 0.0
+            count[slot] += 1
+            high_risk[slot] += prediction == 1
+            outliers[slot] += bool(is_outlier)
+            probability_sum[slot] += probability
+
+    def window(
+        self,
+        resolution: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> dict:
+        """Copy the buckets covering ``[start, end]`` (take under the caller's lock).
+
+        Buckets older than the resolution's retention are dropped from the
+        range; empty buckets come back as zeros.
+
+        Args:
+            resolution: A key of ``RESOLUTIONS``.
+            start: Epoch seconds (default: ``DEFAULT_POINTS`` buckets before ``end``).
+            end: Epoch seconds (default and upper bound: now).
+            now: Current time, for retention (default: ``time.time()``).
+
+        Raises:
+            ValueError: On an unknown resolution.
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(
+                f"Unknown resolution {resolution!r} (expected one of {', '.join(RESOLUTIONS)})"
+            )
+        step, retention = RESOLUTIONS[resolution]
+        now = time.time() if now is None else now
+        current = int(now // step)
+        last = current if end is None else min(int(end // step), current)
+        first = last - DEFAULT_POINTS + 1 if start is None else int(start // step)
+        first = max(first, current - retention + 1)
+
+        numbers = np.arange(first, last + 1, dtype=np.int64)
+        slots = numbers % retention
+        held = self._arrays[f"{resolution}.bucket"][slots] == numbers
+        columns = {
+            column: np.where(held, self._arrays[f"{resolution}.{column}"][slots], 0)
+            for column in ("count", "high_risk", "outliers", "probability_sum")
+        }
+        columns["start"] = numbers * step
+        columns["step"] = step
+        return columns
+
+
+def serialise_series(cols: dict) -> list[dict]:
+    """Turn ``TimeSeries.window()`` output into JSON-ready points."""
+    count = cols["count"]
+    mean = np.round(cols["probability_sum"] / np.maximum(count, 1), 4)
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(start, tz=timezone.utc).isoformat(),
+            "count": n,
+            "high_risk": high,
+            "outliers": outliers,
+            "mean_probability": (p if n else None),
+        }
+        for start, n, high, outliers, p in zip(
+            cols["start"].tolist(),
+            count.tolist(),
+            cols["high_risk"].tolist(),
+            cols["outliers"].tolist(),
+            mean.tolist(),
+        )
+    ]
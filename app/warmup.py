@@ -0,0 +1,75 @@
+"""
+Startup Warm-up & Readiness.
+
+Maps every model artifact, builds the SHAP explainer and runs synthetic
+inferences through each explain mode in ``WARMUP_EXPLAIN_MODES`` in the
+background at startup. The ``/ready`` probe reports ready only once this
+has finished, so Kubernetes does not route traffic to a cold pod after a
+scale-up.
+
+Usage::
+
+    from app.warmup import warmup_state, warm_up_service
+    asyncio.create_task(warm_up_service())
+"""
+
+from typing import Optional
+
+from prometheus_client import Gauge
+
+from app.config import settings
+from app.executor import executor
+from app.logger import get_logger
+from ml.predict import warm_up
+
+logger = get_logger(__name__)
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+STARTUP_PHASE_SECONDS = Gauge(
+    "startup_phase_seconds",
+    "Time spent in each startup warm-up phase",
+    ["phase"],
+)
+SERVICE_READY = Gauge(
+    "service_ready",
+    "1 once warm-up has completed and the pod can take traffic",
+)
+
+
+class WarmupState:
+    """Readiness flag plus the timing breakdown of the last warm-up."""
+
+    def __init__(self):
+        self.ready = False
+        self.phases: dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def reset(self) -> None:
+        self.ready = False
+        self.phases = {}
+        self.error = None
+        SERVICE_READY.set(0)
+
+
+async def warm_up_service() -> None:
+    """Run ``ml.predict.warm_up`` on the inference executor and mark ready."""
+    warmup_state.reset()
+    try:
+        phases = await executor.run(warm_up, settings.warmup_explain_modes)
+    except Exception as exc:
+        warmup_state.error = str(exc)
+        logger.error("Warm-up failed – /ready will stay 503: %s", exc)
+        return
+
+    for phase, seconds in phases.items():
+        STARTUP_PHASE_SECONDS.labels(phase=phase).set(seconds)
+    warmup_state.phases = {phase: round(seconds, 4) for phase, seconds in phases.items()}
+    warmup_state.ready = True
+    SERVICE_READY.set(1)
+    logger.info("Warm-up complete in %.3fs: %s", phases["total"], warmup_state.phases)
+
+
+# Singleton access
+warmup_state = WarmupState()
@@ -0,0 +1,136 @@
+"""
+Artifact Memory Benchmark.
+
+Starts N worker processes at once, as ``uvicorn --workers N`` does, and has
+each load the model artifacts either by unpickling ``model.pkl``,
+``scaler.pkl`` and ``outlier_detector.pkl`` (the old loader) or by
+memory-mapping the compiled store in ``models/compiled/``. Every worker
+scores one row so the pages it needs are resident, then waits until all
+workers have loaded before sampling its memory.
+
+Reports, per worker (mean) and summed over workers:
+    - load time
+    - RSS growth caused by loading (``VmRSS``)
+    - proportional set size growth (``Pss``; shared pages are split
+      between the processes mapping them, so this is what the pod pays)
+
+Linux only (reads ``/proc/self/status`` and ``/proc/self/smaps_rollup``).
+
+Usage::
+
+    python -m benchmarks.bench_artifact_memory [--workers 2]
+"""
+
+import argparse
+import multiprocessing as mp
+import time
+
+LOADERS = ("pickle", "mmap")
+
+
+def _memory_kib() -> dict:
+    """Return this process's ``VmRSS`` and ``Pss`` in KiB."""
+    usage = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                usage["rss"] = int(line.split()[1])
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    usage["pss"] = int(line.split()[1])
+    except OSError:
+        usage["pss"] = usage["rss"]  # Kernel without smaps_rollup
+    return usage
+
+
+def _load_pickles():
+    import joblib
+    from ml.train import MODEL_PATH, OUTLIER_DETECTOR_PATH, SCALER_PATH
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    detector = joblib.load(OUTLIER_DETECTOR_PATH)
+    del detector.feature_names_in_, scaler.feature_names_in_
+
+    def score(X):
+        return model.predict_proba(scaler.transform(X)), detector.decision_function(X)
+    return score
+
+
+def _load_mmap():
+    from ml.artifacts import load_compiled
+
+    store = load_compiled()
+    if store is None:
+        raise SystemExit("No compiled store – run `python -m ml.train` first.")
+
+    def score(X):
+        X_scaled = (X - store.scale_mean) / store.scale_std
+        return store.forest.predict_proba(X_scaled), store.detector.decision_function(X)
+    return score
+
+
+def _worker(loader: str, barrier, results) -> None:
+    """Load artifacts with ``loader`` and report memory once all workers have."""
+    import numpy as np
+    import sklearn.ensemble  # noqa: F401  (import cost is not artifact cost)
+
+    import ml.artifacts  # noqa: F401
+
+    before = _memory_kib()
+    start = time.perf_counter()
+    score = _load_pickles() if loader == "pickle" else _load_mmap()
+    score(np.zeros((1, 13)))
+    load_seconds = time.perf_counter() - start
+
+    barrier.wait()  # Every worker is loaded – sharing is now visible in Pss
+    after = _memory_kib()
+    results.put({
+        "load_ms": load_seconds * 1e3,
+        "rss_mib": (after["rss"] - before["rss"]) / 1024,
+        "pss_mib": (after["pss"] - before["pss"]) / 1024,
+    })
+    barrier.wait()  # Stay alive until every worker has sampled
+
+
+def measure(loader: str, workers: int) -> list[dict]:
+    """Run ``workers`` fresh processes with ``loader`` and collect their reports."""
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(loader, barrier, results)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    reports = [results.get(timeout=120) for _ in procs]
+    for proc in procs:
+        proc.join()
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    # Build the compiled store up front so no worker pays for compiling it
+    from ml.artifacts import load_or_build
+    load_or_build()
+
+    print("=" * 74)
+    print(f"   ARTIFACT LOADING – {args.workers} WORKERS")
+    print("=" * 74)
+    print(f"  {'loader':10s}{'load ms':>12s}{'RSS MiB':>12s}{'PSS MiB':>12s}"
+          f"{'Σ RSS MiB':>14s}{'Σ PSS MiB':>14s}")
+    for loader in LOADERS:
+        reports = measure(loader, args.workers)
+        mean = {key: sum(r[key] for r in reports) / len(reports) for key in reports[0]}
+        print(f"  {loader:10s}{mean['load_ms']:>12.1f}{mean['rss_mib']:>12.2f}"
+              f"{mean['pss_mib']:>12.2f}{mean['rss_mib'] * len(reports):>14.2f}"
+              f"{mean['pss_mib'] * len(reports):>14.2f}")
+    print("=" * 74)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Feature-Path Micro-Benchmark.
+
+Compares the per-request work of the original ``/predict`` feature path
+(repeated ``model_dump()``, one ``pd.DataFrame`` per stage, two forest and
+two IsolationForest passes) with the single-vector fast path. SHAP is
+excluded so the numbers reflect only the stages that changed.
+
+Reports, per request:
+    - calls to ``model_dump``, DataFrame constructions and model passes
+    - peak traced allocation (``tracemalloc``)
+    - mean wall time
+
+Usage::
+
+    python -m benchmarks.bench_feature_path [--iterations 2000]
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.schemas import HeartDiseaseInput
+from ml import outlier, predict
+from ml.bundle import current_bundle
+from ml.outlier import OUTLIER_DETECTOR_PATH
+from ml.train import FEATURE_NAMES, MODEL_PATH, SCALER_PATH
+
+SAMPLE = HeartDiseaseInput.model_config["json_schema_extra"]["example"]
+
+
+def _counting(counter: Counter, name: str, fn):
+    """Wrap ``fn`` so every call bumps ``counter[name]``."""
+    def wrapper(*args, **kwargs):
+        counter[name] += 1
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+class LegacyPath:
+    """The original per-request feature path, reproduced verbatim."""
+
+    def __init__(self, counter: Counter):
+        self.model = joblib.load(MODEL_PATH)
+        self.scaler = joblib.load(SCALER_PATH)
+        self.detector = joblib.load(OUTLIER_DETECTOR_PATH)
+        for obj, names in (
+            (self.model, ("predict", "predict_proba")),
+            (self.detector, ("decision_function", "predict")),
+        ):
+            for name in names:
+                setattr(obj, name, _counting(counter, f"{type(obj).__name__}.{name}", getattr(obj, name)))
+
+    def __call__(self, payload: HeartDiseaseInput) -> dict:
+        _ = payload.model_dump()                                  # request log
+        features = payload.model_dump()                           # predict()
+        df = pd.DataFrame([features])[FEATURE_NAMES]
+        X_scaled = self.scaler.transform(df)
+        prediction = int(self.model.predict(X_scaled)[0])
+        probability = float(self.model.predict_proba(X_scaled)[0][1])
+
+        df = pd.DataFrame([features])[FEATURE_NAMES]              # detect_outlier()
+        score = float(self.detector.decision_function(df)[0])
+        is_outlier = bool(self.detector.predict(df)[0] == -1)
+
+        _ = payload.model_dump()                                  # analytics
+        if is_outlier:
+            _ = payload.model_dump()                              # outlier log
+        return {"prediction": prediction, "probability": probability,
+                "is_outlier": is_outlier, "anomaly_score": score}
+
+
+class FastPath:
+    """The single-vector path used by ``app.main.make_prediction``."""
+
+    def __init__(self, counter: Counter):
+        self.bundle = current_bundle()
+        for obj, names in (
+            (self.bundle.forest, ("predict_proba",)),
+            (self.bundle._model, ("predict", "predict_proba")),
+            (self.bundle.detector, ("decision_function", "predict")),
+        ):
+            for name in names:
+                if obj is None or not hasattr(obj, name):
+                    continue  # Not loaded on this path
+                setattr(obj, name, _counting(counter, f"{type(obj).__name__}.{name}", getattr(obj, name)))
+
+    def __call__(self, payload: HeartDiseaseInput) -> dict:
+        features = payload.model_dump()
+        x = predict.features_to_vector(features)
+        proba = self.bundle.predict_proba(self.bundle.scale(x), "compiled")[0]
+        is_outlier, scores = outlier.detect_outliers(x, self.bundle)
+        return {"prediction": int(np.argmax(proba)), "probability": float(proba[1]),
+                "is_outlier": bool(is_outlier[0]), "anomaly_score": float(scores[0])}
+
+
+def measure(path_cls, iterations: int) -> dict:
+    """Run one path and return per-request counts, peak bytes and latency."""
+    counter: Counter = Counter()
+    path = path_cls(counter)
+    payload = HeartDiseaseInput(**SAMPLE)
+
+    real_dump = HeartDiseaseInput.model_dump
+    real_frame_init = pd.DataFrame.__init__
+    HeartDiseaseInput.model_dump = _counting(counter, "model_dump", real_dump)
+    pd.DataFrame.__init__ = _counting(counter, "DataFrame()", real_frame_init)
+    try:
+        path(payload)  # Warm caches before measuring
+        counter.clear()
+
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        path(payload)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        per_request = dict(counter)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            path(payload)
+        elapsed = time.perf_counter() - start
+    finally:
+        HeartDiseaseInput.model_dump = real_dump
+        pd.DataFrame.__init__ = real_frame_init
+
+    return {"calls": per_request, "peak_bytes": peak, "mean_us": elapsed / iterations * 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    legacy = measure(LegacyPath, args.iterations)
+    fast = measure(FastPath, args.iterations)
+
+    print("=" * 74)
+    print("   FEATURE PATH – PER-REQUEST WORK")
+    print("=" * 74)
+    print(f"  {'':44s}{'legacy':>12s}{'fast':>12s}")
+    for name in sorted(set(legacy["calls"]) | set(fast["calls"])):
+        print(f"  {name:44s}{legacy['calls'].get(name, 0):>12d}{fast['calls'].get(name, 0):>12d}")
+    print("-" * 74)
+    print(f"  {'peak traced bytes':44s}{legacy['peak_bytes']:>12,d}{fast['peak_bytes']:>12,d}")
+    print(f"  {'mean latency (µs)':44s}{legacy['mean_us']:>12.1f}{fast['mean_us']:>12.1f}")
+    print("=" * 74)
+
+
+if __name__ == "__main__":
+    main()
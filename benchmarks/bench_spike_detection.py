@@ -0,0 +1,80 @@
+"""
+Spike-Detection Micro-Benchmark.
+
+Measures the per-request analytics cost of ``/predict``, one
+``record_prediction()`` plus one ``detect_spike()``, with a full history
+of ``HISTORY_MAX`` records. It compares the original full-history scan
+with the incremental counters as ``HISTORY_MAX`` grows to 10^6.
+
+Usage::
+
+    python -m benchmarks.bench_spike_detection [--iterations 2000]
+"""
+
+import argparse
+import time
+
+from app.analytics import AnalyticsTracker
+
+SIZES = (10**3, 10**4, 10**5, 10**6)
+FEATURES = {}
+
+
+class LegacyScan:
+    """The original ``detect_spike()``: copy the history, rescan it."""
+
+    def detect_spike(self) -> dict:
+        with self._locks["history"]:
+            items = self.history.window()["prediction"].tolist()
+        recent = items[-self.SPIKE_WINDOW:]
+        recent_hr = sum(1 for p in recent if p == 1) / len(recent)
+        older = items[:-self.SPIKE_WINDOW]
+        baseline_hr = (
+            sum(1 for p in older if p == 1) / len(older)
+            if older else self.baseline_high_risk_rate
+        )
+        return {"spike_score": recent_hr / (baseline_hr or 0.01)}
+
+
+def _tracker(history_max: int, legacy: bool) -> AnalyticsTracker:
+    """A filled, standalone tracker (bypassing the app-wide singleton)."""
+    bases = (LegacyScan, AnalyticsTracker) if legacy else (AnalyticsTracker,)
+    cls = type("BenchTracker", bases, {"_instance": None, "HISTORY_MAX": history_max})
+    tracker = cls()
+    tracker.record_predictions([
+        {"prediction": i % 2, "probability": 0.5, "is_outlier": False, "features": FEATURES}
+        for i in range(history_max)
+    ])
+    return tracker
+
+
+def measure(history_max: int, legacy: bool, iterations: int) -> float:
+    """Mean microseconds per record + detect pair at a full history."""
+    tracker = _tracker(history_max, legacy)
+    start = time.perf_counter()
+    for i in range(iterations):
+        tracker.record_prediction(i % 2, 0.5, False, FEATURES)
+        tracker.detect_spike()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print("=" * 56)
+    print("   SPIKE DETECTION – µs PER REQUEST")
+    print("=" * 56)
+    print(f"  {'HISTORY_MAX':>12s}{'full scan':>14s}{'incremental':>14s}")
+    for size in SIZES:
+        # The scan is O(HISTORY_MAX); cap its iterations to keep runs short
+        legacy_iterations = max(5, min(args.iterations, 10**7 // size))
+        legacy = measure(size, legacy=True, iterations=legacy_iterations)
+        fast = measure(size, legacy=False, iterations=args.iterations)
+        print(f"  {size:>12,d}{legacy:>14.1f}{fast:>14.1f}")
+    print("=" * 56)
+
+
+if __name__ == "__main__":
+    main()
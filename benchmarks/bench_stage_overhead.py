@@ -0,0 +1,82 @@
+"""
+Stage-Instrumentation Overhead Benchmark.
+
+Measures what ``prediction_stage_seconds`` adds to a prediction. Timing
+``predict()`` with and without the histogram cannot resolve a few µs
+against its run-to-run noise. The overhead is therefore built up from
+its parts instead:
+
+- the stages one ``predict()`` records (counted by wrapping ``observe``);
+- the cost of one stage: two ``time.perf_counter()`` reads plus one
+  ``ml.stages.observe()``;
+- the mean ``predict()`` latency, for scale.
+
+Usage::
+
+    python -m benchmarks.bench_stage_overhead [--iterations 100000] [--explain none]
+"""
+
+import argparse
+import time
+
+import ml.outlier
+import ml.predict
+from app.schemas import HeartDiseaseInput
+from ml import stages
+from ml.predict import EXPLAIN_MODES, features_to_vector, predict
+
+SAMPLE = HeartDiseaseInput.model_config["json_schema_extra"]["example"]
+
+
+def stages_per_call(x, explain: str) -> list[str]:
+    """Stages recorded by one ``predict()`` call."""
+    recorded = []
+
+    def counting(stage: str, seconds: float) -> None:
+        recorded.append(stage)
+
+    ml.predict.observe = ml.outlier.observe = counting
+    try:
+        predict(x, explain=explain)
+    finally:
+        ml.predict.observe = ml.outlier.observe = stages.observe
+    return recorded
+
+
+def stage_cost(iterations: int) -> float:
+    """Mean µs to time and record one stage."""
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(iterations):
+        t = clock()
+        stages.observe("forest", clock() - t)
+    return (clock() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--explain", choices=EXPLAIN_MODES, default="none")
+    args = parser.parse_args()
+
+    x = features_to_vector(SAMPLE)
+    predict(x, explain=args.explain)  # Load and warm the bundle
+    recorded = stages_per_call(x, args.explain)
+    per_stage = min(stage_cost(args.iterations) for _ in range(3))
+
+    calls = max(1, args.iterations // 50)
+    start = time.perf_counter()
+    for _ in range(calls):
+        predict(x, explain=args.explain)
+    predict_us = (time.perf_counter() - start) / calls * 1e6
+
+    overhead = per_stage * len(recorded)
+    print(f"stages per predict()   {len(recorded)} ({', '.join(recorded)})")
+    print(f"cost per stage         {per_stage:8.2f} µs")
+    print(f"overhead per request   {overhead:8.2f} µs")
+    print(f"predict(explain={args.explain!r})  {predict_us:8.1f} µs  "
+          f"→ {overhead / predict_us:.2%} overhead")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,29 +17,62 @@ const TABS = [
 const Dashboard = () => {
     const [activeTab, setActiveTab] = useState('overview');
     const [stats, setStats] = useState(null);
-    const [history, setHistory] = useState([]);
+    const [timeline, setTimeline] = useState([]);
     const [spikeData, setSpikeData] = useState(null);
     const [spikeAnalysis, setSpikeAnalysis] = useState(null);
     const [performance, setPerformance] = useState(null);
     const [featureImportance, setFeatureImportance] = useState(null);
     const [loading, setLoading] = useState(true);
 
-    const fetchData = useCallback(async () => {
+    // Bucketed history and the spike explanation are fetched; everything
+    // else arrives over /analytics/stream.
+    const fetchTimeline = useCallback(async () => {
         try {
-            const [statsRes, historyRes, spikeRes, spikeAnalysisRes] = await Promise.all([
-                fetch('/analytics/stats'),
-                fetch('/analytics/history?limit=200'),
-                fetch('/analytics/spikes'),
-                fetch('/analytics/spike-analysis'),
-            ]);
-            if (statsRes.ok) setStats(await statsRes.json());
-            if (historyRes.ok) setHistory(await historyRes.json());
-            if (spikeRes.ok) setSpikeData(await spikeRes.json());
-            if (spikeAnalysisRes.ok) setSpikeAnalysis(await spikeAnalysisRes.json());
+            // Last 30 minutes, already bucketed per minute by the API
+            const since = new Date(Date.now() - 29 * 60 * 1000).toISOString();
+            const res = await fetch(`/analytics/timeseries?resolution=minute&start=${encodeURIComponent(since)}`);
+            if (res.ok) setTimeline((await res.json()).points);
         } catch (err) { console.error('Dashboard:', err); }
-        setLoading(false);
     }, []);
 
+    const fetchSpikeAnalysis = useCallback(async () => {
+        try {
+            const res = await fetch('/analytics/spike-analysis');
+            if (res.ok) setSpikeAnalysis(await res.json());
+        } catch (err) { console.error('Spike analysis:', err); }
+    }, []);
+
+    const applyUpdate = useCallback((update) => {
+        if (update.stats) setStats(prev => ({ ...prev, ...update.stats }));
+        if (update.spike) {
+            setSpikeData(update.spike);
+            if (update.spike.spike_detected) fetchSpikeAnalysis();
+        }
+        if (update.new?.count) {
+            // Add the new predictions to the current minute bucket
+            const minute = new Date(update.timestamp);
+            minute.setSeconds(0, 0);
+            setTimeline(points => {
+                const last = points[points.length - 1];
+                if (last && new Date(last.timestamp).getTime() === minute.getTime()) {
+                    return [...points.slice(0, -1), {
+                        ...last,
+                        count: last.count + update.new.count,
+                        high_risk: last.high_risk + update.new.high_risk,
+                        outliers: last.outliers + update.new.outliers,
+                    }];
+                }
+                return [...points.slice(1), {
+                    timestamp: minute.toISOString(),
+                    count: update.new.count,
+                    high_risk: update.new.high_risk,
+                    outliers: update.new.outliers,
+                    mean_probability: null,
+                }];
+            });
+        }
+    }, [fetchSpikeAnalysis]);
+
     const fetchModelData = useCallback(async () => {
         try {
             const [perfRes, fiRes] = await Promise.all([
@@ -52,11 +85,22 @@ const Dashboard = () => {
     }, []);
 
     useEffect(() => {
-        fetchData();
+        fetchTimeline();
+        fetchSpikeAnalysis();
         fetchModelData();
-        const interval = setInterval(fetchData, 5000);
-        return () => clearInterval(interval);
-    }, [fetchData, fetchModelData]);
+        // EventSource reconnects on its own; each (re)connect starts with a snapshot
+        const source = new EventSource('/analytics/stream');
+        source.addEventListener('snapshot', (e) => {
+            const snapshot = JSON.parse(e.data);
+            setStats(snapshot.stats);
+            setSpikeData(snapshot.spike);
+            setLoading(false);
+            fetchTimeline();
+        });
+        source.addEventListener('update', (e) => applyUpdate(JSON.parse(e.data)));
+        source.onerror = () => setLoading(false);
+        return () => source.close();
+    }, [fetchTimeline, fetchSpikeAnalysis, fetchModelData, applyUpdate]);
 
     if (loading) {
         return (
@@ -77,7 +121,7 @@ const Dashboard = () => {
             <motion.div className="dash-section" key="overview" initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} exit={{ opacity: 0 }} transition={{ duration: 0.4 }}>
                 <StatsCards stats={stats} />
                 <SpikeAlert spikeData={spikeData} spikeAnalysis={spikeAnalysis} />
-                <PredictionTimeline history={history} />
+                <PredictionTimeline points={timeline} />
             </motion.div>
         ),
         models: (
@@ -96,7 +140,7 @@ const Dashboard = () => {
             <motion.div className="dash-section" key="analytics" initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} exit={{ opacity: 0 }} transition={{ duration: 0.4 }}>
                 <StatsCards stats={stats} />
                 <div className="chart-row">
-                    <PredictionTimeline history={history} />
+                    <PredictionTimeline points={timeline} />
                 </div>
                 <SpikeAlert spikeData={spikeData} spikeAnalysis={spikeAnalysis} />
                 <FeatureImportance features={featureImportance} />
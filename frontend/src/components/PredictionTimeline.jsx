@@ -3,27 +3,20 @@ import {
     AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer
 } from 'recharts';
 
-const PredictionTimeline = ({ history }) => {
-    if (!history || history.length === 0) return null;
+const PredictionTimeline = ({ points }) => {
+    if (!points || !points.some(p => p.count > 0)) return null;
 
-    // Bucket predictions by minute
-    const buckets = {};
-    history.forEach(h => {
-        const date = new Date(h.timestamp);
-        const key = `${date.getHours().toString().padStart(2, '0')}:${date.getMinutes().toString().padStart(2, '0')}`;
-        if (!buckets[key]) {
-            buckets[key] = { time: key, highRisk: 0, lowRisk: 0, total: 0 };
-        }
-        if (h.prediction === 1) {
-            buckets[key].highRisk += 1;
-        } else {
-            buckets[key].lowRisk += 1;
-        }
-        buckets[key].total += 1;
+    // One point per minute bucket from /analytics/timeseries
+    const data = points.map(p => {
+        const date = new Date(p.timestamp);
+        return {
+            time: `${date.getHours().toString().padStart(2, '0')}:${date.getMinutes().toString().padStart(2, '0')}`,
+            highRisk: p.high_risk,
+            lowRisk: p.count - p.high_risk,
+            total: p.count,
+        };
     });
 
-    const data = Object.values(buckets).slice(-30); // Last 30 minutes
-
     return (
         <div className="glass-panel chart-container">
             <h3 className="chart-title">Prediction Timeline</h3>
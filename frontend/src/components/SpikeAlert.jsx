@@ -18,6 +18,9 @@ const SpikeAlert = ({ spikeData, spikeAnalysis }) => {
                         {spike_detected ? 'Spike Detected!' : 'No Spike Detected'}
                     </h3>
                     <p className="spike-message">{message}</p>
+                    {spike_detected && spikeData.triggered_by?.length > 0 && (
+                        <p className="spike-message">Triggered by: {spikeData.triggered_by.join(', ')}</p>
+                    )}
                 </div>
                 {spike_detected && (
                     <div className="spike-score">
@@ -0,0 +1,392 @@
+"""
+Memory-Mapped Model Artifacts.
+
+Stores the compiled forest, the compiled outlier detector and the scaler
+parameters as plain ``.npy`` arrays under ``models/compiled/<version>/``,
+where ``<version>`` is the content fingerprint of the pickles the store was
+compiled from. Loading
+memory-maps those files read-only, so every uvicorn worker (and every
+process-pool worker) on a pod reads the same physical pages from the OS
+page cache instead of unpickling a private copy of each estimator.
+
+Each version directory is immutable once written. Besides the arrays and
+a ``manifest.json`` it keeps its own copy of the pickled classifier, so a
+bundle that lazily loads the scikit-learn model (``sklearn`` backend, SHAP)
+gets the model it was compiled from even after ``models/model.pkl`` has
+been replaced by a retrain. A store that is missing is rebuilt from the
+pickles on first load, and ``prune_compiled()`` removes old versions.
+
+Every process holds a shared ``flock`` on a store's ``in-use.lock`` for
+as long as it maps the store, so pruning in one worker never deletes a
+store another worker is still serving from: only stores it can lock
+exclusively are removed.
+
+Usage::
+
+    from ml.artifacts import export_compiled, load_compiled, prune_compiled
+    export_compiled(model, scaler, detector)        # after training
+    store = load_compiled()                         # mmap, or None
+    prune_compiled(keep={store.version})
+    proba = store.forest.predict_proba(X_scaled)
+"""
+
+import fcntl
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Optional
+
+import joblib
+import numpy as np
+
+from ml.forest import CompiledForest, CompiledIsolationForest
+from ml.train import MODEL_DIR, MODEL_PATH, OUTLIER_DETECTOR_PATH, SCALER_PATH
+
+COMPILED_DIR = os.path.join(MODEL_DIR, "compiled")
+
+# Bump when the on-disk layout changes so old stores are rebuilt
+FORMAT_VERSION = 3
+
+# Held shared by every process mapping a store (see prune_compiled())
+IN_USE_LOCK = "in-use.lock"
+
+# Pickles a compiled store is derived from (and fingerprinted over)
+SOURCE_PATHS = (MODEL_PATH, SCALER_PATH, OUTLIER_DETECTOR_PATH)
+
+# Last store mapped by this process, reused by load_or_build() while its
+# version is current (ml.bundle.ModelBundle holds the one it loaded)
+_store = None
+
+
+class CompiledArtifacts:
+    """Read-only view of one compiled store.
+
+    Attributes:
+        version: Fingerprint of the pickles the store was built from.
+        forest: Compiled classifier.
+        detector: Compiled outlier detector, or None if none was trained.
+        scale_mean: StandardScaler ``mean_``.
+        scale_std: StandardScaler ``scale_``.
+        model_path: This version's copy of the pickled classifier.
+
+    The store's in-use lock is held until this object is collected.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        forest: CompiledForest,
+        detector: Optional[CompiledIsolationForest],
+        scale_mean: np.ndarray,
+        scale_std: np.ndarray,
+        model_path: str,
+        lock_fd: Optional[int] = None,
+    ):
+        self.version = version
+        self.forest = forest
+        self.detector = detector
+        self.scale_mean = scale_mean
+        self.scale_std = scale_std
+        self.model_path = model_path
+        if lock_fd is not None:
+            weakref.finalize(self, os.close, lock_fd)
+
+
+def read_sources(paths=SOURCE_PATHS) -> dict[str, bytes]:
+    """Read the artifact files once (missing files are skipped).
+
+    Fingerprinting and unpickling the same bytes keeps a retrain that
+    lands in between from pairing one model's version with another's
+    pickles.
+    """
+    sources = {}
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                sources[path] = f.read()
+        except FileNotFoundError:
+            continue
+    return sources
+
+
+def fingerprint(paths=SOURCE_PATHS, sources: Optional[dict[str, bytes]] = None) -> str:
+    """Content hash of the given artifact files, or of ``read_sources()`` output."""
+    sources = read_sources(paths) if sources is None else sources
+    digest = hashlib.sha256()
+    for path in paths:
+        if path in sources:
+            digest.update(sources[path])
+    return digest.hexdigest()[:12]
+
+
+def unpickle(data: bytes):
+    """Load a joblib pickle from bytes returned by ``read_sources()``."""
+    return joblib.load(io.BytesIO(data))
+
+
+def store_dir(version: str) -> str:
+    """Directory holding the compiled store for ``version``."""
+    return os.path.join(COMPILED_DIR, version)
+
+
+# ──────────────────────────────────────────────
+# Writing
+# ──────────────────────────────────────────────
+def _write_arrays(directory: str, arrays: dict[str, np.ndarray]) -> None:
+    os.makedirs(directory)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+
+def export_compiled(
+    model,
+    scaler,
+    detector=None,
+    version: Optional[str] = None,
+    directory: Optional[str] = None,
+) -> str:
+    """Compile fitted estimators and write them as a memory-mappable store.
+
+    The store is written to a temporary sibling directory and moved into
+    place in one rename, so concurrent readers never see a partial store.
+
+    Args:
+        model: Fitted binary ``RandomForestClassifier``.
+        scaler: Fitted ``StandardScaler``.
+        detector: Optional fitted ``IsolationForest``.
+        version: Source fingerprint to record; defaults to the current
+            pickles' fingerprint.
+        directory: Destination directory; defaults to ``store_dir(version)``.
+
+    Returns:
+        The directory written.
+    """
+    version = version or fingerprint()
+    directory = directory or store_dir(version)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".compiled-", dir=parent)
+    os.chmod(staging, 0o755)  # mkdtemp creates owner-only directories
+
+    try:
+        forest_arrays, forest_params = CompiledForest.from_sklearn(model).to_arrays()
+        _write_arrays(os.path.join(staging, "forest"), forest_arrays)
+        _write_arrays(os.path.join(staging, "scaler"), {
+            "mean": np.asarray(scaler.mean_, dtype=np.float64),
+            "scale": np.asarray(scaler.scale_, dtype=np.float64),
+        })
+
+        detector_params = None
+        if detector is not None:
+            detector_arrays, detector_params = (
+                CompiledIsolationForest.from_sklearn(detector).to_arrays()
+            )
+            _write_arrays(os.path.join(staging, "detector"), detector_arrays)
+        joblib.dump(model, os.path.join(staging, "model.pkl"))
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "source_version": version,
+            "forest": forest_params,
+            "detector": detector_params,
+        }
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        open(os.path.join(staging, IN_USE_LOCK), "w").close()
+
+        # Swap the new store in; readers holding maps of the old files keep
+        # them alive until they re-open.
+        if os.path.isdir(directory):
+            retired = tempfile.mkdtemp(prefix=".retired-", dir=parent)
+            os.rename(directory, os.path.join(retired, "store"))
+            os.rename(staging, directory)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.rename(staging, directory)
+    except OSError:
+        # Another worker may have won the race to write the same store.
+        shutil.rmtree(staging, ignore_errors=True)
+        if _read_manifest(directory, version) is None:
+            raise
+    return directory
+
+
+# ──────────────────────────────────────────────
+# Loading
+# ──────────────────────────────────────────────
+def _read_manifest(directory: str, version: str) -> Optional[dict]:
+    """Return the manifest if the store exists and matches ``version``."""
+    try:
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != FORMAT_VERSION or manifest.get("source_version") != version:
+        return None
+    return manifest
+
+
+def _lock_in_use(directory: str) -> Optional[int]:
+    """Take a shared lock on the store's in-use file, or None if the store is gone.
+
+    Retries if the store was replaced while waiting, so the lock is always
+    on the store now at ``directory``.
+    """
+    path = os.path.join(directory, IN_USE_LOCK)
+    while True:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        try:
+            current = os.stat(path).st_ino
+        except FileNotFoundError:
+            current = None
+        if current == os.fstat(fd).st_ino:
+            return fd
+        os.close(fd)
+        if current is None:
+            return None
+
+
+def _map_arrays(directory: str, cls) -> dict[str, np.ndarray]:
+    return {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        for name in cls._array_fields()
+    }
+
+
+def load_compiled(
+    version: Optional[str] = None,
+    directory: Optional[str] = None,
+) -> Optional[CompiledArtifacts]:
+    """Memory-map a compiled store.
+
+    Args:
+        version: Expected source fingerprint; defaults to the current
+            pickles' fingerprint.
+        directory: Store directory; defaults to ``store_dir(version)``.
+
+    Returns:
+        The mapped artifacts, or None if the store is missing or stale.
+    """
+    version = version or fingerprint()
+    directory = directory or store_dir(version)
+    lock_fd = _lock_in_use(directory)  # Before reading, so a prune cannot interleave
+    manifest = _read_manifest(directory, version)
+    if lock_fd is None or manifest is None:
+        if lock_fd is not None:
+            os.close(lock_fd)
+        return None
+
+    try:
+        forest = CompiledForest.from_arrays(
+            _map_arrays(os.path.join(directory, "forest"), CompiledForest),
+            manifest["forest"],
+        )
+        detector = None
+        if manifest["detector"] is not None:
+            detector = CompiledIsolationForest.from_arrays(
+                _map_arrays(os.path.join(directory, "detector"), CompiledIsolationForest),
+                manifest["detector"],
+            )
+        scaler_dir = os.path.join(directory, "scaler")
+        scale_mean = np.load(os.path.join(scaler_dir, "mean.npy"), mmap_mode="r")
+        scale_std = np.load(os.path.join(scaler_dir, "scale.npy"), mmap_mode="r")
+    except (OSError, KeyError, ValueError):
+        os.close(lock_fd)
+        return None  # Partially deleted or corrupt – caller rebuilds
+
+    return CompiledArtifacts(
+        version, forest, detector, scale_mean, scale_std,
+        model_path=os.path.join(directory, "model.pkl"),
+        lock_fd=lock_fd,
+    )
+
+
+def load_or_build(
+    version: Optional[str] = None, sources: Optional[dict[str, bytes]] = None,
+) -> Optional[CompiledArtifacts]:
+    """Map the compiled store, rebuilding it from the pickles if needed.
+
+    Args:
+        version: Source fingerprint; defaults to that of ``sources``.
+        sources: ``read_sources()`` output to build from; read now if
+            not given.
+
+    Returns:
+        The mapped artifacts, or None if the model cannot be compiled or
+        the store cannot be written (callers fall back to the pickles).
+        A store built here is versioned by the pickles it was built from.
+    """
+    global _store
+    if version is None:
+        sources = read_sources() if sources is None else sources
+        version = fingerprint(sources=sources)
+    if _store is not None and _store.version == version:
+        return _store
+
+    store = load_compiled(version)
+    if store is not None:
+        _store = store
+        return store
+
+    sources = read_sources() if sources is None else sources
+    if MODEL_PATH not in sources:
+        return None
+    version = fingerprint(sources=sources)  # What is actually compiled below
+    try:
+        model = unpickle(sources[MODEL_PATH])
+        scaler = unpickle(sources[SCALER_PATH])
+        detector = (
+            unpickle(sources[OUTLIER_DETECTOR_PATH])
+            if OUTLIER_DETECTOR_PATH in sources else None
+        )
+        export_compiled(model, scaler, detector, version=version)
+    except (AttributeError, ValueError, OSError, KeyError):
+        return None  # Not a compilable forest, read-only model dir or no scaler
+    _store = load_compiled(version)
+    return _store
+
+
+def prune_compiled(keep, directory: Optional[str] = None) -> list[str]:
+    """Delete compiled stores for every version not in ``keep`` and not in use.
+
+    A store some process (this or another worker) still maps holds a
+    shared in-use lock and is skipped; a later prune removes it.
+
+    Args:
+        keep: Versions to keep regardless.
+        directory: Parent of the stores; defaults to ``COMPILED_DIR``.
+
+    Returns:
+        The versions removed.
+    """
+    directory = directory or COMPILED_DIR
+    if not os.path.isdir(directory):
+        return []
+    removed = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name in keep or name.startswith(".") or not os.path.isdir(path):
+            continue
+        try:
+            fd = os.open(os.path.join(path, IN_USE_LOCK), os.O_RDONLY)
+        except FileNotFoundError:
+            fd = None  # Older format: nobody can be mapping it
+        try:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(name)
+        except BlockingIOError:
+            continue  # Still served by a worker
+        finally:
+            if fd is not None:
+                os.close(fd)
+    return removed
@@ -0,0 +1,207 @@
+"""
+Versioned Model Bundles.
+
+A :class:`ModelBundle` holds everything one model version needs to serve
+requests: the compiled forest and scaler arrays, the outlier detector, the
+training feature importance and – loaded only on demand – the pickled
+scikit-learn model and its SHAP explainer. Its ``version`` is the content
+fingerprint of the artifacts it was loaded from.
+
+Inference code takes a reference to the current bundle once per call and
+uses only that reference, so ``activate()`` can swap in a freshly loaded
+and warmed bundle at any time: calls already running finish on the old
+bundle, new calls see the new one.
+
+Usage::
+
+    from ml.bundle import ModelBundle, activate, current_bundle
+    bundle = ModelBundle.load()        # load + compile, not yet serving
+    previous = activate(bundle)        # atomic swap
+    proba = current_bundle().predict_proba(X_scaled, "compiled")
+"""
+
+import json
+import os
+import threading
+from typing import Optional
+
+import joblib
+import numpy as np
+
+from ml.artifacts import fingerprint, load_or_build, read_sources, unpickle
+from ml.forest import CompiledForest
+from ml.train import METADATA_PATH, MODEL_PATH, OUTLIER_DETECTOR_PATH, SCALER_PATH
+
+
+class ModelBundle:
+    """One immutable model version plus its lazily built companions."""
+
+    def __init__(
+        self,
+        version: str,
+        forest: Optional[CompiledForest],
+        classes: np.ndarray,
+        scale_mean,
+        scale_std,
+        detector=None,
+        feature_importance: Optional[dict] = None,
+        model=None,
+        model_path: str = MODEL_PATH,
+        store=None,
+    ):
+        self.version = version
+        self.forest = forest
+        self.classes = classes
+        self.scale_mean = scale_mean
+        self.scale_std = scale_std
+        # CompiledIsolationForest or IsolationForest – both expose
+        # decision_function(X) on raw feature arrays.
+        self.detector = detector
+        self.feature_importance = feature_importance or {}
+
+        self._model = model
+        self._model_path = model_path
+        # The mapped CompiledArtifacts: holding it keeps the store's in-use
+        # lock, so no worker prunes it while this bundle serves
+        self._store = store
+        self._shap_explainer = None
+        self._explainer_built = False
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls) -> "ModelBundle":
+        """Load the artifacts currently in ``models/`` into a new bundle.
+
+        The compiled store is memory-mapped (and built first if missing);
+        without one, private in-process copies are unpickled instead.
+
+        Raises:
+            FileNotFoundError: If no trained model exists.
+        """
+        # Version and contents both come from the same read of the pickles
+        sources = read_sources()
+        if MODEL_PATH not in sources:
+            raise FileNotFoundError(
+                f"Model not found at {MODEL_PATH}. Run `python -m ml.train` first."
+            )
+
+        feature_importance = {}
+        if os.path.exists(METADATA_PATH):
+            with open(METADATA_PATH, "r") as f:
+                feature_importance = json.load(f).get("feature_importance", {})
+
+        version = fingerprint(sources=sources)
+        store = load_or_build(version, sources)
+        if store is not None:
+            return cls(
+                version=store.version,
+                forest=store.forest,
+                classes=store.forest.classes,
+                scale_mean=store.scale_mean,
+                scale_std=store.scale_std,
+                detector=store.detector,
+                feature_importance=feature_importance,
+                model_path=store.model_path,
+                store=store,
+            )
+
+        # No compiled store – fall back to private in-process copies
+        model = unpickle(sources[MODEL_PATH])
+        scaler = unpickle(sources[SCALER_PATH])
+        try:
+            forest = CompiledForest.from_sklearn(model)
+        except (AttributeError, ValueError):
+            forest = None  # Not a compilable forest – use scikit-learn
+        # StandardScaler.transform() is (X - mean_) / scale_; keep the arrays
+        # so scaling needs neither a DataFrame nor scikit-learn's validation.
+        return cls(
+            version=version,
+            forest=forest,
+            classes=np.asarray(model.classes_),
+            scale_mean=scaler.mean_ if scaler.mean_ is not None else 0.0,
+            scale_std=scaler.scale_ if scaler.scale_ is not None else 1.0,
+            detector=_load_pickled_detector(sources),
+            feature_importance=feature_importance,
+            model=model,
+        )
+
+    @property
+    def model(self):
+        """The pickled scikit-learn classifier, unpickled on first use."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = joblib.load(self._model_path)
+        return self._model
+
+    def shap_explainer(self):
+        """Return this bundle's SHAP TreeExplainer, or None if unavailable."""
+        if not self._explainer_built:
+            with self._lock:
+                if not self._explainer_built:
+                    try:
+                        import shap
+                        self._shap_explainer = shap.TreeExplainer(self.model)
+                    except Exception:
+                        self._shap_explainer = None
+                    self._explainer_built = True
+        return self._shap_explainer
+
+    def scale(self, X: np.ndarray) -> np.ndarray:
+        """Apply the fitted StandardScaler to a raw feature matrix."""
+        return (X - self.scale_mean) / self.scale_std
+
+    def predict_proba(self, X_scaled: np.ndarray, backend: str) -> np.ndarray:
+        """Class probabilities from ``backend`` (``"compiled"`` or ``"sklearn"``)."""
+        if backend == "compiled" and self.forest is not None:
+            return self.forest.predict_proba(X_scaled)
+        return self.model.predict_proba(X_scaled)
+
+
+def _load_pickled_detector(sources: dict[str, bytes]):
+    """Unpickle the outlier detector, or return None if it was never trained."""
+    if OUTLIER_DETECTOR_PATH not in sources:
+        return None  # Gracefully degrade if not trained
+    detector = unpickle(sources[OUTLIER_DETECTOR_PATH])
+    # Inputs always arrive as arrays in FEATURE_NAMES order, so the
+    # column-name check scikit-learn performs for DataFrame-fitted
+    # estimators is redundant; dropping it lets us skip the DataFrame.
+    if hasattr(detector, "feature_names_in_"):
+        del detector.feature_names_in_
+    return detector
+
+
+# ──────────────────────────────────────────────
+# Active bundle
+# ──────────────────────────────────────────────
+_current: Optional[ModelBundle] = None
+_load_lock = threading.Lock()
+
+
+def current_bundle() -> ModelBundle:
+    """Return the bundle serving requests, loading one on first use.
+
+    Raises:
+        FileNotFoundError: If no trained model exists.
+    """
+    bundle = _current
+    if bundle is not None:
+        return bundle
+    with _load_lock:
+        if _current is None:
+            activate(ModelBundle.load())
+        return _current
+
+
+def activate(bundle: ModelBundle) -> Optional[ModelBundle]:
+    """Make ``bundle`` the one serving new requests.
+
+    A single reference assignment, so callers holding the previous bundle
+    keep using it undisturbed.
+
+    Returns:
+        The previously active bundle, if any.
+    """
+    global _current
+    previous, _current = _current, bundle
+    return previous
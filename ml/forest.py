@@ -0,0 +1,303 @@
+"""
+Compiled Tree-Ensemble Inference Engine.
+
+Flattens a fitted scikit-learn ``RandomForestClassifier`` into a handful of
+contiguous NumPy arrays (feature, threshold, left, right, leaf value) and
+evaluates it by walking every tree of every row in lock-step, one tree level
+per step. This skips scikit-learn's input validation, joblib dispatch and
+per-estimator Python overhead, which dominate the cost of scoring one row.
+
+The per-node class-1 probabilities kept for every node (not just leaves)
+also give a cheap explanation: attributing each step's change in node value
+to the split feature (Saabas path attribution) yields per-feature
+contributions that sum, together with the bias, to the predicted
+probability.
+
+``IsolationForest`` detectors compile the same way: each node stores the
+path length a row ending there contributes, so the anomaly score is one
+traversal plus a sum.
+
+Compiled ensembles are plain arrays, so ``to_arrays()`` / ``from_arrays()``
+let ``ml.artifacts`` store them as ``.npy`` files that worker processes
+memory-map instead of unpickling private copies.
+
+Usage::
+
+    from ml.forest import CompiledForest, CompiledIsolationForest
+    forest = CompiledForest.from_sklearn(model)
+    proba = forest.predict_proba(X_scaled)
+    contributions = forest.contributions(X_scaled)
+    scores = CompiledIsolationForest.from_sklearn(detector).decision_function(X)
+"""
+
+import numpy as np
+from sklearn.ensemble._iforest import _average_path_length
+from sklearn.tree._tree import TREE_LEAF
+
+# Node-table arrays shared by every compiled ensemble
+_TABLE_FIELDS = ("feature", "threshold", "left", "right", "value", "roots")
+
+
+def _flatten(trees, node_values, feature_maps=None) -> dict:
+    """Concatenate fitted trees into one node table.
+
+    Args:
+        trees: Fitted ``sklearn.tree._tree.Tree`` objects.
+        node_values: Per-tree arrays holding each node's value.
+        feature_maps: Optional per-tree arrays mapping the tree's feature
+            indices to columns of the full input matrix.
+
+    Returns:
+        Keyword arguments for a :class:`_TreeTable` subclass.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for i, tree in enumerate(trees):
+        n = tree.node_count
+        nodes = np.arange(n, dtype=np.int32)
+        is_leaf = tree.children_left == TREE_LEAF
+
+        feature = np.where(is_leaf, 0, tree.feature)
+        if feature_maps is not None:
+            feature = np.asarray(feature_maps[i])[feature]
+
+        features.append(feature.astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, nodes, tree.children_left).astype(np.int32) + offset)
+        rights.append(np.where(is_leaf, nodes, tree.children_right).astype(np.int32) + offset)
+        values.append(np.asarray(node_values[i], dtype=np.float64))
+        roots.append(offset)
+
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": max_depth,
+    }
+
+
+class _TreeTable:
+    """Array-backed node table for a fitted tree ensemble.
+
+    All trees are concatenated into one node table. Leaves point back at
+    themselves with a ``+inf`` threshold, so a fixed number of traversal
+    steps (the deepest tree's depth) lands every row on its leaf.
+    """
+
+    # Scalar attributes serialised alongside the node table
+    _params: tuple[str, ...] = ("max_depth",)
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Return the leaf index reached in every tree for every row.
+
+        Args:
+            X: ``(n_rows, n_features)`` input matrix.
+
+        Returns:
+            ``(n_rows, n_trees)`` array of node indices.
+        """
+        # Trees were grown on float32 inputs; compare in the same precision.
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def to_arrays(self) -> tuple[dict[str, np.ndarray], dict]:
+        """Split the ensemble into named arrays and JSON-serialisable params."""
+        arrays = {name: getattr(self, name) for name in self._array_fields()}
+        params = {name: _to_json(getattr(self, name)) for name in self._params}
+        return arrays, params
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray], params: dict):
+        """Rebuild an ensemble from ``to_arrays()`` output.
+
+        Arrays are used as given, so memory-mapped inputs stay shared.
+        """
+        return cls(**{name: arrays[name] for name in cls._array_fields()}, **params)
+
+    @classmethod
+    def _array_fields(cls) -> tuple[str, ...]:
+        return _TABLE_FIELDS
+
+
+def _to_json(value):
+    """Convert NumPy scalars to plain Python for the artifact manifest."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class CompiledForest(_TreeTable):
+    """Array-backed evaluator for a fitted binary tree-ensemble classifier.
+
+    Node values hold the class-1 probability at every node.
+    """
+
+    def __init__(self, classes: np.ndarray, **table):
+        super().__init__(**table)
+        self.classes = classes
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Compile a fitted binary ``RandomForestClassifier``.
+
+        Args:
+            model: Fitted forest whose ``estimators_`` expose ``tree_``.
+
+        Returns:
+            A :class:`CompiledForest` producing the same probabilities.
+        """
+        if len(model.classes_) != 2:
+            raise ValueError("Only binary classifiers can be compiled.")
+
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        # Class-1 probability at every node (normalised class weights)
+        probas = [
+            tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1) for tree in trees
+        ]
+        return cls(classes=np.asarray(model.classes_), **_flatten(trees, probas))
+
+    @classmethod
+    def _array_fields(cls) -> tuple[str, ...]:
+        return _TABLE_FIELDS + ("classes",)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Return ``(n_rows, 2)`` class probabilities, as scikit-learn does.
+
+        Args:
+            X: ``(n_rows, n_features)`` matrix, already scaled.
+        """
+        p1 = self.value[self.apply(X)].mean(axis=1)
+        return np.column_stack((1.0 - p1, p1))
+
+    @property
+    def bias(self) -> float:
+        """Mean root value: the prediction before any split is applied."""
+        return float(self.value[self.roots].mean())
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """Approximate per-feature contributions by path attribution.
+
+        Args:
+            X: ``(n_rows, n_features)`` matrix, already scaled.
+
+        Returns:
+            ``(n_rows, n_features)`` array; each row sums to
+            ``predict_proba(X)[:, 1] - bias``.
+        """
+        X32 = np.asarray(X, dtype=np.float32)
+        n_rows, n_features = X32.shape
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+
+        totals = np.zeros(n_rows * n_features)
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            go_left = X32[rows, feature] <= self.threshold[nodes]
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            # Leaves loop back to themselves, so their delta is zero.
+            delta = self.value[children] - self.value[nodes]
+            totals += np.bincount(
+                (rows * n_features + feature).ravel(),
+                weights=delta.ravel(),
+                minlength=n_rows * n_features,
+            )
+            nodes = children
+
+        return totals.reshape(n_rows, n_features) / self.n_trees
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Return the predicted class label for every row."""
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class CompiledIsolationForest(_TreeTable):
+    """Array-backed evaluator for a fitted ``IsolationForest``.
+
+    Node values hold the path length credited to a row that ends at that
+    node: its depth plus the expected depth of the unbuilt subtree below.
+    """
+
+    _params = _TreeTable._params + ("denominator", "offset")
+
+    def __init__(self, denominator: float, offset: float, **table):
+        super().__init__(**table)
+        self.denominator = denominator
+        self.offset = offset
+
+    @classmethod
+    def from_sklearn(cls, detector) -> "CompiledIsolationForest":
+        """Compile a fitted ``IsolationForest``.
+
+        Args:
+            detector: Fitted detector exposing ``estimators_`` and the
+                per-tree path-length tables scikit-learn precomputes.
+
+        Returns:
+            A :class:`CompiledIsolationForest` producing the same
+            ``decision_function``.
+        """
+        trees = [estimator.tree_ for estimator in detector.estimators_]
+        path_lengths = [
+            np.asarray(decision) + np.asarray(average) - 1.0
+            for decision, average in zip(
+                detector._decision_path_lengths, detector._average_path_length_per_tree
+            )
+        ]
+        # scikit-learn only indexes columns when trees saw a feature subset
+        feature_maps = None
+        if detector._max_features != detector.n_features_in_:
+            feature_maps = detector.estimators_features_
+
+        denominator = len(trees) * _average_path_length([detector._max_samples])[0]
+        return cls(
+            denominator=float(denominator),
+            offset=float(detector.offset_),
+            **_flatten(trees, path_lengths, feature_maps),
+        )
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        """Return scikit-learn's ``score_samples``: lower is more abnormal.
+
+        Args:
+            X: ``(n_rows, n_features)`` raw feature matrix.
+        """
+        depths = self.value[self.apply(X)].sum(axis=1)
+        if self.denominator == 0:
+            return -np.ones(len(depths))  # Single training sample
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Return the anomaly score; negative values are outliers."""
+        return self.score_samples(X) - self.offset
@@ -3,26 +3,28 @@ Outlier Detection Module.
 
 Uses IsolationForest to detect anomalous clinical inputs. The detector
 is trained during ``ml.train`` and saved alongside the model artifacts.
+At inference time the detector comes from the active model bundle (see
+``ml.bundle``): the compiled, memory-mapped copy when one is available,
+the pickled detector otherwise.
 
 Usage::
 
-    from ml.outlier import detect_outlier, is_detector_loaded
+    from ml.outlier import detect_outlier, detect_outliers, is_detector_loaded
     result = detect_outlier({"age": 52, "sex": 1, ...})
+    is_outlier, scores = detect_outliers(X)
 """
 
-import os
+import time
 
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 
-from ml.train import FEATURE_NAMES, MODEL_DIR
-
-OUTLIER_DETECTOR_PATH = os.path.join(MODEL_DIR, "outlier_detector.pkl")
-
-# Module-level cache
-_detector = None
+from ml.bundle import ModelBundle, current_bundle
+from ml.predict import features_to_vector
+from ml.stages import observe
+from ml.train import OUTLIER_DETECTOR_PATH
 
 
 def train_outlier_detector(X: pd.DataFrame) -> IsolationForest:
@@ -47,43 +49,51 @@ def train_outlier_detector(X: pd.DataFrame) -> IsolationForest:
     return detector
 
 
-def _load_detector() -> None:
-    """Lazy-load the outlier detector."""
-    global _detector
-    if _detector is not None:
-        return
-    if not os.path.exists(OUTLIER_DETECTOR_PATH):
-        return  # Gracefully degrade if not trained
-    _detector = joblib.load(OUTLIER_DETECTOR_PATH)
-
-
-def detect_outlier(features: dict) -> dict:
+def detect_outlier(features) -> dict:
     """Check whether a single observation is an outlier.
 
     Args:
-        features: Dictionary with keys matching ``FEATURE_NAMES``.
+        features: Dictionary with keys matching ``FEATURE_NAMES``, or a
+            vector from ``ml.predict.features_to_vector()``.
 
     Returns:
         ``{"is_outlier": bool, "anomaly_score": float}``
     """
-    _load_detector()
-    if _detector is None:
-        return {"is_outlier": False, "anomaly_score": 0.0}
-
-    df = pd.DataFrame([features])[FEATURE_NAMES]
-    score = float(_detector.decision_function(df)[0])
-    is_outlier = bool(_detector.predict(df)[0] == -1)
-
+    is_outlier, scores = detect_outliers(features_to_vector(features))
     return {
-        "is_outlier": is_outlier,
-        "anomaly_score": round(score, 4),
+        "is_outlier": bool(is_outlier[0]),
+        "anomaly_score": round(float(scores[0]), 4),
     }
 
 
+def detect_outliers(
+    X: np.ndarray, bundle: ModelBundle | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Score a batch of observations in a single IsolationForest pass.
+
+    Args:
+        X: Raw feature matrix with columns in ``FEATURE_NAMES`` order.
+        bundle: Model bundle whose detector to use; defaults to the
+            active one.
+
+    Returns:
+        Tuple of (``is_outlier`` bool array, ``anomaly_score`` float array).
+    """
+    detector = (bundle or current_bundle()).detector
+    if detector is None:
+        return np.zeros(len(X), dtype=bool), np.zeros(len(X))
+
+    start = time.perf_counter()
+    scores = detector.decision_function(X)
+    observe("outlier", time.perf_counter() - start)
+    # IsolationForest.predict() labels a sample -1 exactly when its
+    # decision_function is negative, so one pass yields both outputs.
+    return scores < 0, scores
+
+
 def is_detector_loaded() -> bool:
     """Check if the outlier detector can be loaded."""
     try:
-        _load_detector()
-        return _detector is not None
+        return current_bundle().detector is not None
     except Exception:
         return False
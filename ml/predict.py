@@ -1,130 +1,352 @@
 """
 Heart Disease Prediction – Prediction Utility.
 
-Provides a reusable ``predict()`` function that loads the serialised model
-and scaler once and returns predictions with outlier detection and SHAP
-feature contributions.
+Provides reusable ``predict()`` and ``predict_batch()`` functions that
+score against the active model bundle (see ``ml.bundle``) and return
+predictions with outlier detection and feature contributions. Each call
+takes the bundle reference once, so a hot reload never mixes two model
+versions within one result.
+
+The compiled forest and scaler are memory-mapped from ``models/compiled/``
+(see ``ml.artifacts``) so uvicorn workers share one copy through the page
+cache. The pickled scikit-learn model is only unpickled when something
+needs it: the ``sklearn`` backend, ``"full"`` SHAP explanations, or a
+model that cannot be compiled.
+
+Feature contributions are computed according to an explanation mode:
+
+- ``"none"`` – skip explanation entirely.
+- ``"fast"`` – path attribution over the compiled forest's precomputed
+  node values (see ``ml.forest``); sums exactly to the prediction.
+- ``"full"`` – exact SHAP values from ``shap.TreeExplainer``.
+
+Each stage's time is recorded in ``prediction_stage_seconds`` (see
+``ml.stages``).
 
 Usage::
 
-    from ml.predict import predict
+    from ml.predict import features_to_vector, predict, predict_batch
     result = predict({"age": 52, "sex": 1, ...})
+    result = predict(features_to_vector(features))   # pre-built vector
+    results = predict_batch([{"age": 52, ...}, {"age": 61, ...}], explain="none")
 """
 
-import json
-import os
+import time
 
-import joblib
 import numpy as np
-import pandas as pd
 
-from ml.train import FEATURE_NAMES, MODEL_PATH, SCALER_PATH, METADATA_PATH
+from ml.bundle import ModelBundle, current_bundle
+from ml.stages import observe
+from ml.train import FEATURE_NAMES
+
+# Forest evaluators selectable via ``set_backend()``
+BACKENDS = ("sklearn", "compiled")
+
+# Feature-contribution modes accepted by ``predict()`` / ``predict_batch()``
+EXPLAIN_MODES = ("none", "fast", "full")
+
+_backend = "compiled"
+
 
-# ──────────────────────────────────────────────
-# Module-level cache (loaded once per process)
-# ──────────────────────────────────────────────
-_model = None
-_scaler = None
-_shap_explainer = None
-_feature_importance = None
+def features_to_vector(features) -> np.ndarray:
+    """Build the canonical ``(1, n_features)`` float64 vector for one row.
 
+    Args:
+        features: Mapping with keys matching ``FEATURE_NAMES``, or a vector
+            already in ``FEATURE_NAMES`` order (returned as-is when it is
+            a float64 array).
 
-def _load_artifacts() -> None:
-    """Lazy-load model and scaler into module-level cache."""
-    global _model, _scaler, _feature_importance
+    Returns:
+        Feature vector shared by scaling, classification, outlier
+        detection and SHAP.
+    """
+    if isinstance(features, np.ndarray):
+        return features.reshape(1, -1).astype(np.float64, copy=False)
+    return np.array([[features[name] for name in FEATURE_NAMES]], dtype=np.float64)
 
-    if _model is not None:
-        return
 
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(
-            f"Model not found at {MODEL_PATH}. Run `python -m ml.train` first."
-        )
+def set_backend(name: str) -> None:
+    """Select the forest evaluator: ``"compiled"`` (default) or ``"sklearn"``."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r}; expected one of {BACKENDS}")
+    _backend = name
 
-    _model = joblib.load(MODEL_PATH)
-    _scaler = joblib.load(SCALER_PATH)
 
-    # Load feature importance from training metadata
-    if os.path.exists(METADATA_PATH):
-        with open(METADATA_PATH, "r") as f:
-            metadata = json.load(f)
-        _feature_importance = metadata.get("feature_importance", {})
+def _class1_shap_values(shap_values) -> np.ndarray:
+    """Normalise SHAP output to an ``(n_rows, n_features)`` array for class 1.
 
+    Depending on the SHAP version, binary classifiers return either a list
+    of two per-class arrays or a single ``(n_rows, n_features, 2)`` array.
+    """
+    if isinstance(shap_values, list):
+        return np.asarray(shap_values[1])  # class 1 (disease)
+    values = np.asarray(shap_values)
+    if values.ndim == 3:
+        return values[:, :, 1]
+    return values
 
-def _get_shap_explainer():
-    """Lazy-load SHAP TreeExplainer."""
-    global _shap_explainer
-    if _shap_explainer is not None:
-        return _shap_explainer
 
-    _load_artifacts()
+def _contributions(
+    bundle: ModelBundle, X_scaled: np.ndarray, explain: str,
+) -> np.ndarray | None:
+    """Return ``(n_rows, n_features)`` contributions, or None if unavailable."""
+    if explain not in EXPLAIN_MODES:
+        raise ValueError(f"Unknown explain mode {explain!r}; expected one of {EXPLAIN_MODES}")
+    if explain == "none":
+        return None
+    start = time.perf_counter()
     try:
-        import shap
-        _shap_explainer = shap.TreeExplainer(_model)
+        if explain == "fast":
+            if bundle.forest is None:
+                return None
+            return bundle.forest.contributions(X_scaled)
+        explainer = bundle.shap_explainer()
+        if explainer is not None:
+            return _class1_shap_values(explainer.shap_values(X_scaled))
     except Exception:
-        _shap_explainer = None
-    return _shap_explainer
+        pass  # Graceful degradation
+    finally:
+        observe("explain", time.perf_counter() - start)
+    return None
+
+
+def _contribution_dict(values: np.ndarray | None) -> dict:
+    """Map one row of contributions to rounded per-feature values."""
+    if values is None:
+        return {}
+    return {name: round(float(val), 4) for name, val in zip(FEATURE_NAMES, values)}
 
 
-def predict(features: dict) -> dict:
+def _rows_to_matrix(rows) -> tuple[np.ndarray, list[int], dict[int, str]]:
+    """Validate raw rows and stack the valid ones into a feature matrix.
+
+    Args:
+        rows: List of feature dicts or a 2-D array with columns in
+            ``FEATURE_NAMES`` order.
+
+    Returns:
+        Tuple of (matrix of valid rows, their input indices, per-row errors).
+    """
+    errors: dict[int, str] = {}
+
+    if isinstance(rows, np.ndarray):
+        if rows.ndim != 2 or rows.shape[1] != len(FEATURE_NAMES):
+            raise ValueError(
+                f"Expected an array of shape (n, {len(FEATURE_NAMES)}), got {rows.shape}"
+            )
+        X = rows.astype(np.float64)
+        finite = np.isfinite(X).all(axis=1)
+        for i in np.flatnonzero(~finite):
+            errors[int(i)] = "Non-finite feature value"
+        valid = [int(i) for i in np.flatnonzero(finite)]
+        return X[finite], valid, errors
+
+    valid: list[int] = []
+    values: list[list[float]] = []
+    for i, row in enumerate(rows):
+        try:
+            vector = [float(row[name]) for name in FEATURE_NAMES]
+        except KeyError as exc:
+            errors[i] = f"Missing feature: {exc.args[0]}"
+            continue
+        except (TypeError, ValueError):
+            errors[i] = "Feature values must be numeric"
+            continue
+        if not all(np.isfinite(vector)):
+            errors[i] = "Non-finite feature value"
+            continue
+        valid.append(i)
+        values.append(vector)
+
+    X = np.array(values, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    return X, valid, errors
+
+
+def predict(features, explain: str = "full", bundle: ModelBundle | None = None) -> dict:
     """Return prediction, probability, outlier info, and feature contributions.
 
     Args:
-        features: Dictionary with keys matching ``FEATURE_NAMES``.
+        features: Dictionary with keys matching ``FEATURE_NAMES``, or a
+            vector from ``features_to_vector()``.
+        explain: One of ``EXPLAIN_MODES``.
+        bundle: Model bundle to score against; defaults to the active one.
 
     Returns:
-        Dict with prediction, probability, outlier status, and
-        feature contributions.
+        Dict with prediction, probability, outlier status, feature
+        contributions and the model version that produced them.
     """
-    _load_artifacts()
+    bundle = bundle or current_bundle()
 
-    df = pd.DataFrame([features])[FEATURE_NAMES]
-    X_scaled = _scaler.transform(df)
+    start = time.perf_counter()
+    x = features_to_vector(features)
+    scaling = time.perf_counter()
+    X_scaled = bundle.scale(x)
 
-    prediction = int(_model.predict(X_scaled)[0])
-    probability = float(_model.predict_proba(X_scaled)[0][1])
+    # One forest pass – predict() is just argmax over predict_proba()
+    forest = time.perf_counter()
+    proba = bundle.predict_proba(X_scaled, _backend)[0]
+    prediction = int(bundle.classes[np.argmax(proba)])
+    probability = float(proba[1])
+    end = time.perf_counter()
+    observe("validation", scaling - start)
+    observe("scaling", forest - scaling)
+    observe("forest", end - forest)
 
     # ── Outlier detection ─────────────────────
-    from ml.outlier import detect_outlier
-    outlier_result = detect_outlier(features)
+    from ml.outlier import detect_outliers
+    is_outlier, anomaly_scores = detect_outliers(x, bundle)
 
-    # ── SHAP feature contributions ────────────
-    feature_contributions = {}
-    try:
-        explainer = _get_shap_explainer()
-        if explainer is not None:
-            shap_values = explainer.shap_values(X_scaled)
-            # For binary classification, shap_values may be a list of 2 arrays
-            if isinstance(shap_values, list):
-                values = shap_values[1][0]  # class 1 (disease)
-            else:
-                values = shap_values[0]
-            feature_contributions = {
-                name: round(float(val), 4)
-                for name, val in zip(FEATURE_NAMES, values)
-            }
-    except Exception:
-        pass  # Graceful degradation
+    # ── Feature contributions ─────────────────
+    contributions = _contributions(bundle, X_scaled, explain)
 
     return {
         "prediction": prediction,
         "probability": round(probability, 4),
-        "is_outlier": outlier_result["is_outlier"],
-        "anomaly_score": outlier_result["anomaly_score"],
-        "feature_contributions": feature_contributions,
+        "is_outlier": bool(is_outlier[0]),
+        "anomaly_score": round(float(anomaly_scores[0]), 4),
+        "feature_contributions": _contribution_dict(
+            contributions[0] if contributions is not None else None
+        ),
+        "model_version": bundle.version,
     }
 
 
+def explain_prediction(features, mode: str = "full", bundle: ModelBundle | None = None) -> dict:
+    """Return only the feature contributions for one observation.
+
+    Args:
+        features: Dictionary with keys matching ``FEATURE_NAMES``, or a
+            vector from ``features_to_vector()``.
+        mode: One of ``EXPLAIN_MODES``.
+        bundle: Model bundle to explain; defaults to the active one.
+    """
+    bundle = bundle or current_bundle()
+    contributions = _contributions(bundle, bundle.scale(features_to_vector(features)), mode)
+    return _contribution_dict(contributions[0] if contributions is not None else None)
+
+
+def predict_batch(
+    rows, explain: str = "full", bundle: ModelBundle | None = None,
+) -> list[dict]:
+    """Vectorised ``predict()`` for many rows at once.
+
+    Rows are validated individually; the valid ones are scaled, classified,
+    outlier-scored and explained in a single pass each.
+
+    Args:
+        rows: List of feature dicts or a 2-D array with columns in
+            ``FEATURE_NAMES`` order.
+        explain: One of ``EXPLAIN_MODES``.
+        bundle: Model bundle to score against; defaults to the active one.
+
+    Returns:
+        One dict per input row, in input order. Valid rows carry the same
+        keys as ``predict()``; invalid rows carry only an ``error`` message.
+    """
+    bundle = bundle or current_bundle()
+
+    start = time.perf_counter()
+    X, valid, errors = _rows_to_matrix(rows)
+    results: list[dict] = [None] * (len(valid) + len(errors))
+    for i, message in errors.items():
+        results[i] = {"error": message}
+    scaling = time.perf_counter()
+    observe("validation", scaling - start)
+    if not valid:
+        return results
+
+    X_scaled = bundle.scale(X)
+
+    # One forest pass – predict() is just argmax over predict_proba()
+    forest = time.perf_counter()
+    proba = bundle.predict_proba(X_scaled, _backend)
+    predictions = bundle.classes.take(np.argmax(proba, axis=1))
+    end = time.perf_counter()
+    observe("scaling", forest - scaling)
+    observe("forest", end - forest)
+
+    # ── Outlier detection ─────────────────────
+    from ml.outlier import detect_outliers
+    is_outlier, anomaly_scores = detect_outliers(X, bundle)
+
+    # ── Feature contributions ─────────────────
+    contributions = _contributions(bundle, X_scaled, explain)
+
+    for j, i in enumerate(valid):
+        results[i] = {
+            "prediction": int(predictions[j]),
+            "probability": round(float(proba[j][1]), 4),
+            "is_outlier": bool(is_outlier[j]),
+            "anomaly_score": round(float(anomaly_scores[j]), 4),
+            "feature_contributions": _contribution_dict(
+                contributions[j] if contributions is not None else None
+            ),
+            "model_version": bundle.version,
+        }
+    return results
+
+
 def get_feature_importance() -> dict:
     """Return the global feature importance from training."""
-    _load_artifacts()
-    return _feature_importance or {}
+    return current_bundle().feature_importance
+
+
+def warm_up(explain_modes=EXPLAIN_MODES, bundle: ModelBundle | None = None) -> dict:
+    """Load every artifact and exercise each inference path once.
+
+    Maps the compiled model and outlier detector, builds the SHAP
+    explainer if ``"full"`` is among ``explain_modes``, then scores
+    synthetic rows around the training mean through ``predict()`` and
+    ``predict_batch()`` in each mode, so the first real request pays no
+    lazy-initialisation cost.
+
+    Args:
+        explain_modes: Modes to warm. Leaving out ``"full"`` keeps the
+            pickled model and SHAP explainer out of this process until a
+            request needs them.
+        bundle: Bundle to warm, e.g. one about to be swapped in by a hot
+            reload; defaults to (loading) the active one.
+
+    Returns:
+        Seconds spent per phase, plus ``"total"``.
+    """
+    timings = {}
+    start = phase = time.perf_counter()
+
+    def mark(name: str) -> None:
+        nonlocal phase
+        now = time.perf_counter()
+        timings[name] = now - phase
+        phase = now
+
+    bundle = bundle or current_bundle()
+    mark("load_model")
+    if "full" in explain_modes:
+        bundle.shap_explainer()
+        mark("build_explainer")
+
+    # Rows at the training mean and one standard deviation either side
+    offsets = np.array([[-1.0], [0.0], [1.0]]) * np.ones(len(FEATURE_NAMES))
+    X = bundle.scale_mean + bundle.scale_std * offsets
+    for mode in explain_modes:
+        predict(X[1], explain=mode, bundle=bundle)
+        predict_batch(X, explain=mode, bundle=bundle)
+    mark("warmup_inference")
+
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def get_model_version() -> str:
+    """Return the content fingerprint of the active model bundle."""
+    return current_bundle().version
 
 
 def is_model_loaded() -> bool:
     """Check whether the model artefacts can be loaded."""
     try:
-        _load_artifacts()
+        current_bundle()
         return True
     except Exception:
         return False
@@ -0,0 +1,306 @@
+"""
+Heart Disease Prediction – Offline Batch Scoring.
+
+Scores a CSV or Parquet file of patient rows without the HTTP API, e.g.
+for the nightly re-scoring of the patient registry. The input is read in
+chunks of ``--chunk-rows``. Integer-valued columns are downcast to the
+smallest integer type that holds them (floats are left alone, since
+float32 would change what the model sees). Chunks are fanned out to a
+process pool whose workers each load the model artifacts once, and the
+results are written back in input order as soon as they are ready, so
+memory is bounded by the chunks in flight.
+
+Each row is scored by ``ml.predict.predict_batch()``, so the output is
+deterministic and matches ``ml.predict.predict`` row for row: prediction,
+probability, outlier flag, anomaly score, the model version and, with
+``--explain``, one contribution column per feature: ``shap_<feature>``
+for SHAP values (``full``), ``contrib_<feature>`` for the fast path
+attribution (``fast``). Rows with a missing or non-finite feature get an
+``error`` instead. Parquet input and output need ``pyarrow``.
+
+Usage::
+
+    python -m ml.score registry.csv scores.parquet --workers 8 --chunk-rows 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from ml.predict import EXPLAIN_MODES, predict_batch, set_backend
+from ml.train import FEATURE_NAMES
+
+# Contribution column prefix per explain mode; only "full" gives SHAP values
+CONTRIBUTION_PREFIXES = {"fast": "contrib_", "full": "shap_"}
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def read_chunks(
+    path: str, chunk_rows: int, columns: list[str], skip_rows: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """Yield ``columns`` of a CSV or Parquet file, ``chunk_rows`` rows at a time.
+
+    Args:
+        path: CSV or Parquet file.
+        chunk_rows: Rows per chunk.
+        columns: Columns to read.
+        skip_rows: Data rows to skip first, e.g. those already scored.
+
+    Raises:
+        ValueError: If the file lacks any of ``columns``.
+    """
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        missing = [c for c in columns if c not in parquet.schema_arrow.names]
+        if missing:
+            raise ValueError(f"{path} is missing column(s): {', '.join(missing)}")
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            if skip_rows >= batch.num_rows:
+                skip_rows -= batch.num_rows
+                continue
+            yield downcast(batch.slice(skip_rows).to_pandas())
+            skip_rows = 0
+        return
+
+    header = pd.read_csv(path, nrows=0).columns
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"{path} is missing column(s): {', '.join(missing)}")
+    # Rows already scored are read and dropped a chunk at a time: a
+    # skiprows range would be materialised, costing memory per row
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_rows):
+        if skip_rows >= len(chunk):
+            skip_rows -= len(chunk)
+            continue
+        yield downcast(chunk.iloc[skip_rows:][columns])
+        skip_rows = 0
+
+
+def count_rows(path: str) -> int:
+    """Data rows in a CSV (newlines after the header) or Parquet file."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return max(0, lines + (last != b"\n") - 1)
+
+
+def downcast(frame: pd.DataFrame) -> pd.DataFrame:
+    """Shrink integer-valued feature columns to the smallest integer dtype.
+
+    Lossless: columns with NaNs or fractions keep their float64 values,
+    so scoring sees exactly what ``ml.predict.predict`` would.
+    """
+    for name in FEATURE_NAMES:
+        column = frame[name]
+        if column.dtype.kind == "f":
+            values = column.to_numpy()
+            if not np.isfinite(values).all() or (values != np.round(values)).any():
+                continue
+        if column.dtype.kind in "iuf":
+            frame[name] = pd.to_numeric(column, downcast="integer")
+    return frame
+
+
+def init_worker(backend: str, explain: str) -> None:
+    """Load the model artifacts once per pool worker."""
+    from ml.bundle import current_bundle
+
+    set_backend(backend)
+    bundle = current_bundle()
+    if explain == "full":
+        bundle.shap_explainer()
+
+
+def score_chunk(
+    frame: pd.DataFrame,
+    first_row: int,
+    explain: str = "none",
+    id_column: Optional[str] = None,
+) -> pd.DataFrame:
+    """Score one chunk into output columns.
+
+    Args:
+        frame: Input rows, including every ``FEATURE_NAMES`` column.
+        first_row: 1-based number of the chunk's first row in the file.
+        explain: One of ``ml.predict.EXPLAIN_MODES``.
+        id_column: Input column copied through to the output.
+    """
+    X = frame[FEATURE_NAMES].to_numpy(dtype=np.float64)
+    results = predict_batch(X, explain)
+
+    out = {}
+    if id_column:
+        out[id_column] = frame[id_column].to_numpy()
+    out["row"] = np.arange(first_row, first_row + len(frame))
+    out["prediction"] = pd.array([r.get("prediction") for r in results], dtype="Int8")
+    out["probability"] = pd.array([r.get("probability") for r in results], dtype="Float64")
+    out["is_outlier"] = pd.array([r.get("is_outlier") for r in results], dtype="boolean")
+    out["anomaly_score"] = pd.array([r.get("anomaly_score") for r in results], dtype="Float64")
+    out["model_version"] = pd.array([r.get("model_version") for r in results], dtype="string")
+    out["error"] = pd.array([r.get("error") for r in results], dtype="string")
+    if explain != "none":
+        prefix = CONTRIBUTION_PREFIXES[explain]
+        for name in FEATURE_NAMES:
+            out[f"{prefix}{name}"] = pd.array(
+                [r.get("feature_contributions", {}).get(name) for r in results], dtype="Float64",
+            )
+    return pd.DataFrame(out)
+
+
+class _Writer:
+    """Append scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet = _is_parquet(path)
+        self._writer = None
+        self._file = None
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+            return
+        if self._file is None:
+            self._file = open(self.path, "w", newline="")
+            frame.to_csv(self._file, index=False)
+        else:
+            frame.to_csv(self._file, index=False, header=False)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    workers: Optional[int] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    explain: str = "none",
+    id_column: Optional[str] = None,
+    backend: str = "compiled",
+    verbose: bool = True,
+) -> dict:
+    """Score every row of ``input_path`` into ``output_path``.
+
+    Args:
+        input_path: CSV or Parquet file with the ``FEATURE_NAMES`` columns.
+        output_path: ``.csv`` or ``.parquet`` file to write.
+        workers: Scoring processes (default: one per CPU); 1 scores in
+            this process.
+        chunk_rows: Rows read and scored per task.
+        explain: One of ``ml.predict.EXPLAIN_MODES``.
+        id_column: Input column copied through to the output.
+        backend: Inference backend, ``"compiled"`` or ``"sklearn"``.
+        verbose: Print progress.
+
+    Returns:
+        Dict with rows, invalid rows, seconds and rows per second.
+    """
+    if explain not in EXPLAIN_MODES:
+        raise ValueError(f"explain must be one of {', '.join(EXPLAIN_MODES)}")
+    workers = workers or os.cpu_count() or 1
+    columns = FEATURE_NAMES + ([id_column] if id_column and id_column not in FEATURE_NAMES else [])
+
+    start = time.perf_counter()
+    rows = invalid = 0
+    writer = _Writer(output_path)
+
+    def emit(frame: pd.DataFrame) -> None:
+        nonlocal rows, invalid
+        writer.write(frame)
+        rows += len(frame)
+        invalid += int(frame["error"].notna().sum())
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"[INFO] {rows:,} rows scored ({rows / elapsed:,.0f} rows/s)")
+
+    chunks = read_chunks(input_path, chunk_rows, columns)
+    first_row = 1
+    try:
+        if workers == 1:
+            init_worker(backend, explain)
+            for frame in chunks:
+                emit(score_chunk(frame, first_row, explain, id_column))
+                first_row += len(frame)
+        else:
+            with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(backend, explain)) as pool:
+                # Results are written in submission order; at most two
+                # chunks per worker are in flight, which bounds memory.
+                pending = deque()
+                for frame in chunks:
+                    pending.append(pool.submit(score_chunk, frame, first_row, explain, id_column))
+                    first_row += len(frame)
+                    if len(pending) >= 2 * workers:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    summary = {
+        "rows": rows,
+        "invalid": invalid,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else 0.0,
+    }
+    if verbose:
+        print(
+            f"[INFO] Scored {rows:,} rows ({invalid:,} invalid) in {seconds:.2f}s "
+            f"→ {summary['rows_per_second']:,.0f} rows/s, saved → {output_path}"
+        )
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("input", help="CSV or Parquet file with the 13 feature columns")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--workers", type=int, default=None, help="Scoring processes (default: CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--explain", choices=EXPLAIN_MODES, default="none")
+    parser.add_argument("--id-column", default=None, help="Input column copied to the output")
+    parser.add_argument("--backend", choices=("compiled", "sklearn"), default="compiled")
+    args = parser.parse_args()
+
+    try:
+        score_file(
+            args.input, args.output, args.workers, args.chunk_rows,
+            args.explain, args.id_column, args.backend,
+        )
+    except (FileNotFoundError, ValueError) as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Heart Disease Prediction – Per-Stage Latency.
+
+The ``prediction_stage_seconds{stage}`` histogram splits the time spent
+scoring into its stages, so a slow ``/predict`` can be traced to one of
+them:
+
+- ``validation`` – row checks and feature-vector assembly (``ml.predict``)
+- ``scaling``    – the StandardScaler transform
+- ``forest``     – the RandomForest pass
+- ``outlier``    – the IsolationForest pass (``ml.outlier``)
+- ``explain``    – feature contributions (fast path attribution or SHAP)
+- ``analytics``  – recording into the tracker (``app.analytics``)
+
+Each observation is one call, however many rows it covered. The label
+children are bound up front, so recording a stage costs one
+``Histogram.observe`` (about 1 µs; see
+``benchmarks.bench_stage_overhead``).
+
+Inference running in a process pool records into a buffer instead of the
+worker's own registry. ``run_collecting()`` returns that buffer with the
+result, and ``replay()`` observes it in the API process that serves
+``/metrics``.
+
+Usage::
+
+    from ml.stages import observe
+    start = time.perf_counter()
+    X_scaled = bundle.scale(x)
+    observe("scaling", time.perf_counter() - start)
+"""
+
+from typing import Callable, Optional
+
+from prometheus_client import Histogram
+
+STAGES = ("validation", "scaling", "forest", "outlier", "explain", "analytics")
+
+# ──────────────────────────────────────────────
+# Prometheus Metrics
+# ──────────────────────────────────────────────
+PREDICTION_STAGE_SECONDS = Histogram(
+    "prediction_stage_seconds",
+    "Time spent in each prediction stage, per call",
+    ["stage"],
+    buckets=[0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+             0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0],
+)
+_children = {stage: PREDICTION_STAGE_SECONDS.labels(stage=stage) for stage in STAGES}
+
+# Samples buffered by run_collecting(); None when observing directly
+_collected: Optional[list[tuple[str, float]]] = None
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Record the duration of one call to ``stage`` (one of ``STAGES``)."""
+    if _collected is not None:
+        _collected.append((stage, seconds))
+    else:
+        _children[stage].observe(seconds)
+
+
+def run_collecting(fn: Callable, *args, **kwargs) -> tuple:
+    """Run ``fn`` in a pool worker, buffering the stages it records.
+
+    Returns:
+        Tuple of (``fn``'s result, list of ``(stage, seconds)`` samples).
+    """
+    global _collected
+    _collected = []
+    try:
+        return fn(*args, **kwargs), _collected
+    finally:
+        _collected = None
+
+
+def replay(samples: list[tuple[str, float]]) -> None:
+    """Observe samples returned by ``run_collecting()`` in this process."""
+    for stage, seconds in samples:
+        _children[stage].observe(seconds)
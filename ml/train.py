@@ -3,7 +3,8 @@ Heart Disease Prediction – Training Pipeline.
 
 Loads the UCI Heart Disease dataset, preprocesses features, trains a
 RandomForestClassifier, runs multi-model comparison, trains an outlier
-detector, and serialises all artifacts to ``models/``.
+detector, and serialises all artifacts to ``models/`` (pickles plus the
+memory-mappable compiled store in ``models/compiled/``).
 
 Usage::
 
@@ -31,6 +32,7 @@ os.makedirs(MODEL_DIR, exist_ok=True)
 MODEL_PATH = os.path.join(MODEL_DIR, "model.pkl")
 SCALER_PATH = os.path.join(MODEL_DIR, "scaler.pkl")
 METADATA_PATH = os.path.join(MODEL_DIR, "training_metadata.json")
+OUTLIER_DETECTOR_PATH = os.path.join(MODEL_DIR, "outlier_detector.pkl")
 
 # ──────────────────────────────────────────────
 # Feature names for the 13-attribute Heart Disease dataset
@@ -40,6 +42,9 @@ FEATURE_NAMES = [
     "restecg", "thalach", "exang", "oldpeak", "slope", "ca", "thal",
 ]
 
+# Max bins per feature in the baseline histograms used for drift monitoring
+HISTOGRAM_BINS = 10
+
 
 def load_data() -> tuple[pd.DataFrame, pd.Series]:
     """Load the Heart Disease dataset.
@@ -144,6 +149,31 @@ def save_artifacts(model: RandomForestClassifier, scaler: StandardScaler) -> Non
     print(f"[INFO] Scaler saved → {SCALER_PATH}")
 
 
+def baseline_histogram(values: pd.Series, bins: int = HISTOGRAM_BINS) -> dict:
+    """Bin one feature's training values for drift monitoring.
+
+    Features with at most ``bins`` distinct values (the categorical ones)
+    get one bin per value; continuous features get quantile bins. Only the
+    interior cut points are stored – the outer bins are open-ended so live
+    values outside the training range still land in a bin.
+
+    Returns:
+        ``{"edges": [...], "counts": [...]}`` where value ``v`` falls in
+        bin ``searchsorted(edges, v, side="right")``.
+    """
+    values = values.dropna().to_numpy(dtype=float)
+    distinct = np.unique(values)
+    if len(distinct) <= bins:
+        edges = (distinct[:-1] + distinct[1:]) / 2
+    else:
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+    return {
+        "edges": [round(float(e), 4) for e in edges],
+        "counts": [int(c) for c in counts],
+    }
+
+
 def save_training_metadata(
     model: RandomForestClassifier,
     X: pd.DataFrame,
@@ -166,10 +196,14 @@ def save_training_metadata(
             "max": round(float(X[col].max()), 4),
         }
 
+    # Binned distributions (the reference for /analytics/drift)
+    histograms = {col: baseline_histogram(X[col]) for col in FEATURE_NAMES}
+
     metadata = {
         "feature_names": FEATURE_NAMES,
         "feature_importance": importance,
         "baseline_stats": baseline_stats,
+        "histograms": histograms,
         "train_accuracy": round(train_acc, 4),
         "test_accuracy": round(test_acc, 4),
         "n_samples": len(X),
@@ -223,7 +257,12 @@ def main() -> None:
     print("   OUTLIER DETECTOR")
     print("=" * 50)
     from ml.outlier import train_outlier_detector
-    train_outlier_detector(X)
+    detector = train_outlier_detector(X)
+
+    # ── Compiled, memory-mappable artifacts ───
+    from ml.artifacts import export_compiled
+    compiled_dir = export_compiled(model, scaler, detector)
+    print(f"[INFO] Compiled artifacts saved → {compiled_dir}")
 
     print("\n✅ Training pipeline completed successfully.")
 
@@ -6,12 +6,20 @@ Provides reusable test fixtures for the API and model test suites.
 
 import os
 import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
 
 # Ensure project root is on the path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Keep batch-job records, results and explanations out of the working tree
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+os.environ.setdefault("EXPLANATION_DIR", tempfile.mkdtemp(prefix="explanations-"))
+
 from app.main import app
 
 
@@ -70,3 +78,25 @@ def out_of_range_input():
         "ca": 2,
         "thal": 3,
     }
+
+
+@pytest.fixture
+def registry(request, tmp_path, sample_input):
+    """A registry CSV with an id column and one incomplete row (row 8).
+
+    Holds 120 rows unless parametrised indirectly with another count.
+
+    Returns:
+        Tuple of (CSV path, the frame written to it).
+    """
+    rows = getattr(request, "param", 120)
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame([sample_input] * rows)
+    frame["age"] = rng.integers(30, 80, rows)
+    frame["chol"] = rng.integers(150, 400, rows)
+    frame["oldpeak"] = rng.integers(0, 40, rows) / 10
+    frame.loc[7, "thalach"] = np.nan
+    frame.insert(0, "patient_id", np.arange(rows) + 5000)
+    path = tmp_path / "registry.csv"
+    frame.to_csv(path, index=False)
+    return path, frame
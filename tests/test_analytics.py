@@ -144,3 +144,708 @@ class TestPredictWithOutlier:
             data = response.json()
             assert "feature_contributions" in data
             assert isinstance(data["feature_contributions"], dict)
+
+
+def _fresh_tracker(history_max: int, window: int, **config):
+    """Build a standalone tracker (the singleton is shared with the app)."""
+    from app.analytics import AnalyticsTracker
+
+    cls = type(
+        "IsolatedTracker",
+        (AnalyticsTracker,),
+        {"_instance": None, "HISTORY_MAX": history_max, "SPIKE_WINDOW": window, **config},
+    )
+    return cls()
+
+
+def _scan_spike_score(tracker) -> float:
+    """Spike score recomputed by scanning the full history."""
+    items = tracker.history.window()["prediction"].tolist()
+    recent = items[-tracker.SPIKE_WINDOW:]
+    older = items[:-tracker.SPIKE_WINDOW]
+    recent_hr = sum(recent) / len(recent)
+    baseline_hr = (
+        sum(older) / len(older)
+        if older else tracker.baseline_high_risk_rate
+    )
+    return round(recent_hr / (baseline_hr or 0.01), 4)
+
+
+class TestSpikeCounters:
+    """Tests for the incrementally maintained spike counters."""
+
+    @pytest.mark.parametrize("history_max,window", [(50, 10), (10, 10), (25, 1)])
+    def test_counters_match_full_scan(self, history_max, window):
+        """detect_spike() should agree with a full rescan after every record."""
+        import random
+
+        rng = random.Random(7)
+        tracker = _fresh_tracker(history_max, window)
+        for i in range(history_max * 3):
+            # Shift the high-risk rate midway so spikes actually occur
+            p_high = 0.2 if i < history_max else 0.8
+            tracker.record_prediction(int(rng.random() < p_high), 0.5, False, {})
+            spike = tracker.detect_spike()
+            if len(tracker.history) < window:
+                assert spike["spike_detected"] is False
+            else:
+                assert spike["spike_score"] == _scan_spike_score(tracker)
+
+    def test_bulk_record_matches_single(self):
+        """record_predictions() should leave the same counters as one-by-one calls."""
+        single = _fresh_tracker(30, 5)
+        bulk = _fresh_tracker(30, 5)
+        records = [
+            {"prediction": i % 3 == 0, "probability": 0.5, "is_outlier": False, "features": {}}
+            for i in range(70)
+        ]
+        for r in records:
+            single.record_prediction(int(r["prediction"]), 0.5, False, {})
+        bulk.record_predictions([{**r, "prediction": int(r["prediction"])} for r in records])
+
+        assert single.detect_spike() == bulk.detect_spike()
+
+
+class TestSpikeDetectors:
+    """Tests for the pluggable window, EWMA and CUSUM detectors."""
+
+    def test_every_window_matches_full_scan(self):
+        """Each window detector should agree with a rescan of its window."""
+        import random
+
+        rng = random.Random(11)
+        tracker = _fresh_tracker(60, 5, SPIKE_WINDOWS=(12, 30))
+        for i in range(200):
+            tracker.record_prediction(int(rng.random() < (0.2 if i < 100 else 0.7)), 0.5, False, {})
+            items = tracker.history.window()["prediction"].tolist()
+            for report in tracker.detect_spike()["detectors"][:3]:
+                window = int(report["name"].split("_")[1])
+                older = items[:-window]
+                baseline = (sum(older) / len(older) if older else tracker.baseline_high_risk_rate) or 0.01
+                assert report["score"] == round(sum(items[-window:]) / window / baseline, 4)
+
+    def test_ewma_and_cusum_alarm_on_abrupt_change(self):
+        """EWMA and CUSUM should stay quiet on steady traffic and alarm after a jump."""
+        import random
+
+        rng = random.Random(5)
+        tracker = _fresh_tracker(5000, 20)
+        for _ in range(2000):
+            tracker.record_prediction(int(rng.random() < 0.3), 0.5, False, {})
+        steady = {d["name"]: d for d in tracker.detect_spike()["detectors"]}
+        assert steady["ewma"]["ready"] and not steady["ewma"]["detected"]
+        assert steady["cusum"]["ready"] and not steady["cusum"]["detected"]
+
+        for _ in range(300):
+            tracker.record_prediction(int(rng.random() < 0.8), 0.5, False, {})
+        spike = tracker.detect_spike()
+        assert {"ewma", "cusum"} <= set(spike["triggered_by"])
+        assert spike["spike_detected"] is True
+
+    def test_detector_selection(self):
+        """SPIKE_DETECTORS should pick detectors; the primary window always runs."""
+        tracker = _fresh_tracker(100, 10, SPIKE_DETECTORS=("cusum",), SPIKE_WINDOWS=(50,))
+        assert [d.name for d in tracker.detectors] == ["window_10", "cusum"]
+        with pytest.raises(ValueError, match="spike detector"):
+            _fresh_tracker(100, 10, SPIKE_DETECTORS=("zscore",))
+
+    def test_spikes_endpoint_lists_detectors(self, client, sample_input):
+        """/analytics/spikes should report each configured detector's score."""
+        client.post("/predict", json=sample_input)
+        data = client.get("/analytics/spikes").json()
+        assert data["detectors"][0]["name"] == "window_20"
+        assert {"window", "ewma", "cusum"} <= {d["kind"] for d in data["detectors"]}
+        assert {"score", "threshold", "detected", "ready"} <= set(data["detectors"][0])
+
+
+class TestPredictionHistory:
+    """Tests for the columnar prediction ring buffer."""
+
+    def _filled(self, capacity: int, count: int):
+        from app.history import PredictionHistory, feature_row
+
+        history = PredictionHistory(capacity)
+        for i in range(count):
+            history.append(1000.0 + i, i % 2, i / 100, i % 5 == 0, feature_row({"age": i}))
+        return history
+
+    def test_wraparound_keeps_newest_in_order(self):
+        """A full buffer should hold the newest records, oldest first."""
+        history = self._filled(capacity=5, count=12)
+        cols = history.window()
+
+        assert len(history) == 5
+        assert cols["timestamp"].tolist() == [1007.0, 1008.0, 1009.0, 1010.0, 1011.0]
+        assert [history.prediction_at(i) for i in range(5)] == cols["prediction"].tolist()
+
+    def test_window_last_and_since(self):
+        """window() should honour both the count and the time bound."""
+        history = self._filled(capacity=8, count=20)
+
+        assert history.window(3)["timestamp"].tolist() == [1017.0, 1018.0, 1019.0]
+        assert history.window(since=1016.5)["timestamp"].tolist() == [1017.0, 1018.0, 1019.0]
+        assert history.window(5, since=1018.0)["timestamp"].tolist() == [1018.0, 1019.0]
+        assert len(history.window(0)["timestamp"]) == 0
+
+    def test_records_are_json_ready(self):
+        """Serialised records should use ISO timestamps and None for missing features."""
+        record = self._filled(capacity=4, count=1).to_records()[0]
+
+        assert record["timestamp"].startswith("1970-01-01T00:16:40")
+        assert record["prediction"] == 0
+        assert record["is_outlier"] is True
+        assert record["features"]["age"] == 0.0
+        assert record["features"]["chol"] is None
+
+    def test_memory_per_record(self):
+        """Each record should cost a fixed 66 bytes of preallocated columns."""
+        from app.history import PredictionHistory
+
+        assert PredictionHistory(1000).nbytes() == 66 * 1000
+
+
+def _drift_monitor(windows):
+    """A standalone DriftMonitor on the saved training histograms."""
+    import json
+
+    from app.drift import DriftMonitor, baseline_histograms
+    from ml.train import METADATA_PATH
+
+    with open(METADATA_PATH) as f:
+        return DriftMonitor(baseline_histograms(json.load(f)), windows)
+
+
+def _training_rows():
+    """The training dataset as float32 feature rows."""
+    import numpy as np
+
+    from ml.train import FEATURE_NAMES, load_data
+
+    X, _ = load_data()
+    return X[FEATURE_NAMES].to_numpy(dtype=np.float32)
+
+
+class TestDriftMonitor:
+    """Tests for the streaming PSI/KS drift monitor."""
+
+    def test_baseline_histograms_saved(self):
+        """Training metadata should carry one histogram per feature."""
+        import pandas as pd
+
+        from ml.train import FEATURE_NAMES, baseline_histogram
+
+        monitor = _drift_monitor((10,))
+        assert monitor is not None
+        hist = baseline_histogram(pd.Series([0, 1, 1, 2, 2, 2]))
+        assert hist == {"edges": [0.5, 1.5], "counts": [1, 2, 3]}
+        assert len(monitor.n_bins) == len(FEATURE_NAMES)
+
+    def test_training_traffic_is_stable(self):
+        """Replaying the training data should show no drift."""
+        rows = _training_rows()
+        monitor = _drift_monitor((len(rows),))
+        for row in rows:
+            monitor.update(row)
+
+        report = monitor.report(monitor.snapshot())["windows"][0]
+        assert report["samples"] == len(rows)
+        assert report["drifted_features"] == []
+        assert all(f["psi"] < 0.01 and f["ks"] < 0.01 for f in report["features"])
+
+    def test_shifted_feature_is_flagged(self):
+        """A shifted feature should score significant PSI and a large KS."""
+        rows = _training_rows().copy()
+        rows[:, 0] += 25  # age
+        monitor = _drift_monitor((200,))
+        for row in rows:
+            monitor.update(row)
+
+        features = monitor.report(monitor.snapshot())["windows"][0]["features"]
+        age = next(f for f in features if f["feature"] == "age")
+        assert age["status"] == "significant"
+        assert age["ks"] > 0.5
+
+    def test_sliding_windows_match_recount(self):
+        """Each window's counts should equal a recount of its last records."""
+        import numpy as np
+
+        rows = _training_rows()
+        rows[::7, 3] = np.nan  # Some requests omit trestbps
+        monitor = _drift_monitor((5, 40))
+        for n, row in enumerate(rows, start=1):
+            monitor.update(row)
+            if n % 37:
+                continue
+            counts = monitor.snapshot()
+            for w, size in enumerate(monitor.windows):
+                fresh = _drift_monitor((size,))
+                for past in rows[max(0, n - size):n]:
+                    fresh.update(past)
+                np.testing.assert_array_equal(counts[w], fresh.snapshot()[0])
+
+    def test_drift_endpoint(self, client, sample_input):
+        """/analytics/drift should report every configured window."""
+        from app.config import settings
+
+        client.post("/predict", json=sample_input)
+        data = client.get("/analytics/drift").json()
+
+        assert data["available"] is True
+        assert [w["window_size"] for w in data["windows"]] == sorted(settings.drift_windows)
+        assert {"feature", "psi", "ks", "samples", "status"} <= set(data["windows"][0]["features"][0])
+
+
+def _record_in_worker(shm_name: str, start: int, count: int) -> None:
+    """Worker process body: record ``count`` predictions into the shared arena."""
+    tracker = _fresh_tracker(500, 10, BACKEND="shared", SHM_NAME=shm_name, DRIFT_WINDOWS=(100,))
+    for i in range(start, start + count):
+        tracker.record_prediction(int(i % 3 == 0), 0.25, i % 7 == 0, {"age": float(i % 80)})
+    tracker.close()
+
+
+def _attach_and_hang(shm_name: str, attached) -> None:
+    """Attach a tracker, then wait to be killed without closing it."""
+    import time
+
+    _fresh_tracker(500, 10, BACKEND="shared", SHM_NAME=shm_name, DRIFT_WINDOWS=(100,))
+    attached.set()
+    time.sleep(120)
+
+
+class TestSharedAnalytics:
+    """Tests for the shared-memory analytics backend."""
+
+    def test_workers_share_exact_totals(self):
+        """Several processes recording at once should produce exact totals."""
+        import multiprocessing
+        import uuid
+        from multiprocessing.shared_memory import SharedMemory
+
+        name = f"apdd-test-{uuid.uuid4().hex[:8]}"
+        workers, per_worker = 4, 2000
+        tracker = _fresh_tracker(500, 10, BACKEND="shared", SHM_NAME=name, DRIFT_WINDOWS=(100,))
+
+        ctx = multiprocessing.get_context("spawn")  # As uvicorn starts its workers
+        procs = [
+            ctx.Process(target=_record_in_worker, args=(name, w * per_worker, per_worker))
+            for w in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join(timeout=120)
+            assert proc.exitcode == 0
+
+        total = workers * per_worker
+        stats = tracker.get_stats()
+        assert stats["total_predictions"] == total
+        assert stats["high_risk_count"] == sum(1 for i in range(total) if i % 3 == 0)
+        assert stats["outlier_count"] == sum(1 for i in range(total) if i % 7 == 0)
+        assert stats["average_confidence"] == 0.25
+        assert len(tracker.history) == 500
+        assert tracker.detect_spike()["spike_score"] == _scan_spike_score(tracker)
+        assert tracker.drift.snapshot()[0].sum(axis=1).tolist()[0] == 100  # age
+
+        tracker.close()
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name)
+
+    def test_killed_worker_does_not_keep_segment(self):
+        """A SIGKILLed worker should neither block removal nor leave stale state."""
+        import multiprocessing
+        import os
+        import signal
+        import uuid
+        from multiprocessing.shared_memory import SharedMemory
+
+        name = f"apdd-test-{uuid.uuid4().hex[:8]}"
+        tracker = _fresh_tracker(500, 10, BACKEND="shared", SHM_NAME=name, DRIFT_WINDOWS=(100,))
+        tracker.record_prediction(1, 0.5, False, {"age": 50.0})
+
+        ctx = multiprocessing.get_context("spawn")
+        attached = ctx.Event()
+        proc = ctx.Process(target=_attach_and_hang, args=(name, attached))
+        proc.start()
+        assert attached.wait(timeout=60)
+        os.kill(proc.pid, signal.SIGKILL)
+        proc.join(timeout=10)
+
+        tracker.close()
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name)
+
+        # A worker killed while alone leaves the segment; the next start resets it
+        proc = ctx.Process(target=_attach_and_hang, args=(name, attached := ctx.Event()))
+        proc.start()
+        assert attached.wait(timeout=60)
+        os.kill(proc.pid, signal.SIGKILL)
+        proc.join(timeout=10)
+        restarted = _fresh_tracker(500, 10, BACKEND="shared", SHM_NAME=name, DRIFT_WINDOWS=(100,))
+        assert restarted.arena.created
+        restarted.close()
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name)
+
+    def test_locks_are_per_aggregate(self):
+        """A writer or reader of one aggregate should not wait for another's lock."""
+        import threading
+
+        tracker = _fresh_tracker(50, 5)
+        tracker.record_prediction(1, 0.5, False, {"age": 50.0})
+        done = threading.Event()
+
+        def read_history():
+            tracker.get_history(limit=10)
+            tracker.detect_spike()
+            done.set()
+
+        with tracker.arena.locks["sketch"], tracker.arena.locks["timeseries"]:
+            threading.Thread(target=read_history, daemon=True).start()
+            assert done.wait(timeout=2)
+
+        # A batch holding "history" lets a reader of "counters" through
+        with tracker.arena.locks["history"]:
+            writer = threading.Thread(target=tracker.record_prediction, args=(0, 0.2, False, {}))
+            writer.start()
+            writer.join(timeout=0.2)
+            assert writer.is_alive()  # Waiting for "history"
+            assert tracker.total == 2  # ...having already counted its event
+        writer.join(timeout=2)
+        assert len(tracker.history) == 2
+
+    def test_unknown_backend_rejected(self):
+        """An unsupported ANALYTICS_BACKEND should fail loudly."""
+        with pytest.raises(ValueError, match="analytics backend"):
+            _fresh_tracker(10, 5, BACKEND="redis")
+
+
+class TestTimeSeries:
+    """Tests for the multi-resolution time-series buckets."""
+
+    NOW = 1_800_000_000.0  # A whole hour, so buckets line up across resolutions
+
+    def test_buckets_aggregate_per_resolution(self):
+        """Records should sum into their second, minute and hour buckets."""
+        from app.timeseries import TimeSeries, serialise_series
+
+        series = TimeSeries()
+        for offset, prediction, outlier in [(0.2, 1, False), (0.7, 0, True), (61.0, 1, False)]:
+            series.record(self.NOW + offset, prediction, 0.5 + prediction * 0.25, outlier)
+        now = self.NOW + 120
+
+        minutes = serialise_series(series.window("minute", start=self.NOW, now=now))
+        assert [p["count"] for p in minutes] == [2, 1, 0]
+        assert minutes[0]["high_risk"] == 1 and minutes[0]["outliers"] == 1
+        assert minutes[0]["mean_probability"] == 0.625
+        assert minutes[2]["mean_probability"] is None
+
+        hour = serialise_series(series.window("hour", start=self.NOW, now=now))
+        assert [p["count"] for p in hour] == [3]
+        seconds = series.window("second", start=self.NOW, end=self.NOW + 1, now=now)
+        assert seconds["count"].tolist() == [2, 0]
+
+    def test_retention_is_bounded(self):
+        """A bucket past retention should be neither returned nor summed into."""
+        from app.timeseries import RESOLUTIONS, TimeSeries
+
+        step, retention = RESOLUTIONS["second"]
+        series = TimeSeries()
+        series.record(self.NOW, 1, 0.9, False)
+        later = self.NOW + step * retention  # Same slot, next lap of the ring
+        series.record(later, 0, 0.1, False)
+
+        cols = series.window("second", start=self.NOW, end=later, now=later)
+        assert len(cols["count"]) == retention
+        assert cols["count"].sum() == 1
+        assert cols["high_risk"].sum() == 0
+
+    def test_default_range(self):
+        """Without a start the last DEFAULT_POINTS buckets should come back."""
+        from app.timeseries import DEFAULT_POINTS, TimeSeries
+
+        cols = TimeSeries().window("minute", now=self.NOW)
+        assert len(cols["count"]) == DEFAULT_POINTS
+        assert cols["start"][-1] == self.NOW
+
+    def test_timeseries_endpoint(self, client, sample_input):
+        """/analytics/timeseries should include the latest prediction."""
+        client.post("/predict", json=sample_input)
+        data = client.get("/analytics/timeseries", params={"resolution": "second"}).json()
+
+        assert data["step_seconds"] == 1
+        assert sum(p["count"] for p in data["points"][-5:]) >= 1
+
+    def test_timeseries_rejects_bad_requests(self, client):
+        """Unknown resolutions and inverted ranges should be 422."""
+        assert client.get("/analytics/timeseries?resolution=day").status_code == 422
+        response = client.get(
+            "/analytics/timeseries",
+            params={"start": "2026-01-02T00:00:00", "end": "2026-01-01T00:00:00"},
+        )
+        assert response.status_code == 422
+
+
+def _archive(directory, segment_records: int = 10):
+    """A PredictionArchive with small segments, so tests roll several."""
+    from app.archive import PredictionArchive
+
+    cls = type("SmallArchive", (PredictionArchive,), {"SEGMENT_RECORDS": segment_records})
+    return cls(str(directory))
+
+
+def _wait_sealed(directory, timeout: float = 10.0) -> None:
+    """Wait for background compression of rolled segments to finish."""
+    import os
+    import time
+
+    deadline = time.monotonic() + timeout
+    while any(name.endswith(".sealed") for name in os.listdir(directory)):
+        assert time.monotonic() < deadline, "segments were never sealed"
+        time.sleep(0.01)
+
+
+class TestPredictionArchive:
+    """Tests for the on-disk prediction archive and restart recovery."""
+
+    def _append(self, archive, first: int, count: int) -> None:
+        from app.history import feature_row
+
+        for i in range(first, first + count):
+            archive.append(1000.0 + i, i % 2, i / 100, i % 5 == 0, feature_row({"age": i}))
+
+    def test_segments_roll_and_read_back(self, tmp_path):
+        """Records should read back in order across sealed and active segments."""
+        import os
+
+        archive = _archive(tmp_path)
+        self._append(archive, 0, 35)
+        _wait_sealed(tmp_path)
+
+        assert sorted(os.listdir(tmp_path))[-1].endswith(".log")
+        assert sum(name.endswith(".seg") for name in os.listdir(tmp_path)) == 3
+        assert archive.read_seq(5, 30)["timestamp"].tolist() == [1000.0 + i for i in range(5, 30)]
+
+        cols = archive.read(since=1012.0, until=1021.5, limit=5)
+        assert cols["timestamp"].tolist() == [1017.0, 1018.0, 1019.0, 1020.0, 1021.0]
+        assert cols["features"][:, 0].tolist() == [17.0, 18.0, 19.0, 20.0, 21.0]
+        assert len(archive.read(since=2000.0)["timestamp"]) == 0
+
+    def test_recover_truncates_torn_tail(self, tmp_path):
+        """A partly written last record should be dropped and appends resume."""
+        import os
+
+        archive = _archive(tmp_path)
+        self._append(archive, 0, 14)
+        _wait_sealed(tmp_path)
+        archive.close()
+        log = next(name for name in os.listdir(tmp_path) if name.endswith(".log"))
+        with open(tmp_path / log, "ab") as f:
+            f.write(b"\x00" * 17)  # Crash mid-write
+
+        reopened = _archive(tmp_path)
+        reopened.recover()
+        assert reopened.next_seq == 14
+        self._append(reopened, 14, 3)
+        assert reopened.read_seq(0, 17)["timestamp"].tolist() == [1000.0 + i for i in range(17)]
+
+    def _state(self, tracker) -> dict:
+        return {
+            "stats": tracker.get_stats(),
+            "spike": tracker.detect_spike(),
+            "history": tracker.get_history(limit=1000),
+            "minutes": tracker.get_timeseries("minute"),
+            "drift": tracker.drift.snapshot().tolist() if tracker.drift else None,
+        }
+
+    def test_restart_restores_state(self, tmp_path):
+        """A tracker over the same archive should resume the exact state."""
+        import random
+
+        rng = random.Random(3)
+        config = {"ARCHIVE_DIR": str(tmp_path), "DRIFT_WINDOWS": (20,)}
+        tracker = _fresh_tracker(30, 5, **config)
+        tracker.archive.SNAPSHOT_EVERY = 16
+        for i in range(50):
+            tracker.record_prediction(
+                int(rng.random() < 0.4), rng.random(), i % 9 == 0, {"age": float(40 + i % 30)},
+            )
+        before = self._state(tracker)
+        # No close(): the log tail after the last snapshot must be replayed
+        assert tracker.archive.next_seq - tracker.archive._cursor[2] == 2
+
+        restarted = _fresh_tracker(30, 5, **config)
+        assert self._state(restarted) == before
+        assert restarted.archive.next_seq == 50
+
+    def test_snapshot_written_durably_outside_the_lock(self, tmp_path, monkeypatch):
+        """Snapshots should be fsynced with their directory, after the tracker locks are released."""
+        import os
+        import threading
+
+        tracker = _fresh_tracker(30, 5, ARCHIVE_DIR=str(tmp_path))
+        tracker.archive.SNAPSHOT_EVERY = 8
+        lock_free, synced = [], []
+        save = tracker.archive.save_snapshot
+
+        def checked_save(seq, arrays):
+            acquired = threading.Event()
+
+            def probe():
+                with tracker.arena.locked():
+                    acquired.set()
+
+            threading.Thread(target=probe, daemon=True).start()
+            lock_free.append(acquired.wait(timeout=2))
+            save(seq, arrays)
+
+        real_fsync = os.fsync
+        monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+        monkeypatch.setattr(tracker.archive, "save_snapshot", checked_save)
+        for i in range(8):
+            tracker.record_prediction(i % 2, 0.5, False, {"age": float(i)})
+
+        assert lock_free == [True]
+        assert len(synced) >= 2  # The snapshot file, then the directory
+        assert tracker.archive.load_snapshot()[0] == 8
+        tracker.close()
+
+    def test_older_snapshot_does_not_replace_newer(self, tmp_path):
+        """A snapshot finishing after a newer one should be discarded."""
+        import numpy as np
+
+        archive = _archive(tmp_path)
+        archive.save_snapshot(20, {"counters": np.array([20])})
+        archive.save_snapshot(10, {"counters": np.array([10])})
+
+        seq, arrays = archive.load_snapshot()
+        assert seq == 20 and arrays["counters"].tolist() == [20]
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_history_range_reads_archive(self, tmp_path):
+        """A time range older than the ring should be served from the archive."""
+        tracker = _fresh_tracker(10, 5, ARCHIVE_DIR=str(tmp_path))
+        for i in range(30):
+            tracker.record_prediction(i % 2, 0.5, False, {"age": float(i)})
+
+        ages = [r["features"]["age"] for r in tracker.get_history(limit=100, start=0.0)]
+        assert ages == [float(i) for i in range(30)]
+        assert len(tracker.get_history(limit=100)) == 10
+        newest = [r["features"]["age"] for r in tracker.get_history(limit=4, start=0.0)]
+        assert newest == [26.0, 27.0, 28.0, 29.0]
+        tracker.close()
+
+    def test_history_endpoint_time_range(self, client, sample_input):
+        """/analytics/history should accept a time range and reject inverted ones."""
+        client.post("/predict", json=sample_input)
+        data = client.get("/analytics/history", params={"start": "2020-01-01T00:00:00"}).json()
+        assert len(data) >= 1
+
+        response = client.get(
+            "/analytics/history",
+            params={"start": "2026-01-02T00:00:00", "end": "2026-01-01T00:00:00"},
+        )
+        assert response.status_code == 422
+
+
+class TestQuantileSketches:
+    """Tests for the DDSketch quantile sketches."""
+
+    QS = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999)
+
+    @staticmethod
+    def _rows(n: int, seed: int = 0):
+        """Synthetic rows: a probability, a skewed, a signed and a discrete metric."""
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        return np.column_stack([
+            rng.beta(2, 5, n),
+            rng.lognormal(4, 1.5, n),
+            rng.normal(0, 3, n),
+            rng.integers(0, 4, n).astype(np.float64),
+        ])
+
+    def test_accuracy_on_a_million_rows(self):
+        """Every quantile should be within the relative accuracy of the exact one."""
+        import numpy as np
+        from app.sketch import MIN_VALUE, QuantileSketches
+
+        rows = self._rows(1_000_000)
+        sketches = QuantileSketches(("probability", "skewed", "signed", "discrete"), 0.01)
+        sketches.extend(rows)
+
+        results = sketches.quantiles(sketches.snapshot(), self.QS)
+        for j, result in enumerate(results):
+            assert result["count"] == len(rows)
+            exact = np.quantile(rows[:, j], self.QS, method="lower")
+            for q, expected in zip(self.QS, exact):
+                error = abs(result["quantiles"][q] - expected)
+                assert error <= 0.01 * abs(expected) + MIN_VALUE, (j, q, expected)
+
+    def test_update_matches_extend(self):
+        """Row-at-a-time updates should count exactly like the vectorised path."""
+        import numpy as np
+        from app.sketch import QuantileSketches
+
+        rows = self._rows(2_000, seed=1)
+        rows[::7, 1] = np.nan  # Missing values are skipped
+        one, many = QuantileSketches(("a", "b", "c", "d")), QuantileSketches(("a", "b", "c", "d"))
+        for row in rows.tolist():
+            one.update(row)
+        many.extend(rows)
+
+        assert np.array_equal(one.snapshot(), many.snapshot())
+        assert one.quantiles(one.snapshot("b"))[0]["count"] == 2_000 - len(rows[::7])
+
+    def test_merge_and_fixed_memory(self):
+        """Merging two halves should equal one sketch; memory should not grow."""
+        import numpy as np
+        from app.sketch import QuantileSketches
+
+        rows = self._rows(10_000, seed=2)
+        whole, left, right = (QuantileSketches(("a", "b", "c", "d")) for _ in range(3))
+        shape = whole.snapshot().shape
+        whole.extend(rows)
+        left.extend(rows[:5_000])
+        right.extend(rows[5_000:])
+        left.merge(right.snapshot())
+
+        assert np.array_equal(left.snapshot(), whole.snapshot())
+        assert whole.snapshot().shape == shape
+
+    def test_empty_sketch(self):
+        """A metric without observations should report None quantiles."""
+        from app.sketch import QuantileSketches, quantile_label
+
+        sketches = QuantileSketches(("a",))
+        assert sketches.quantiles(sketches.snapshot()) == [
+            {"count": 0, "quantiles": {0.5: None, 0.9: None, 0.99: None}}
+        ]
+        assert [quantile_label(q) for q in (0.5, 0.99, 0.999)] == ["p50", "p99", "p99.9"]
+
+    def test_tracker_quantiles(self):
+        """The tracker should sketch the probability and every feature."""
+        tracker = _fresh_tracker(50, 5)
+        for i in range(100):
+            tracker.record_prediction(i % 2, i / 100, False, {"age": float(30 + i % 40)})
+
+        probability = tracker.get_stats()["probability_quantiles"]
+        assert abs(probability["p50"] - 0.49) <= 0.01 * 0.49
+        result = tracker.get_quantiles(["age", "chol"], (0.5,))
+        age, chol = result["metrics"]
+        assert age["count"] == 100 and abs(age["quantiles"]["p50"] - 46) <= 0.01 * 46
+        assert chol == {"metric": "chol", "count": 0, "quantiles": {"p50": None}}
+        with pytest.raises(ValueError):
+            tracker.get_quantiles(["nope"])
+
+    def test_quantiles_endpoint(self, client, sample_input):
+        """/analytics/quantiles should serve sketches and reject bad requests."""
+        client.post("/predict", json=sample_input)
+        data = client.get("/analytics/quantiles", params={"metric": ["probability", "age"]}).json()
+
+        assert [m["metric"] for m in data["metrics"]] == ["probability", "age"]
+        assert set(data["metrics"][0]["quantiles"]) == {"p50", "p90", "p99"}
+        assert data["metrics"][0]["count"] >= 1
+        assert client.get("/analytics/quantiles?metric=nope").status_code == 422
+        assert client.get("/analytics/quantiles?q=1.5").status_code == 422
+        assert "probability_quantiles" in client.get("/analytics/stats").json()
@@ -80,6 +80,32 @@ class TestPredictEndpoint:
         response = client.post("/predict", json={})
         assert response.status_code == 422
 
+    def test_invalid_settings_fail_at_startup(self):
+        """A mistyped EXPLAIN_MODE or INFERENCE_BACKEND should fail validation, not every request."""
+        from pydantic import ValidationError
+
+        from app.config import Settings
+
+        with pytest.raises(ValidationError):
+            Settings(EXPLAIN_MODE="verbose")
+        with pytest.raises(ValidationError):
+            Settings(INFERENCE_BACKEND="onnx")
+
+    def test_predict_returns_503_when_saturated(self, client, sample_input, monkeypatch):
+        """A full inference queue should fail fast with Retry-After."""
+        from app.config import settings
+        from app.executor import ExecutorSaturatedError, executor
+
+        async def saturated(*args, **kwargs):
+            raise ExecutorSaturatedError("queue full")
+
+        monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+        monkeypatch.setattr(executor, "run", saturated)
+        response = client.post("/predict", json=sample_input)
+
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+
     def test_predict_with_string_values(self, client):
         """Predict should reject non-numeric field values."""
         bad_input = {
@@ -92,6 +118,170 @@ class TestPredictEndpoint:
         assert response.status_code == 422
 
 
+class TestExplainModes:
+    """Tests for the per-request explanation modes of /predict."""
+
+    def test_explain_none_skips_contributions(self, client, sample_input):
+        """explain=none should return no feature contributions."""
+        response = client.post("/predict?explain=none", json=sample_input)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["feature_contributions"] == {}
+        assert data["explanation_mode"] == "none"
+
+    def test_explain_fast_covers_all_features(self, client, sample_input):
+        """explain=fast should attribute the prediction to every feature."""
+        data = client.post("/predict?explain=fast", json=sample_input).json()
+        assert len(data["feature_contributions"]) == 13
+
+    def test_explain_modes_agree_on_prediction(self, client, sample_input):
+        """The prediction must not depend on the explanation mode."""
+        results = [
+            client.post(f"/predict?explain={mode}", json=sample_input).json()
+            for mode in ("none", "fast", "full", "async")
+        ]
+        assert len({(r["prediction"], r["probability"]) for r in results}) == 1
+
+    def test_explain_async_is_fetchable(self, client, sample_input):
+        """explain=async should return an id whose explanation becomes ready."""
+        import time
+
+        data = client.post("/predict?explain=async", json=sample_input).json()
+        assert data["prediction_id"]
+
+        url = f"/predictions/{data['prediction_id']}/explanation"
+        for _ in range(100):
+            explanation = client.get(url).json()
+            if explanation["status"] != "pending":
+                break
+            time.sleep(0.05)
+
+        assert explanation["status"] == "ready"
+        full = client.post("/predict?explain=full", json=sample_input).json()
+        assert explanation["feature_contributions"] == full["feature_contributions"]
+
+    def test_explanation_readable_from_another_worker(self, client, sample_input):
+        """Entries live on disk, so a store in another worker process can read them."""
+        from app.explanations import ExplanationStore, explanation_store
+
+        data = client.post("/predict?explain=async", json=sample_input).json()
+        other_worker = ExplanationStore(explanation_store.directory)
+        entry = other_worker.get(data["prediction_id"])
+
+        assert entry is not None
+        assert entry["model_version"] == data["model_version"]
+
+    def test_explanation_of_replaced_model_is_stale(self, tmp_path, sample_input):
+        """A model swapped out after the prediction should not be explained."""
+        import asyncio
+
+        from app.explanations import ExplanationStore
+        from ml.predict import features_to_vector
+
+        store = ExplanationStore(str(tmp_path))
+
+        async def scenario():
+            prediction_id = await store.submit(features_to_vector(sample_input), model_version="0" * 16)
+            await asyncio.gather(*store._tasks)
+            return store.get(prediction_id)
+
+        entry = asyncio.run(scenario())
+        assert entry["status"] == "stale"
+        assert entry["feature_contributions"] == {}
+
+    def test_store_prunes_oldest_entries(self, tmp_path, sample_input):
+        """Only the newest max_entries explanations should be kept."""
+        import asyncio
+
+        from app.explanations import ExplanationStore
+        from ml.predict import features_to_vector
+
+        store = ExplanationStore(str(tmp_path), max_entries=3)
+
+        async def scenario():
+            ids = [await store.submit(features_to_vector(sample_input), mode="none") for _ in range(6)]
+            while store._tasks:
+                await asyncio.gather(*store._tasks)
+            return ids
+
+        ids = asyncio.run(scenario())
+        assert len(list(tmp_path.glob("*.json"))) == 3
+        assert store.get(ids[-1]) is not None
+
+    def test_unknown_prediction_id_returns_404(self, client):
+        """Fetching an unknown explanation should return 404."""
+        response = client.get("/predictions/does-not-exist/explanation")
+        assert response.status_code == 404
+
+    def test_invalid_explain_mode_rejected(self, client, sample_input):
+        """An unknown explain mode should return 422."""
+        response = client.post("/predict?explain=verbose", json=sample_input)
+        assert response.status_code == 422
+
+
+class TestBatchPredictEndpoint:
+    """Tests for the /predict/batch endpoint."""
+
+    def test_batch_returns_results_in_order(self, client, sample_input):
+        """Batch response should contain one result per record, in order."""
+        records = [sample_input, {**sample_input, "age": 70}, {**sample_input, "chol": 300}]
+        response = client.post("/predict/batch", json={"records": records})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["total"] == 3
+        assert data["succeeded"] == 3
+        assert [r["index"] for r in data["results"]] == [0, 1, 2]
+        for result in data["results"]:
+            assert result["status"] == "success"
+            assert result["prediction"] in [0, 1]
+            assert 0.0 <= result["probability"] <= 1.0
+
+    def test_batch_matches_single_prediction(self, client, sample_input):
+        """Batch results should match the single-record endpoint."""
+        single = client.post("/predict", json=sample_input).json()
+        batch = client.post("/predict/batch", json={"records": [sample_input]}).json()
+
+        assert batch["results"][0]["prediction"] == single["prediction"]
+        assert batch["results"][0]["probability"] == single["probability"]
+
+    def test_batch_reports_per_record_errors(self, client, sample_input, out_of_range_input):
+        """Invalid records should be reported without failing the batch."""
+        records = [sample_input, out_of_range_input, {"age": 52}]
+        response = client.post("/predict/batch", json={"records": records})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["succeeded"] == 1
+        assert data["failed"] == 2
+        assert data["results"][0]["status"] == "success"
+        assert data["results"][1]["status"] == "error"
+        assert "age" in data["results"][1]["error"]
+        assert data["results"][2]["status"] == "error"
+
+    def test_batch_updates_analytics(self, client, sample_input):
+        """Every successful record should be counted by the tracker."""
+        before = client.get("/analytics/stats").json()
+        client.post("/predict/batch", json={"records": [sample_input] * 5})
+        after = client.get("/analytics/stats").json()
+
+        assert after["total_predictions"] >= before["total_predictions"] + 5
+
+    def test_batch_async_default_skips_explanations(self, client, sample_input, monkeypatch):
+        """With EXPLAIN_MODE=async, batches should not fall back to SHAP."""
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "EXPLAIN_MODE", "async")
+        data = client.post("/predict/batch", json={"records": [sample_input] * 2}).json()
+        assert [r["feature_contributions"] for r in data["results"]] == [{}, {}]
+
+    def test_batch_with_empty_records(self, client):
+        """An empty batch should be rejected with 422."""
+        response = client.post("/predict/batch", json={"records": []})
+        assert response.status_code == 422
+
+
 class TestMetricsEndpoint:
     """Tests for the /metrics endpoint."""
 
@@ -115,6 +305,43 @@ class TestMetricsEndpoint:
         assert "api_request_total" in text
         assert "api_request_latency_seconds" in text
 
+    def test_requests_labelled_by_route_template(self, client):
+        """Path parameters and unknown paths should not create new series."""
+        from prometheus_client import REGISTRY
+
+        def count(endpoint, status, method="GET"):
+            labels = {"method": method, "endpoint": endpoint, "status": status}
+            return REGISTRY.get_sample_value("api_request_total", labels) or 0
+
+        before = count("/jobs/{job_id}", "404"), count("unmatched", "404"), count("unmatched", "404", "other")
+        client.get(f"/jobs/{'a' * 32}")
+        client.get(f"/jobs/{'b' * 32}")
+        client.get("/wp-login.php")
+        client.request("FOO", "/x")
+
+        assert count("/jobs/{job_id}", "404") == before[0] + 2
+        assert count("unmatched", "404") == before[1] + 1
+        assert count("unmatched", "404", "other") == before[2] + 1
+        text = client.get("/metrics").text
+        assert "/wp-login.php" not in text and 'method="FOO"' not in text
+
+    def test_prediction_stages_recorded(self, client, sample_input):
+        """A prediction should record the time of each of its stages."""
+        from prometheus_client import REGISTRY
+
+        def counts():
+            return {
+                stage: REGISTRY.get_sample_value("prediction_stage_seconds_count", {"stage": stage}) or 0
+                for stage in ("validation", "scaling", "forest", "outlier", "explain")
+            }
+
+        before = counts()
+        # An input no other test uses, so the prediction cache cannot answer it
+        client.post("/predict?explain=fast", json={**sample_input, "chol": 397, "trestbps": 181})
+        after = counts()
+
+        assert all(after[stage] > before[stage] for stage in after)
+
 
 class TestRootEndpoint:
     """Tests for the / root endpoint."""
@@ -132,3 +359,32 @@ class TestRootEndpoint:
         assert "message" in data
         assert "version" in data
         assert "docs" in data
+
+
+class TestReadinessEndpoint:
+    """Tests for the /ready endpoint."""
+
+    def test_ready_after_warm_up(self, client):
+        """/ready should return 200 with a timing breakdown once warm."""
+        import time
+
+        for _ in range(200):
+            response = client.get("/ready")
+            if response.status_code == 200:
+                break
+            time.sleep(0.05)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert "total" in data["startup_seconds"]
+
+    def test_not_ready_returns_503(self, client, monkeypatch):
+        """/ready should return 503 while warm-up is pending."""
+        from app.warmup import warmup_state
+
+        monkeypatch.setattr(warmup_state, "ready", False)
+        response = client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
@@ -0,0 +1,167 @@
+"""
+Streaming Bulk Scoring Tests.
+
+Tests for /predict/stream: CSV and NDJSON input and output, inline row
+errors, chunking and agreement with ml.predict.
+"""
+
+import asyncio
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app.bulk import CSVRows, LineReader, validate_rows
+from app.config import settings
+from ml.predict import predict_batch
+from ml.train import FEATURE_NAMES
+
+
+def _csv(rows: list[dict], columns=FEATURE_NAMES) -> bytes:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(columns), lineterminator="\n", extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode()
+
+
+def _ndjson(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+class TestLineReader:
+    """Tests for incremental line splitting."""
+
+    def test_lines_across_chunk_boundaries(self):
+        """Lines split over chunks should be reassembled; blank lines skipped."""
+        data = b"a,b\n\n1,2\r\n3,4\n5,6"
+
+        async def read():
+            reader = LineReader(_chunks(data, 3))
+            return await reader.batch(2), await reader.batch(10), await reader.batch(10)
+
+        first, rest, end = asyncio.run(read())
+        assert first == [b"a,b", b"1,2\r"]
+        assert rest == [b"3,4", b"5,6"]
+        assert end == []
+
+    def test_line_too_long(self):
+        """A line over the limit should end the upload instead of growing memory."""
+        from app.bulk import BulkInputError
+
+        async def read():
+            return await LineReader(_chunks(b"x" * 100, 10), max_line=50).batch(1)
+
+        with pytest.raises(BulkInputError):
+            asyncio.run(read())
+
+
+class TestRowValidation:
+    """Tests for vectorised HeartDiseaseInput checks."""
+
+    def test_matches_schema_bounds(self, sample_input):
+        """Out-of-range, fractional and non-finite values should be rejected."""
+        row = [float(sample_input[name]) for name in FEATURE_NAMES]
+        X = np.array([row] * 4)
+        X[1, FEATURE_NAMES.index("age")] = 200
+        X[2, FEATURE_NAMES.index("cp")] = 1.5
+        X[3, FEATURE_NAMES.index("chol")] = np.inf
+        errors: dict[int, str] = {}
+        validate_rows(X, errors)
+
+        assert errors == {
+            1: "age: Input should be less than or equal to 120",
+            2: "cp: Input should be a valid integer",
+            3: "Non-finite feature value",
+        }
+
+    def test_csv_header_must_name_features(self):
+        """A header without every feature should be refused up front."""
+        from app.bulk import BulkInputError
+
+        with pytest.raises(BulkInputError, match="thal"):
+            CSVRows(b",".join(name.encode() for name in FEATURE_NAMES[:-1]))
+
+
+class TestStreamEndpoint:
+    """Tests for POST /predict/stream."""
+
+    def test_csv_matches_predict_batch(self, client, sample_input):
+        """Streamed CSV results should equal ml.predict row for row."""
+        rng = np.random.default_rng(0)
+        rows = [
+            {**sample_input, "age": int(age), "chol": int(chol)}
+            for age, chol in zip(rng.integers(30, 80, 25), rng.integers(150, 400, 25))
+        ]
+        response = client.post(
+            "/predict/stream",
+            content=_csv(rows, ("id", *FEATURE_NAMES)),
+            headers={"Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        results = list(csv.DictReader(io.StringIO(response.text)))
+        expected = predict_batch(rows, "none")
+        assert [int(r["row"]) for r in results] == list(range(1, 26))
+        for result, exact in zip(results, expected):
+            assert int(result["prediction"]) == exact["prediction"]
+            assert float(result["probability"]) == exact["probability"]
+            assert float(result["anomaly_score"]) == exact["anomaly_score"]
+            assert result["error"] == ""
+
+    def test_ndjson_with_inline_errors(self, client, sample_input):
+        """Bad rows should be reported in place without stopping the stream."""
+        lines = [
+            json.dumps(sample_input),
+            "not json",
+            json.dumps({**sample_input, "age": 200}),
+            json.dumps({k: v for k, v in sample_input.items() if k != "thal"}),
+            json.dumps(sample_input),
+        ]
+        response = client.post(
+            "/predict/stream",
+            content="\n".join(lines).encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        results = _ndjson(response)
+
+        assert [r["row"] for r in results] == [1, 2, 3, 4, 5]
+        assert "prediction" in results[0] and "prediction" in results[4]
+        assert "feature_contributions" not in results[0]
+        assert results[1]["error"] == "Invalid JSON"
+        assert results[2]["error"].startswith("age:")
+        assert results[3]["error"] == "Missing feature: thal"
+
+    def test_rows_span_chunks(self, client, sample_input, monkeypatch):
+        """Uploads longer than one chunk should be numbered continuously."""
+        monkeypatch.setattr(settings, "STREAM_CHUNK_ROWS", 4)
+        body = "\n".join(json.dumps(sample_input) for _ in range(10)).encode()
+        response = client.post(
+            "/predict/stream?format=csv",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        results = list(csv.DictReader(io.StringIO(response.text)))
+        assert [int(r["row"]) for r in results] == list(range(1, 11))
+
+    def test_rejects_bad_requests(self, client):
+        """Unknown content types, bad headers and CSV explanations should fail up front."""
+        assert client.post("/predict/stream", content=b"x").status_code == 415
+        response = client.post(
+            "/predict/stream", content=b"age,sex\n1,0\n", headers={"Content-Type": "text/csv"},
+        )
+        assert response.status_code == 422
+        response = client.post(
+            "/predict/stream?explain=fast",
+            content=_csv([]),
+            headers={"Content-Type": "text/csv"},
+        )
+        assert response.status_code == 422
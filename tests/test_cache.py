@@ -0,0 +1,155 @@
+"""
+Prediction Cache Tests.
+
+Tests for LRU/TTL eviction, singleflight and model-version invalidation.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import app.cache as cache_module
+from app.cache import PredictionCache
+
+
+@pytest.fixture(autouse=True)
+def fixed_version(monkeypatch):
+    """Pin the model version so tests control invalidation."""
+    version = {"value": "v1"}
+    monkeypatch.setattr(cache_module, "get_model_version", lambda: version["value"])
+    return version
+
+
+def _vector(value: float) -> np.ndarray:
+    return np.full((1, 13), value)
+
+
+class TestPredictionCache:
+    """Tests for hits, eviction and singleflight."""
+
+    def test_repeat_request_is_served_from_cache(self):
+        """A second identical request should not recompute."""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"prediction": 1}
+
+        async def scenario():
+            cache = PredictionCache(max_entries=10, ttl_seconds=60)
+            first = await cache.get_or_compute(_vector(1.0), "full", compute)
+            second = await cache.get_or_compute(_vector(1.0), "full", compute)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second == {"prediction": 1}
+        assert len(calls) == 1
+
+    def test_explain_mode_is_part_of_key(self):
+        """Results for different explain modes should be cached separately."""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {}
+
+        async def scenario():
+            cache = PredictionCache(max_entries=10, ttl_seconds=60)
+            await cache.get_or_compute(_vector(1.0), "none", compute)
+            await cache.get_or_compute(_vector(1.0), "full", compute)
+
+        asyncio.run(scenario())
+        assert len(calls) == 2
+
+    def test_concurrent_identical_requests_compute_once(self):
+        """Concurrent misses for the same key should share one computation."""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"prediction": 0}
+
+        async def scenario():
+            cache = PredictionCache(max_entries=10, ttl_seconds=60)
+            return await asyncio.gather(
+                *(cache.get_or_compute(_vector(2.0), "full", compute) for _ in range(20))
+            )
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert all(r == {"prediction": 0} for r in results)
+
+    def test_lru_eviction(self):
+        """The least recently used entry should be evicted first."""
+        async def compute():
+            return {}
+
+        async def scenario():
+            cache = PredictionCache(max_entries=2, ttl_seconds=60)
+            for value in (1.0, 2.0):
+                await cache.get_or_compute(_vector(value), "full", compute)
+            await cache.get_or_compute(_vector(1.0), "full", compute)  # touch 1.0
+            await cache.get_or_compute(_vector(3.0), "full", compute)  # evicts 2.0
+            return cache
+
+        cache = asyncio.run(scenario())
+        assert len(cache) == 2
+        assert PredictionCache.key(_vector(2.0), "full", "v1") not in cache._entries
+        assert PredictionCache.key(_vector(1.0), "full", "v1") in cache._entries
+
+    def test_expired_entries_are_recomputed(self):
+        """Entries older than the TTL should not be served."""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {}
+
+        async def scenario():
+            cache = PredictionCache(max_entries=10, ttl_seconds=0.01)
+            await cache.get_or_compute(_vector(1.0), "full", compute)
+            await asyncio.sleep(0.02)
+            await cache.get_or_compute(_vector(1.0), "full", compute)
+
+        asyncio.run(scenario())
+        assert len(calls) == 2
+
+    def test_model_version_change_invalidates(self, fixed_version):
+        """A new model version should empty the cache."""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {}
+
+        async def scenario():
+            cache = PredictionCache(max_entries=10, ttl_seconds=60)
+            await cache.get_or_compute(_vector(1.0), "full", compute)
+            fixed_version["value"] = "v2"
+            await cache.get_or_compute(_vector(1.0), "full", compute)
+            return cache
+
+        cache = asyncio.run(scenario())
+        assert len(calls) == 2
+        assert len(cache) == 1
+
+    def test_failures_are_not_cached(self):
+        """A failed computation should be retried on the next request."""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return {}
+
+        async def scenario():
+            cache = PredictionCache(max_entries=10, ttl_seconds=60)
+            with pytest.raises(RuntimeError):
+                await cache.get_or_compute(_vector(1.0), "full", compute)
+            await cache.get_or_compute(_vector(1.0), "full", compute)
+
+        asyncio.run(scenario())
+        assert len(calls) == 2
@@ -0,0 +1,85 @@
+"""
+Analytics Event Queue Tests.
+
+Tests for the background consumer that records predictions off the
+request path.
+"""
+
+import asyncio
+
+from app.analytics import tracker
+from app.events import ANALYTICS_EVENTS_DROPPED, AnalyticsEvents
+
+
+def _event(prediction: int = 1) -> dict:
+    return {"prediction": prediction, "probability": 0.75, "is_outlier": False, "features": {}}
+
+
+class TestAnalyticsEvents:
+    """Tests for publishing, batching, flushing and dropping events."""
+
+    def test_events_recorded_after_flush(self):
+        """Published events should reach the tracker once flushed."""
+        async def scenario():
+            events = AnalyticsEvents(max_queue=100, max_batch=8)
+            events.start()
+            before = tracker.total
+            events.publish([_event(i % 2) for i in range(20)])
+            assert tracker.total == before  # Nothing recorded on the caller's path
+            await events.flush()
+            assert tracker.total == before + 20
+            await events.stop()
+            assert not events.running
+
+        asyncio.run(scenario())
+
+    def test_full_queue_drops_and_counts(self):
+        """Events beyond the queue bound should be dropped, not block."""
+        async def scenario():
+            events = AnalyticsEvents(max_queue=3)
+            events.start()
+            dropped = ANALYTICS_EVENTS_DROPPED._value.get()
+            before = tracker.total
+            events.publish([_event() for _ in range(5)])  # Consumer has not run yet
+            await events.stop()
+            assert ANALYTICS_EVENTS_DROPPED._value.get() == dropped + 2
+            assert tracker.total == before + 3
+
+        asyncio.run(scenario())
+
+    def test_records_inline_without_consumer(self):
+        """Without a running consumer, publish() should record synchronously."""
+        before = tracker.total
+        AnalyticsEvents().publish([_event()])
+        assert tracker.total == before + 1
+
+    def test_predict_does_not_wait_for_tracker_lock(self, client, sample_input):
+        """/predict should answer while an analytics reader holds the locks."""
+        with tracker.arena.locked():
+            response = client.post("/predict", json=sample_input)
+        assert response.status_code == 200
+
+        before = client.get("/analytics/stats").json()["total_predictions"]
+        client.post("/predict", json=sample_input)
+        assert client.get("/analytics/stats").json()["total_predictions"] == before + 1
+
+    def test_analytics_reader_waits_off_the_event_loop(self, client):
+        """An /analytics request waiting on a tracker lock should not stall other requests."""
+        import threading
+
+        results = {}
+
+        def get(name: str, path: str) -> threading.Thread:
+            thread = threading.Thread(target=lambda: results.update({name: client.get(path)}), daemon=True)
+            thread.start()
+            return thread
+
+        with tracker.arena.locked("counters", "sketch"):
+            reader = get("stats", "/analytics/stats")
+            reader.join(timeout=0.2)
+            assert reader.is_alive()  # Waiting for the counters
+            get("health", "/health").join(timeout=5)
+            answered = "health" in results
+        reader.join(timeout=5)
+        assert answered
+        assert results["stats"].status_code == 200
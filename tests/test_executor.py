@@ -0,0 +1,193 @@
+"""
+Inference Executor & Micro-batching Tests.
+
+Tests for the bounded worker pool that keeps inference off the event loop
+and the micro-batcher that coalesces concurrent predictions.
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from app.batcher import MicroBatcher
+from app.executor import ExecutorSaturatedError, InferenceExecutor
+from ml.predict import features_to_vector
+
+
+class TestInferenceExecutor:
+    """Tests for queue bounds and result delivery."""
+
+    def test_run_returns_result(self):
+        """Calls should run on the pool and return their result."""
+        async def scenario():
+            pool = InferenceExecutor(max_workers=2, max_queue=2)
+            pool.start()
+            try:
+                return await pool.run(sum, [1, 2, 3])
+            finally:
+                pool.shutdown()
+
+        assert asyncio.run(scenario()) == 6
+
+    def test_rejects_when_queue_full(self):
+        """Calls beyond workers + queue should fail fast."""
+        release = threading.Event()
+
+        async def scenario():
+            pool = InferenceExecutor(max_workers=1, max_queue=1)
+            pool.start()
+            try:
+                running = asyncio.ensure_future(pool.run(release.wait, 5))
+                queued = asyncio.ensure_future(pool.run(release.wait, 5))
+                await asyncio.sleep(0.05)
+                assert pool.stats() == {"queue_depth": 1, "in_flight": 1}
+
+                with pytest.raises(ExecutorSaturatedError):
+                    await pool.run(release.wait, 5)
+
+                release.set()
+                await asyncio.gather(running, queued)
+                assert pool.stats() == {"queue_depth": 0, "in_flight": 0}
+            finally:
+                release.set()
+                pool.shutdown()
+
+        asyncio.run(scenario())
+
+    def test_cancelled_caller_keeps_slot_until_job_finishes(self):
+        """Cancelling the awaiting request should not free the slot while the job runs."""
+        release = threading.Event()
+
+        async def scenario():
+            pool = InferenceExecutor(kind="thread", max_workers=1, max_queue=4)
+            pool.start()
+            caller = asyncio.create_task(pool.run(release.wait, 10))
+            while pool.stats()["in_flight"] == 0:
+                await asyncio.sleep(0.01)
+
+            caller.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await caller
+            held = (pool.stats()["in_flight"], pool._slots.locked())
+
+            release.set()
+            result = await asyncio.wait_for(pool.run(lambda: "next"), timeout=5)
+            pool.shutdown()
+            return held, result
+
+        held, result = asyncio.run(scenario())
+        assert held == (1, True)
+        assert result == "next"
+
+    def test_process_pool_replays_stage_timings(self, sample_input):
+        """Stages timed in a worker process should reach this process's metrics."""
+        from prometheus_client import REGISTRY
+        from ml.predict import predict_batch
+
+        def forest_calls():
+            return REGISTRY.get_sample_value("prediction_stage_seconds_count", {"stage": "forest"}) or 0
+
+        async def scenario():
+            pool = InferenceExecutor(kind="process", max_workers=1, max_queue=1)
+            pool.start()
+            try:
+                return await pool.run(predict_batch, [sample_input] * 3, "none")
+            finally:
+                pool.shutdown()
+
+        before = forest_calls()
+        results = asyncio.run(scenario())
+
+        assert len(results) == 3 and "prediction" in results[0]
+        assert forest_calls() == before + 1
+
+    def test_invalid_kind_rejected(self):
+        """Unknown executor kinds should raise ValueError."""
+        with pytest.raises(ValueError):
+            InferenceExecutor(kind="gpu")
+
+
+class TestMicroBatcher:
+    """Tests for coalescing concurrent rows into one batch."""
+
+    def test_concurrent_rows_share_one_batch(self, sample_input, monkeypatch):
+        """Rows submitted together should be scored in a single call."""
+        import app.batcher as batcher_module
+
+        calls = []
+
+        def fake_predict_batch(rows, explain):
+            calls.append(len(rows))
+            return [{"prediction": int(row[0])} for row in rows]
+
+        monkeypatch.setattr(batcher_module, "predict_batch", fake_predict_batch)
+
+        async def scenario():
+            batcher = MicroBatcher(max_batch_size=64, max_wait_ms=20)
+            rows = [features_to_vector({**sample_input, "age": age})[0] for age in range(10)]
+            return await asyncio.gather(*(batcher.submit(r) for r in rows))
+
+        results = asyncio.run(scenario())
+
+        assert calls == [10]
+        assert [r["prediction"] for r in results] == list(range(10))
+
+    def test_full_batch_dispatches_immediately(self, sample_input, monkeypatch):
+        """Reaching max_batch_size should not wait for the window."""
+        import app.batcher as batcher_module
+
+        calls = []
+        monkeypatch.setattr(
+            batcher_module, "predict_batch",
+            lambda rows, explain: calls.append(len(rows)) or [{} for _ in rows],
+        )
+
+        async def scenario():
+            batcher = MicroBatcher(max_batch_size=4, max_wait_ms=10_000)
+            vector = features_to_vector(sample_input)[0]
+            await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit(vector) for _ in range(8))),
+                timeout=5,
+            )
+
+        asyncio.run(scenario())
+        assert calls == [4, 4]
+
+    def test_rows_are_batched_per_explain_mode(self, sample_input, monkeypatch):
+        """Rows with different explain modes should go to separate batches."""
+        import app.batcher as batcher_module
+
+        calls = []
+        monkeypatch.setattr(
+            batcher_module, "predict_batch",
+            lambda rows, explain: calls.append((explain, len(rows))) or [{} for _ in rows],
+        )
+
+        async def scenario():
+            batcher = MicroBatcher(max_batch_size=64, max_wait_ms=5)
+            vector = features_to_vector(sample_input)[0]
+            await asyncio.gather(
+                batcher.submit(vector, explain="none"),
+                batcher.submit(vector, explain="full"),
+                batcher.submit(vector, explain="none"),
+            )
+
+        asyncio.run(scenario())
+        assert sorted(calls) == [("full", 1), ("none", 2)]
+
+    def test_row_errors_raise_for_that_caller(self, sample_input):
+        """A row rejected by predict_batch should fail only its own caller."""
+        async def scenario():
+            batcher = MicroBatcher(max_batch_size=64, max_wait_ms=5)
+            vector = features_to_vector(sample_input)[0]
+            return await asyncio.gather(
+                batcher.submit(vector),
+                batcher.submit(np.full_like(vector, np.nan)),
+                return_exceptions=True,
+            )
+
+        good, bad = asyncio.run(scenario())
+        assert good["prediction"] in [0, 1]
+        assert isinstance(bad, ValueError)
@@ -0,0 +1,213 @@
+"""
+Batch-Scoring Job Tests.
+
+Tests for the job queue: checkpointed runs, resuming after a restart and
+the /jobs endpoints.
+"""
+
+import asyncio
+import io
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+import app.jobs
+import ml.score
+from app.jobs import JobError, JobManager, _read, _write, available_cpus, job_manager, run_job
+from ml.score import score_file
+
+
+@pytest.fixture
+def manager(tmp_path, registry):
+    """A JobManager reading the registry's directory, scoring 30 rows per chunk."""
+    return JobManager(str(tmp_path / "jobs"), str(registry[0].parent), nice=0, chunk_rows=30)
+
+
+def _result(manager: JobManager, job_id: str) -> bytes:
+    return b"".join(manager.result_parts(job_id))
+
+
+class TestRunJob:
+    """Tests for running and resuming jobs in-process."""
+
+    @pytest.mark.parametrize("registry", [100, 120], indirect=True)  # Short and full last chunk
+    def test_completed_job_matches_score_file(self, manager, registry, tmp_path):
+        """Concatenated parts should equal a one-shot ml.score run."""
+        path, frame = registry
+        os.makedirs(manager.directory)
+        job = manager.submit_path("registry.csv")
+        run_job(manager._dir(job["job_id"]))
+        score_file(str(path), str(tmp_path / "expected.csv"), workers=1, chunk_rows=30, verbose=False)
+
+        status = manager.status(job["job_id"])
+        assert status["status"] == "completed"
+        assert status["rows_done"] == status["rows_total"] == len(frame)
+        assert status["progress"] == 1.0
+        assert _result(manager, job["job_id"]) == (tmp_path / "expected.csv").read_bytes()
+
+    def test_resume_skips_checkpointed_parts(self, manager, monkeypatch):
+        """A restarted job should only score the chunks after its checkpoint."""
+        os.makedirs(manager.directory)
+        done = manager.submit_path("registry.csv")["job_id"]
+        run_job(manager._dir(done))
+
+        # A job interrupted after two of its four chunks
+        resumed = manager.submit_path("registry.csv")["job_id"]
+        shutil.copytree(os.path.join(manager._dir(done), "parts"), os.path.join(manager._dir(resumed), "parts"))
+        os.remove(os.path.join(manager._dir(resumed), "parts", "00002.csv"))
+        os.remove(os.path.join(manager._dir(resumed), "parts", "00003.csv"))
+        job = _read(manager._dir(resumed))
+        job.update(status="running", rows_total=120, rows_done=60, parts_done=2)
+        _write(manager._dir(resumed), job)
+
+        scored = []
+        original = ml.score.score_chunk
+
+        def counting(frame, first_row, *args):
+            scored.append(first_row)
+            return original(frame, first_row, *args)
+
+        monkeypatch.setattr(ml.score, "score_chunk", counting)
+        run_job(manager._dir(resumed))
+
+        assert scored == [61, 91]
+        assert _result(manager, resumed) == _result(manager, done)
+
+    def test_restart_requeues_unfinished_jobs(self, manager):
+        """start() should queue jobs a previous process left queued or running."""
+        os.makedirs(manager.directory)
+        job_id = manager.submit_path("registry.csv")["job_id"]
+        restarted = JobManager(manager.directory, manager.input_dir, nice=0)
+
+        async def start():
+            restarted.start()
+            queued = list(restarted._queue) + list(restarted._running)
+            await restarted.stop()
+            return queued
+
+        assert asyncio.run(start()) == [job_id]
+
+    def test_failed_input(self, manager, tmp_path):
+        """A job whose input lacks feature columns should fail with the reason."""
+        os.makedirs(manager.directory)
+        pd.DataFrame({"age": [50]}).to_csv(os.path.join(manager.input_dir, "bad.csv"), index=False)
+        job = manager.submit_path("bad.csv")
+        run_job(manager._dir(job["job_id"]))
+
+        status = manager.status(job["job_id"])
+        assert status["status"] == "failed"
+        assert "missing column" in status["error"]
+
+    def test_workers_follow_cgroup_quota(self, tmp_path, monkeypatch):
+        """The CPU share should apply to the container's quota, not the host's cores."""
+        cpu_max = tmp_path / "cpu.max"
+        monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(16)))
+        monkeypatch.setattr(app.jobs, "CPU_MAX_PATH", str(cpu_max))
+
+        cpu_max.write_text("50000 100000\n")
+        assert available_cpus(str(cpu_max)) == 0.5
+        assert JobManager(str(tmp_path), str(tmp_path), cpu_share=0.5).workers == 1
+
+        cpu_max.write_text("400000 100000\n")
+        assert JobManager(str(tmp_path), str(tmp_path), cpu_share=0.5).workers == 2
+
+        cpu_max.write_text("max 100000\n")
+        assert JobManager(str(tmp_path), str(tmp_path), cpu_share=0.5).workers == 8
+        assert available_cpus(str(tmp_path / "missing")) == 16
+
+    def test_slots_are_shared_by_api_workers(self, tmp_path, monkeypatch):
+        """Managers on one JOBS_DIR (one per uvicorn worker) should share the job limit."""
+        monkeypatch.setattr(app.jobs, "available_cpus", lambda: 4.0)
+        first = JobManager(str(tmp_path), str(tmp_path), cpu_share=0.5)
+        second = JobManager(str(tmp_path), str(tmp_path), cpu_share=0.5)
+
+        held = [first._claim_slot(), first._claim_slot()]
+        assert None not in held and second._claim_slot() is None
+        os.close(held.pop())
+        slot = second._claim_slot()
+        assert slot is not None
+        for fd in (*held, slot):
+            os.close(fd)
+
+        monkeypatch.setattr(app.jobs, "available_cpus", lambda: 0.5)
+        small = JobManager(str(tmp_path), str(tmp_path), cpu_share=0.5)
+        assert (small.workers, small.job_cpu) == (1, 0.25)  # One job, throttled
+
+    def test_crashed_job_resumes_until_attempts_run_out(self, manager):
+        """A job whose process dies should be requeued from its checkpoint, then failed."""
+        os.makedirs(manager.directory)
+        job_id = manager.submit_path("registry.csv")["job_id"]
+        manager._queue.clear()
+        crashed = type("Crashed", (), {"exitcode": -9, "is_alive": lambda self: False})()
+
+        for attempt in range(1, manager.max_attempts + 1):
+            job = _read(manager._dir(job_id))
+            job.update(status="running", attempts=attempt)
+            _write(manager._dir(job_id), job)
+            manager._running[job_id] = (crashed, os.open(os.devnull, os.O_RDONLY))
+            manager._reap()
+            if attempt < manager.max_attempts:
+                assert list(manager._queue) == [job_id]
+                manager._queue.clear()
+
+        assert not manager._queue
+        assert manager.status(job_id)["status"] == "failed"
+
+    def test_input_path_must_stay_inside_input_dir(self, manager):
+        """Paths escaping JOBS_INPUT_DIR or naming no file should be refused."""
+        os.makedirs(manager.directory)
+        with pytest.raises(JobError):
+            manager.submit_path("../../etc/passwd")
+        with pytest.raises(JobError):
+            manager.submit_path("missing.csv")
+
+
+class TestJobEndpoints:
+    """Tests for /jobs."""
+
+    def test_upload_runs_to_completion(self, client, registry):
+        """An uploaded CSV should be scored by a job process and downloadable."""
+        path, frame = registry
+        response = client.post(
+            "/jobs", content=path.read_bytes(), headers={"Content-Type": "text/csv"},
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.headers["location"] == f"/jobs/{job_id}"
+
+        deadline = time.monotonic() + 60
+        while (status := client.get(f"/jobs/{job_id}").json())["status"] in ("queued", "running"):
+            assert time.monotonic() < deadline, "job did not finish"
+            time.sleep(0.2)
+        assert status["status"] == "completed", status
+
+        result = client.get(f"/jobs/{job_id}/result")
+        scores = pd.read_csv(io.StringIO(result.text))
+        assert len(scores) == len(frame)
+        assert scores["row"].tolist() == list(range(1, len(frame) + 1))
+
+    def test_rejects_bad_requests(self, client):
+        """Unknown jobs, unsupported bodies and escaping paths should be refused."""
+        assert client.get("/jobs/0123").status_code == 404
+        assert client.get(f"/jobs/{'0' * 32}/result").status_code == 404
+        assert client.post("/jobs", content=b"x", headers={"Content-Type": "text/plain"}).status_code == 415
+        response = client.post("/jobs", json={"input_path": "../../etc/passwd"})
+        assert response.status_code == 422
+
+    def test_upload_over_limit_rejected(self, client, monkeypatch):
+        """An upload beyond JOBS_UPLOAD_MAX_BYTES should be a 413 and leave no job behind."""
+        before = set(os.listdir(job_manager.directory))
+        monkeypatch.setattr(job_manager, "upload_max_bytes", 64)
+        response = client.post("/jobs", content=b"age,sex\n" * 20, headers={"Content-Type": "text/csv"})
+        assert response.status_code == 413
+        assert set(os.listdir(job_manager.directory)) == before
+
+    def test_result_before_completion(self, client):
+        """Asking for the result of an unfinished job should be a 409."""
+        job_id, job = job_manager._create(None, "none", None)
+        _write(job_manager._dir(job_id), job)
+
+        assert client.get(f"/jobs/{job_id}/result").status_code == 409
@@ -98,3 +98,229 @@ class TestModelPrediction:
     def test_scaler_feature_count(self):
         """Scaler should be fitted on 13 features."""
         assert self.scaler.n_features_in_ == 13
+
+
+class TestBatchPrediction:
+    """Tests for the vectorised ``ml.predict.predict_batch`` path."""
+
+    SAMPLES = [
+        [52, 1, 0, 125, 212, 0, 1, 168, 0, 1.0, 2, 2, 3],
+        [45, 0, 1, 130, 250, 1, 0, 150, 1, 2.3, 1, 0, 2],
+        [68, 1, 2, 180, 300, 0, 2, 120, 0, 0.5, 0, 3, 1],
+    ]
+
+    def test_batch_matches_single_predictions(self):
+        """Each batch row should equal the single-row prediction."""
+        from ml.predict import predict, predict_batch
+
+        rows = [dict(zip(FEATURE_NAMES, s)) for s in self.SAMPLES]
+        batch = predict_batch(rows)
+
+        assert len(batch) == len(rows)
+        for row, result in zip(rows, batch):
+            single = predict(row)
+            assert result["prediction"] == single["prediction"]
+            assert result["probability"] == single["probability"]
+            assert result["is_outlier"] == single["is_outlier"]
+            assert result["anomaly_score"] == single["anomaly_score"]
+
+    def test_batch_accepts_ndarray(self):
+        """An ndarray input should give the same results as dict rows."""
+        from ml.predict import predict_batch
+
+        rows = [dict(zip(FEATURE_NAMES, s)) for s in self.SAMPLES]
+        assert predict_batch(np.array(self.SAMPLES, dtype=float)) == predict_batch(rows)
+
+    def test_batch_reports_invalid_rows_in_place(self):
+        """Invalid rows should yield an error entry at their own index."""
+        from ml.predict import predict_batch
+
+        good = dict(zip(FEATURE_NAMES, self.SAMPLES[0]))
+        results = predict_batch([good, {"age": 52}, {**good, "chol": "high"}, good])
+
+        assert "prediction" in results[0]
+        assert "error" in results[1]
+        assert "error" in results[2]
+        assert results[3]["prediction"] == results[0]["prediction"]
+
+    def test_feature_contributions_populated(self):
+        """SHAP contributions should be returned for every feature."""
+        from ml.predict import predict_batch
+
+        result = predict_batch([dict(zip(FEATURE_NAMES, self.SAMPLES[0]))])[0]
+        if result["feature_contributions"]:
+            assert set(result["feature_contributions"]) == set(FEATURE_NAMES)
+
+
+class TestCompiledForest:
+    """Parity tests for the array-backed forest engine."""
+
+    @pytest.fixture(autouse=True)
+    def load_model(self):
+        """Load model, scaler and the scaled training set."""
+        from ml.train import load_data
+
+        self.model = joblib.load(MODEL_PATH)
+        scaler = joblib.load(SCALER_PATH)
+        X, _ = load_data()
+        self.X_scaled = scaler.transform(X)
+
+    def test_probabilities_match_sklearn(self):
+        """Compiled probabilities should equal scikit-learn's on the training set."""
+        from ml.forest import CompiledForest
+
+        forest = CompiledForest.from_sklearn(self.model)
+        np.testing.assert_allclose(
+            forest.predict_proba(self.X_scaled),
+            self.model.predict_proba(self.X_scaled),
+            rtol=0, atol=1e-12,
+        )
+
+    def test_predictions_match_sklearn(self):
+        """Compiled class labels should equal scikit-learn's on the training set."""
+        from ml.forest import CompiledForest
+
+        forest = CompiledForest.from_sklearn(self.model)
+        np.testing.assert_array_equal(
+            forest.predict(self.X_scaled), self.model.predict(self.X_scaled),
+        )
+
+    def test_single_row_matches_batch(self):
+        """Scoring one row should give the same result as scoring it in a batch."""
+        from ml.forest import CompiledForest
+
+        forest = CompiledForest.from_sklearn(self.model)
+        batch = forest.predict_proba(self.X_scaled[:5])
+        for i in range(5):
+            np.testing.assert_array_equal(forest.predict_proba(self.X_scaled[i:i + 1])[0], batch[i])
+
+    def test_contributions_sum_to_probability(self):
+        """Fast contributions plus bias should reproduce the probability."""
+        from ml.forest import CompiledForest
+
+        forest = CompiledForest.from_sklearn(self.model)
+        contributions = forest.contributions(self.X_scaled)
+        np.testing.assert_allclose(
+            contributions.sum(axis=1) + forest.bias,
+            forest.predict_proba(self.X_scaled)[:, 1],
+            atol=1e-9,
+        )
+
+    def test_backends_agree(self):
+        """predict() should return the same result on either backend."""
+        from ml.predict import predict, set_backend
+
+        features = dict(zip(FEATURE_NAMES, [52, 1, 0, 125, 212, 0, 1, 168, 0, 1.0, 2, 2, 3]))
+        try:
+            set_backend("sklearn")
+            expected = predict(features)
+            set_backend("compiled")
+            assert predict(features) == expected
+        finally:
+            set_backend("compiled")
+
+    def test_unknown_backend_rejected(self):
+        """Selecting an unknown backend should raise ValueError."""
+        from ml.predict import set_backend
+
+        with pytest.raises(ValueError):
+            set_backend("gpu")
+
+
+class TestCompiledArtifacts:
+    """Parity tests for the compiled outlier detector and the mmap store."""
+
+    @pytest.fixture(autouse=True)
+    def load_artifacts(self):
+        """Load the pickled estimators and the raw training set."""
+        from ml.train import OUTLIER_DETECTOR_PATH, load_data
+
+        self.model = joblib.load(MODEL_PATH)
+        self.scaler = joblib.load(SCALER_PATH)
+        self.detector = joblib.load(OUTLIER_DETECTOR_PATH)
+        X, _ = load_data()
+        self.X = X.to_numpy(dtype=np.float64)
+        self.expected_scores = self.detector.decision_function(X)
+
+    def test_isolation_forest_matches_sklearn(self):
+        """Compiled anomaly scores should equal IsolationForest's."""
+        from ml.forest import CompiledIsolationForest
+
+        compiled = CompiledIsolationForest.from_sklearn(self.detector)
+        np.testing.assert_allclose(
+            compiled.decision_function(self.X), self.expected_scores, rtol=0, atol=1e-12,
+        )
+
+    def test_store_round_trip_is_memory_mapped(self, tmp_path):
+        """An exported store should load as read-only memory maps with parity."""
+        from ml.artifacts import export_compiled, load_compiled
+
+        directory = str(tmp_path / "compiled")
+        export_compiled(self.model, self.scaler, self.detector, version="v1", directory=directory)
+        store = load_compiled("v1", directory=directory)
+
+        assert isinstance(store.forest.value, np.memmap)
+        assert isinstance(store.detector.value, np.memmap)
+        X_scaled = (self.X - store.scale_mean) / store.scale_std
+        np.testing.assert_allclose(
+            store.forest.predict_proba(X_scaled),
+            self.model.predict_proba(self.scaler.transform(self.X)),
+            rtol=0, atol=1e-12,
+        )
+        np.testing.assert_allclose(
+            store.detector.decision_function(self.X), self.expected_scores, rtol=0, atol=1e-12,
+        )
+
+    def test_stale_store_is_ignored(self, tmp_path):
+        """A store compiled from other pickles should not be loaded."""
+        from ml.artifacts import export_compiled, load_compiled
+
+        directory = str(tmp_path / "compiled")
+        export_compiled(self.model, self.scaler, version="v1", directory=directory)
+        assert load_compiled("v2", directory=directory) is None
+
+    def test_re_export_replaces_store(self, tmp_path):
+        """Exporting over an existing store should swap it for the new one."""
+        from ml.artifacts import export_compiled, load_compiled
+
+        directory = str(tmp_path / "compiled")
+        export_compiled(self.model, self.scaler, version="v1", directory=directory)
+        export_compiled(self.model, self.scaler, self.detector, version="v2", directory=directory)
+        store = load_compiled("v2", directory=directory)
+        assert store is not None and store.detector is not None
+        assert sorted(os.listdir(tmp_path)) == ["compiled"]
+
+    def test_prune_skips_stores_in_use(self, tmp_path):
+        """A store some process still maps should survive pruning until released."""
+        import gc
+
+        from ml.artifacts import export_compiled, load_compiled, prune_compiled
+
+        for version in ("v1", "v2"):
+            export_compiled(self.model, self.scaler, version=version, directory=str(tmp_path / version))
+        store = load_compiled("v1", directory=str(tmp_path / "v1"))
+
+        assert prune_compiled(keep=set(), directory=str(tmp_path)) == ["v2"]
+        assert store.forest.predict_proba(self.X[:1]).shape == (1, 2)
+        del store
+        gc.collect()
+        assert prune_compiled(keep=set(), directory=str(tmp_path)) == ["v1"]
+
+    def test_build_is_versioned_by_the_pickles_it_read(self, monkeypatch):
+        """A retrain between fingerprinting and loading should not mix versions."""
+        import ml.artifacts as artifacts
+        from ml.train import OUTLIER_DETECTOR_PATH
+
+        sources = artifacts.read_sources()
+        del sources[OUTLIER_DETECTOR_PATH]  # As if the files changed after this read
+        built = []
+        monkeypatch.setattr(artifacts, "_store", None)
+        monkeypatch.setattr(artifacts, "load_compiled", lambda version=None, directory=None: None)
+        monkeypatch.setattr(
+            artifacts, "export_compiled",
+            lambda model, scaler, detector=None, version=None: built.append((version, detector)),
+        )
+
+        artifacts.load_or_build(artifacts.fingerprint(), sources)
+        assert built == [(artifacts.fingerprint(sources=sources), None)]
+        assert built[0][0] != artifacts.fingerprint()
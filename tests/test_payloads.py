@@ -0,0 +1,99 @@
+"""
+Model Payload Tests.
+
+Tests for pre-serialised /model/* responses: ETags, 304s, content
+encodings and invalidation.
+"""
+
+import gzip
+import json
+
+from app.payloads import Payload, PayloadCache
+
+
+class TestPayload:
+    """Tests for serialisation, negotiation and ETag matching."""
+
+    DOCUMENT = {"features": [{"name": f"f{i}", "importance": i / 100} for i in range(100)]}
+
+    def test_variants_decode_to_document(self):
+        """Every encoding should carry the same document, under distinct ETags."""
+        payload = Payload("test", self.DOCUMENT)
+
+        assert json.loads(payload.variants["identity"]) == self.DOCUMENT
+        assert json.loads(gzip.decompress(payload.variants["gzip"])) == self.DOCUMENT
+        assert len(set(payload.etags.values())) == len(payload.variants)
+        assert Payload("test", self.DOCUMENT).etags == payload.etags
+
+    def test_small_payloads_are_not_compressed(self):
+        """Bodies under MIN_COMPRESS_BYTES should only be served as identity."""
+        payload = Payload("test", {"features": []})
+        assert list(payload.variants) == ["identity"]
+        assert payload.negotiate("gzip, br") == "identity"
+
+    def test_negotiate(self):
+        """Encodings refused with q=0 or not offered should be skipped."""
+        payload = Payload("test", self.DOCUMENT)
+
+        assert payload.negotiate("gzip, deflate") == "gzip"
+        assert payload.negotiate("gzip;q=0, deflate") == "identity"
+        assert payload.negotiate("") == "identity"
+
+    def test_if_none_match(self):
+        """Any variant's tag, weak or strong, or * should match."""
+        payload = Payload("test", self.DOCUMENT)
+
+        assert payload.matches(payload.etags["identity"])
+        assert payload.matches(f'"other", W/{payload.etags["gzip"]}')
+        assert payload.matches("*")
+        assert not payload.matches('"other"')
+        assert not payload.matches(None)
+
+    def test_cache_rebuilds_on_new_version(self):
+        """A payload should be built once per version key."""
+        builds = []
+        cache = PayloadCache()
+
+        def build():
+            builds.append(1)
+            return {"n": len(builds)}
+
+        first = cache.get("test", "v1", build)
+        assert cache.get("test", "v1", build) is first
+        assert cache.get("test", "v2", build) is not first
+        cache.clear()
+        cache.get("test", "v2", build)
+        assert len(builds) == 3
+
+
+class TestModelEndpoints:
+    """Tests for ETag handling on /model/performance and /model/feature-importance."""
+
+    def test_not_modified(self, client):
+        """Re-sending the ETag should get a bodyless 304."""
+        for path in ("/model/performance", "/model/feature-importance"):
+            response = client.get(path)
+            if response.status_code == 404:
+                continue
+            etag = response.headers["etag"]
+            assert response.headers["vary"] == "Accept-Encoding"
+
+            again = client.get(path, headers={"If-None-Match": etag})
+            assert again.status_code == 304
+            assert again.content == b""
+            assert again.headers["etag"] == etag
+
+    def test_feature_importance_sorted(self, client):
+        """Features should still come back by descending importance."""
+        response = client.get("/model/feature-importance", headers={"Accept-Encoding": "identity"})
+        if response.status_code == 200:
+            values = [f["importance"] for f in response.json()["features"]]
+            assert values == sorted(values, reverse=True)
+
+    def test_gzip_variant(self, client):
+        """Clients accepting gzip should get the pre-compressed body."""
+        response = client.get("/model/performance", headers={"Accept-Encoding": "gzip"})
+        if response.status_code == 200:
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.headers["etag"].endswith('-gzip"')
+            assert "models" in response.json()  # httpx decompresses
@@ -0,0 +1,143 @@
+"""
+Model Hot-Reload Tests.
+
+Tests for bundle swapping, the /admin/reload endpoint and version
+reporting in /health and /predict.
+"""
+
+import copy
+
+import pytest
+
+import app.reload as reload_module
+from app.config import settings
+from ml.bundle import activate, current_bundle
+
+
+@pytest.fixture
+def restore_bundle():
+    """Reactivate the original bundle after a test swaps it out."""
+    original = current_bundle()
+    yield original
+    activate(original)
+
+
+@pytest.fixture
+def new_bundle(monkeypatch, restore_bundle):
+    """Make the next reload produce a bundle with a different version."""
+    bundle = copy.copy(restore_bundle)
+    bundle.version = "retrained01"
+    monkeypatch.setattr(reload_module, "_load_and_warm", lambda: (bundle, {"total": 0.01}))
+    monkeypatch.setattr(reload_module, "prune_compiled", lambda keep: [])
+    return bundle
+
+
+class TestVersionReporting:
+    """Tests for the served model version in responses."""
+
+    def test_health_reports_model_version(self, client):
+        """/health should expose the active bundle's version."""
+        data = client.get("/health").json()
+        assert data["model_version"] == current_bundle().version
+
+    def test_prediction_reports_model_version(self, client, sample_input):
+        """Every prediction should carry the version that produced it."""
+        data = client.post("/predict", json=sample_input).json()
+        assert data["model_version"] == current_bundle().version
+
+
+class TestAdminReload:
+    """Tests for POST /admin/reload."""
+
+    def test_reload_unchanged_artifacts(self, client):
+        """Reloading identical artifacts should keep the same version."""
+        version = current_bundle().version
+        response = client.post("/admin/reload")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "unchanged"
+        assert data["model_version"] == version
+
+    def test_reload_swaps_bundle(self, client, sample_input, new_bundle, restore_bundle):
+        """A new version should serve the next request."""
+        response = client.post("/admin/reload")
+
+        assert response.json()["status"] == "reloaded"
+        assert response.json()["previous_version"] == restore_bundle.version
+        assert current_bundle() is new_bundle
+        data = client.post("/predict", json=sample_input).json()
+        assert data["model_version"] == "retrained01"
+
+    def test_reload_drops_model_payloads(self, client, new_bundle):
+        """A swap should clear the pre-serialised /model/* payloads."""
+        from app.payloads import model_payloads
+
+        model_payloads.get("feature-importance", "old", dict)
+        client.post("/admin/reload")
+        assert "feature-importance" not in model_payloads._entries
+
+    def test_failed_reload_keeps_serving(self, client, monkeypatch, restore_bundle):
+        """A reload error should leave the previous bundle active."""
+        def broken():
+            raise ValueError("corrupt pickle")
+
+        monkeypatch.setattr(reload_module, "_load_and_warm", broken)
+        response = client.post("/admin/reload")
+
+        assert response.status_code == 500
+        assert current_bundle() is restore_bundle
+
+    def test_admin_token_required_when_set(self, client, monkeypatch):
+        """With ADMIN_TOKEN set, calls without the token should be refused."""
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+
+        assert client.post("/admin/reload").status_code == 403
+        response = client.post("/admin/reload", headers={"X-Admin-Token": "s3cret"})
+        assert response.status_code == 200
+
+
+class TestBundleSwap:
+    """Tests for in-flight isolation of the atomic swap."""
+
+    def test_held_bundle_survives_swap(self, restore_bundle):
+        """A call holding the old bundle should finish on it after a swap."""
+        from ml.predict import predict
+        from ml.train import FEATURE_NAMES
+
+        features = dict(zip(FEATURE_NAMES, [52, 1, 0, 125, 212, 0, 1, 168, 0, 1.0, 2, 2, 3]))
+        held = current_bundle()
+        replacement = copy.copy(held)
+        replacement.version = "retrained01"
+        activate(replacement)
+
+        assert predict(features, explain="none", bundle=held)["model_version"] == held.version
+        assert predict(features, explain="none")["model_version"] == "retrained01"
+
+
+class TestWatcher:
+    """Tests for the models/ polling watcher."""
+
+    def test_reloads_once_change_settles(self, monkeypatch):
+        """A changed, then stable, signature should trigger one reload."""
+        import asyncio
+
+        from app.reload import ModelReloader
+
+        signatures = iter(["a", "a", "b", "b", "b", "b", "b", "b"])
+        reloads = []
+        reloader = ModelReloader(interval=0.001)
+        monkeypatch.setattr(reloader, "_signature", lambda: next(signatures, "b"))
+
+        async def fake_reload(trigger="admin"):
+            reloads.append(trigger)
+
+        monkeypatch.setattr(reloader, "reload", fake_reload)
+
+        async def scenario():
+            reloader.start()
+            await asyncio.sleep(0.05)
+            reloader.stop()
+
+        asyncio.run(scenario())
+        assert reloads == ["watch"]
@@ -0,0 +1,92 @@
+"""
+Offline Scoring Tests.
+
+Tests for python -m ml.score: agreement with ml.predict, determinism
+across worker counts, downcasting and input errors.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.predict import predict
+from ml.score import downcast, score_file
+from ml.train import FEATURE_NAMES
+
+
+class TestScoreFile:
+    """Tests for score_file()."""
+
+    def test_matches_predict_row_for_row(self, registry, tmp_path):
+        """Every output row should equal ml.predict.predict on the same input."""
+        path, frame = registry
+        out = tmp_path / "scores.csv"
+        summary = score_file(str(path), str(out), workers=1, chunk_rows=32, id_column="patient_id", verbose=False)
+        scores = pd.read_csv(out)
+
+        assert summary["rows"] == len(frame) and summary["invalid"] == 1
+        assert scores["patient_id"].tolist() == frame["patient_id"].tolist()
+        assert scores.loc[7, "error"] == "Non-finite feature value"
+        for i in (0, 1, 50, 119):
+            expected = predict(frame.loc[i, FEATURE_NAMES].to_dict(), explain="none")
+            row = scores.loc[i]
+            assert row["prediction"] == expected["prediction"]
+            assert row["probability"] == expected["probability"]
+            assert row["anomaly_score"] == expected["anomaly_score"]
+            assert bool(row["is_outlier"]) == expected["is_outlier"]
+            assert row["model_version"] == expected["model_version"]
+
+    def test_deterministic_across_workers(self, registry, tmp_path):
+        """A process pool should write the same bytes as in-process scoring."""
+        path, _ = registry
+        single, pooled = tmp_path / "single.csv", tmp_path / "pooled.csv"
+        score_file(str(path), str(single), workers=1, chunk_rows=25, verbose=False)
+        score_file(str(path), str(pooled), workers=2, chunk_rows=25, verbose=False)
+
+        assert single.read_bytes() == pooled.read_bytes()
+
+    def test_explain_adds_contribution_columns(self, registry, tmp_path):
+        """--explain fast should add one contrib_ column per feature, not SHAP-labelled ones."""
+        path, _ = registry
+        out = tmp_path / "explained.csv"
+        score_file(str(path), str(out), workers=1, chunk_rows=64, explain="fast", verbose=False)
+        columns = pd.read_csv(out, nrows=1).columns
+
+        assert [c for c in columns if c.startswith("contrib_")] == [f"contrib_{n}" for n in FEATURE_NAMES]
+        assert not [c for c in columns if c.startswith("shap_")]
+
+    def test_missing_columns(self, tmp_path):
+        """An input without every feature should fail before scoring."""
+        path = tmp_path / "partial.csv"
+        pd.DataFrame({"age": [50]}).to_csv(path, index=False)
+
+        with pytest.raises(ValueError, match="missing column"):
+            score_file(str(path), str(tmp_path / "out.csv"), workers=1, verbose=False)
+
+    def test_parquet_round_trip(self, registry, tmp_path):
+        """Parquet input and output should carry the same scores as CSV."""
+        pytest.importorskip("pyarrow")
+        path, frame = registry
+        source = tmp_path / "registry.parquet"
+        frame.to_parquet(source)
+        score_file(str(source), str(tmp_path / "scores.parquet"), workers=1, verbose=False)
+        score_file(str(path), str(tmp_path / "scores.csv"), workers=1, verbose=False)
+
+        parquet = pd.read_parquet(tmp_path / "scores.parquet")
+        csv = pd.read_csv(tmp_path / "scores.csv")
+        assert parquet["probability"].tolist()[:7] == csv["probability"].tolist()[:7]
+
+
+class TestDowncast:
+    """Tests for lossless dtype downcasting."""
+
+    def test_only_integer_valued_columns_shrink(self, sample_input):
+        """Integer-valued columns should shrink; fractional or missing ones stay float64."""
+        frame = pd.DataFrame([sample_input] * 3).astype(np.float64)
+        frame["oldpeak"] = [0.5, 1.0, 2.3]
+        frame.loc[1, "chol"] = np.nan
+        frame = downcast(frame)
+
+        assert frame["age"].dtype == np.int8
+        assert frame["chol"].dtype == np.float64
+        assert frame["oldpeak"].dtype == np.float64
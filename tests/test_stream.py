@@ -0,0 +1,123 @@
+"""
+Live Analytics Stream Tests.
+
+Tests for coalescing, fan-out and backpressure of ``/analytics/stream``.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.stream import AnalyticsBroadcaster, StreamFull
+
+
+def _records(n: int, prediction: int = 1) -> list[dict]:
+    return [{"prediction": prediction, "probability": 0.8, "is_outlier": False}] * n
+
+
+def _parse(message: bytes) -> tuple[str, dict]:
+    """(event name, data) of one SSE message."""
+    fields = dict(line.split(": ", 1) for line in message.decode().strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+
+class TestAnalyticsBroadcaster:
+    """Tests for the single-producer, many-subscriber broadcaster."""
+
+    def test_updates_are_coalesced_and_fanned_out(self):
+        """Notifications within one interval should become one shared frame."""
+        async def scenario():
+            stream = AnalyticsBroadcaster(interval_ms=50)
+            first, second = stream.subscribe(), stream.subscribe()
+            stream.notify(_records(3))
+            stream.notify(_records(2, prediction=0))
+            await asyncio.sleep(0.15)
+
+            assert first.queue.qsize() == second.queue.qsize() == 1
+            message = first.queue.get_nowait()
+            assert message is second.queue.get_nowait()  # Serialised once
+            event, data = _parse(message)
+            assert event == "update"
+            assert data["new"] == {"count": 5, "high_risk": 3, "outliers": 0}
+            assert len(data["recent"]) == 5
+            assert "total_predictions" in data["stats"]
+
+        asyncio.run(scenario())
+
+    def test_tracker_is_read_off_the_event_loop(self, monkeypatch):
+        """Stats and spikes take the tracker lock, so frames must read them on a thread."""
+        import threading
+
+        import app.stream
+
+        readers = []
+
+        def read_tracker():
+            readers.append(threading.current_thread())
+            return {"total_predictions": 1}, {"spike_detected": False}
+
+        monkeypatch.setattr(app.stream, "_read_tracker", read_tracker)
+
+        async def scenario():
+            stream = AnalyticsBroadcaster(interval_ms=20)
+            subscriber = stream.subscribe()
+            stream.notify(_records(1))
+            await asyncio.sleep(0.1)
+            stream.notify(_records(1))
+            await asyncio.sleep(0.1)
+            return subscriber.queue.qsize()
+
+        assert asyncio.run(scenario()) == 2
+        assert readers and threading.main_thread() not in readers
+
+    def test_frame_rate_is_capped(self):
+        """A steady trickle of events should not exceed one frame per interval."""
+        async def scenario():
+            stream = AnalyticsBroadcaster(interval_ms=100, client_buffer=100)
+            subscriber = stream.subscribe()
+            for _ in range(20):
+                stream.notify(_records(1))
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.15)
+            assert 2 <= subscriber.queue.qsize() <= 4
+
+        asyncio.run(scenario())
+
+    def test_slow_subscriber_is_dropped(self):
+        """A client that falls client_buffer frames behind should be disconnected."""
+        async def scenario():
+            stream = AnalyticsBroadcaster(interval_ms=0, client_buffer=2)
+            slow, fast = stream.subscribe(), stream.subscribe()
+            for _ in range(3):
+                stream.notify(_records(1))
+                await asyncio.sleep(0.01)
+                while not fast.queue.empty():
+                    fast.queue.get_nowait()
+
+            assert slow.dropped and not fast.dropped
+            assert stream.subscribers == 1
+            frames = [frame async for frame in stream.frames(slow)]
+            assert [_parse(f)[0] for f in frames] == ["snapshot"]  # Then the response ends
+
+        asyncio.run(scenario())
+
+    def test_no_work_without_subscribers(self):
+        """notify() should do nothing when nobody is listening."""
+        async def scenario():
+            stream = AnalyticsBroadcaster(interval_ms=0)
+            stream.notify(_records(10))
+            assert stream._timer is None
+
+        asyncio.run(scenario())
+
+    def test_client_limit(self, client, monkeypatch):
+        """Subscribers beyond max_clients should be refused with 503."""
+        from app.stream import broadcaster
+
+        monkeypatch.setattr(broadcaster, "max_clients", 0)
+        with pytest.raises(StreamFull):
+            broadcaster.subscribe()
+        response = client.get("/analytics/stream")
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers